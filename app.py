@@ -3,8 +3,6 @@ import pandas as pd
 import numpy as np
 import requests
 import time
-import pandas_ta as ta
-import ccxt
 import streamlit.components.v1 as components
 from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime
@@ -13,6 +11,27 @@ from pathlib import Path
 import json
 import warnings
 from binance.client import Client
+from vps_config import EXCHANGE_CONFIGS, SCAN_CACHE_CONFIG
+from exchange_client import call_with_retry, get_ccxt_exchange, http_get
+from ccxt_backend import fetch_ohlcv_batch
+import scan_cache
+import scan_log
+import scan_scheduler
+from scan_cache import cached_scan
+from candle_store import BINANCE_FORMAT, BYBIT_FORMAT, HUOBI_FORMAT, KUCOIN_FORMAT, OKX_FORMAT, TIMEFRAME_MS, get_candles
+import binance_stream
+from indicators import (
+    compute_indicators,
+    get_cmf_period,
+    get_cmf_thresholds,
+    get_cmo_levels,
+    get_cmo_period,
+    get_kvo_params,
+    get_obv_ma_period,
+    get_rsi_levels,
+    get_rsi_period,
+    panel_snapshot,
+)
 
 # Suprimir warnings do pandas sobre SettingWithCopyWarning
 warnings.filterwarnings('ignore', category=pd.errors.SettingWithCopyWarning)
@@ -181,101 +200,70 @@ h1 {
 </style>
 """, unsafe_allow_html=True)
 
-# --- Funções de Lógica ---
-
-def get_cmo_period(timeframe):
-    """Retorna o período apropriado do CMO baseado no timeframe"""
-    timeframe_periods = {
-        '5m': 9,
-        '15m': 9,
-        '30m': 14,
-        '1h': 14,
-        '2h': 20,
-        '4h': 20,
-        '1d': 28
-    }
-    return timeframe_periods.get(timeframe, 14)  # padrão 14
-
-def get_cmo_levels(timeframe):
-    """Retorna os níveis de sobrecompra/sobrevenda do CMO baseado no timeframe"""
-    if timeframe in ['5m', '15m', '30m']:
-        return 50, -50  # +50, -50
-    else:
-        return 40, -40  # +40, -40
-
-def get_kvo_params(timeframe):
-    """Retorna os parâmetros do KVO baseados no timeframe (fast, slow, trigger)"""
-    timeframe_params = {
-        '5m': (14, 28, 9),
-        '15m': (21, 34, 9),
-        '30m': (26, 45, 10),
-        '1h': (30, 50, 13),
-        '2h': (34, 55, 13),
-        '4h': (34, 60, 14),
-        '1d': (40, 75, 20)
-    }
-    return timeframe_params.get(timeframe, (34, 55, 13))  # padrão clássico
-
-# ----------------- OBV -----------------
-def get_obv_ma_period(timeframe):
-    """Retorna o período da média móvel usada para suavizar o OBV de acordo com o timeframe"""
-    mapping = {
-        '5m': 7,
-        '15m': 10,
-        '30m': 14,
-        '1h': 20,
-        '2h': 30,
-        '4h': 40,
-        '1d': 50
-    }
-    return mapping.get(timeframe, 20)
-
-# ----------------- CMF -----------------
-def get_cmf_period(timeframe):
-    """Retorna o período do CMF baseado no timeframe"""
-    mapping = {
-        '5m': 10,
-        '15m': 14,
-        '30m': 14,
-        '1h': 21,
-        '2h': 25,
-        '4h': 32,
-        '1d': 34
-    }
-    return mapping.get(timeframe, 20)
-
-def get_cmf_thresholds(timeframe):
-    """Retorna (positivo, negativo) thresholds para CMF"""
-    if timeframe in ['5m', '15m', '30m']:
-        return 0.1, -0.1
-    elif timeframe in ['1h', '2h', '4h']:
-        return 0.2, -0.2
-    else:
-        return 0.25, -0.25
-
-# ----------------- RSI -----------------
-def get_rsi_period(timeframe):
-    """Retorna o período do RSI baseado no timeframe"""
-    mapping = {
-        '5m': 9,
-        '15m': 9,
-        '30m': 10,
-        '1h': 10,
-        '2h': 14,
-        '4h': 14,
-        '1d': 14
-    }
-    return mapping.get(timeframe, 14)
+# ----------------- Concorrência -----------------
+def get_max_workers(exchange_key: str) -> int:
+    """Retorna o número máximo de requisições de velas simultâneas para a exchange"""
+    return EXCHANGE_CONFIGS.get(exchange_key, {}).get('max_concurrency', 8)
+
+def _fetch_binance_symbol(symbol: str, timeframe: str):
+    """Busca as velas de um símbolo da Binance e devolve o DataFrame limpo, pronto para o painel
+    de indicadores. Retorna None quando o par deve ser ignorado (dados insuficientes ou erro)."""
+    def fetch_klines(limit, since, tf):
+        klines_url = f"https://api.binance.com/api/v3/klines?symbol={symbol}&interval={tf}&limit={limit}"
+        kline_response = http_get('binance', klines_url, weight=2)
+        kline_response.raise_for_status()
+        return kline_response.json()
+
+    try:
+        # Com o stream ativo e em dia, as velas vêm direto do WebSocket; senão, só as velas
+        # novas são baixadas quando o buffer do símbolo já existe
+        ohlcv = binance_stream.live_candles(symbol, timeframe, 100, BINANCE_FORMAT)
+        if ohlcv is None:
+            ohlcv = get_candles('binance', symbol, timeframe, fetch_klines, limit=100, candle_format=BINANCE_FORMAT)
+
+        if len(ohlcv) < 20:  # Checagem mínima para ter dados suficientes
+            return None
+
+        # Lista completa de colunas devolvidas pela API
+        column_names = [
+            'timestamp', 'open', 'high', 'low', 'close', 'volume',
+            'close_time', 'quote_asset_volume', 'number_of_trades',
+            'taker_buy_base_asset_volume', 'taker_buy_quote_asset_volume', 'ignore'
+        ]
+        # Passamos "type: ignore" para evitar falsos-positivos das stubs do pandas
+        df = pd.DataFrame(ohlcv, columns=column_names)  # type: ignore[arg-type]
+
+        # Manter apenas as colunas necessárias e converter para numérico
+        df = df[['timestamp', 'open', 'high', 'low', 'close', 'volume']]
 
-def get_rsi_levels(timeframe):
-    """Retorna (sobrecompra, sobrevenda) níveis para RSI"""
-    if timeframe == '5m':
-        return 80, 20
-    else:
-        return 70, 30
+        # Converter para numérico com tratamento de erros
+        for col in ['open', 'high', 'low', 'close', 'volume']:
+            df[col] = pd.to_numeric(df[col], errors='coerce')
 
-@st.cache_data(ttl=300) # Cache de 10 minutos
-def get_binance_data(timeframe, top_n=200):
+        # Remover linhas com dados inválidos (NaN)
+        df = df.dropna()
+
+        # Verificar se ainda temos dados suficientes após limpeza
+        if len(df) < 20:
+            return None
+
+        # Verificar se há variação nos preços (evitar pares "mortos")
+        if df['close'].nunique() < 5:  # type: ignore[attr-defined]
+            return None
+
+        # Verificar se há volume mínimo
+        if df['volume'].sum() == 0:  # Se volume total é zero, pular
+            return None
+
+        df['symbol'] = symbol.replace('USDT', '/USDT')
+        return df
+
+    except Exception as symbol_error:
+        # Se houver qualquer erro com este símbolo específico, apenas continuar
+        return None
+
+@cached_scan('Binance')  # Válido até o próximo fechamento de vela do timeframe
+def get_binance_data(timeframe, top_n=200, max_workers=None):
     """
     Busca e processa dados da Binance para as top N moedas do mercado Spot.
     Calcula os indicadores RSI e MACD.
@@ -283,7 +271,7 @@ def get_binance_data(timeframe, top_n=200):
     try:
         # 1. Buscar tickers para todos os pares para pegar o volume via API direta
         tickers_url = "https://api.binance.com/api/v3/ticker/24hr"
-        response = requests.get(tickers_url)
+        response = http_get('binance', tickers_url, weight=80)  # peso 80 na API da Binance (todos os símbolos)
         response.raise_for_status()  # Lança exceção para erros HTTP
         all_tickers = response.json()
 
@@ -298,382 +286,72 @@ def get_binance_data(timeframe, top_n=200):
         top_symbols = [t['symbol'] for t in sorted_tickers[:top_n]]
 
         if not top_symbols:
-            st.warning("Não foi possível encontrar pares USDT com volume. A API da Binance pode estar com problemas.")
+            scan_log.warning("Não foi possível encontrar pares USDT com volume. A API da Binance pode estar com problemas.")
             return pd.DataFrame()
 
-        all_data = []
+        # Acompanhar o top N pelo WebSocket (se habilitado em BINANCE_STREAM_CONFIG)
+        binance_stream.subscribe(top_symbols, timeframe, 100, BINANCE_FORMAT)
 
-        # 3. Para cada símbolo no top N, buscar os dados de velas (klines)
-        for symbol in top_symbols:
-            try:
-                klines_url = f"https://api.binance.com/api/v3/klines?symbol={symbol}&interval={timeframe}&limit=100"
-                kline_response = requests.get(klines_url)
-                kline_response.raise_for_status()
-                ohlcv = kline_response.json()
-
-                if len(ohlcv) < 20:  # Checagem mínima para ter dados suficientes
-                    continue
+        # 3. Buscar as velas (klines) do top N em paralelo, limitado por max_workers
+        if max_workers is None:
+            max_workers = get_max_workers('binance')
 
-                # Lista completa de colunas devolvidas pela API
-                column_names = [
-                    'timestamp', 'open', 'high', 'low', 'close', 'volume',
-                    'close_time', 'quote_asset_volume', 'number_of_trades',
-                    'taker_buy_base_asset_volume', 'taker_buy_quote_asset_volume', 'ignore'
-                ]
-                # Passamos "type: ignore" para evitar falsos-positivos das stubs do pandas
-                df = pd.DataFrame(ohlcv, columns=column_names)  # type: ignore[arg-type]
-                
-                # Manter apenas as colunas necessárias e converter para numérico
-                df = df[['timestamp', 'open', 'high', 'low', 'close', 'volume']]
-                
-                # Converter para numérico com tratamento de erros
-                for col in ['open', 'high', 'low', 'close', 'volume']:
-                    df[col] = pd.to_numeric(df[col], errors='coerce')
-                
-                # Remover linhas com dados inválidos (NaN)
-                df = df.dropna()
-                
-                # Verificar se ainda temos dados suficientes após limpeza
-                if len(df) < 20:
-                    continue
-                
-                # Verificar se há variação nos preços (evitar pares "mortos")
-                if df['close'].nunique() < 5:  # type: ignore[attr-defined]
-                    continue
-                
-                # Verificar se há volume mínimo
-                if df['volume'].sum() == 0:  # Se volume total é zero, pular
-                    continue
-                
-                df['symbol'] = symbol.replace('USDT', '/USDT')
-
-                # 4. Calcular Indicadores com pandas-ta (com tratamento de erro)
-                try:
-                    # Verificar novamente se temos dados suficientes
-                    rsi_period = get_rsi_period(timeframe)
-                    if len(df) < rsi_period:
-                        continue
-                        
-                    df.ta.rsi(length=rsi_period, append=True)
-                    rsi_col = f"RSI_{rsi_period}"
-                    
-                    # --- Ultimate Oscillator (UO) ---
-                    df.ta.uo(length=[7, 14, 28], append=True)
-                    
-                    # --- Awesome Oscillator (AO) ---
-                    # AO = SMA(HL2, 5) - SMA(HL2, 34)
-                    # HL2 = (High + Low) / 2
-                    hl2 = (df['high'] + df['low']) / 2  # type: ignore[operator]
-                    sma_5 = hl2.rolling(window=5).mean()  # type: ignore[attr-defined]
-                    sma_34 = hl2.rolling(window=34).mean()  # type: ignore[attr-defined]
-                    df['AO'] = sma_5 - sma_34
-                    
-                    # Diferença para detectar mudança de cor (verde/vermelho)
-                    df['AO_diff'] = df['AO'].diff()  # type: ignore[attr-defined]
-                    df['AO_prev'] = df['AO'].shift(1)  # type: ignore[attr-defined]
-                    
-                    # --- Chande Momentum Oscillator (CMO) ---
-                    cmo_period = get_cmo_period(timeframe)
-                    
-                    # Calcular momentum (mudança do preço)
-                    momm = df['close'].diff()  # type: ignore[attr-defined]
-                    
-                    # Separar gains e losses
-                    m1 = momm.where(momm >= 0, 0)  # gains (valores positivos)
-                    m2 = (-momm).where(momm < 0, 0)  # losses (valores negativos convertidos para positivos)
-                    
-                    # Somas móveis
-                    sm1 = m1.rolling(window=cmo_period).sum()  # type: ignore[attr-defined]
-                    sm2 = m2.rolling(window=cmo_period).sum()  # type: ignore[attr-defined]
-                    
-                    # CMO = 100 * (sm1 - sm2) / (sm1 + sm2)
-                    df['CMO'] = 100 * (sm1 - sm2) / (sm1 + sm2)
-                    df['CMO_prev'] = df['CMO'].shift(1)  # type: ignore[attr-defined]
-                    
-                    # --- Klinger Volume Oscillator (KVO) ---
-                    fast_period, slow_period, trigger_period = get_kvo_params(timeframe)
-                    
-                    # Calcular HLC3 (typical price)
-                    hlc3 = (df['high'] + df['low'] + df['close']) / 3
-                    
-                    # Trend: se HLC3 atual > HLC3 anterior, trend positivo, senão negativo
-                    trend_condition = hlc3 > hlc3.shift(1)  # type: ignore[attr-defined]
-                    
-                    # xTrend = se trend positivo: volume * 100, senão: -volume * 100
-                    x_trend = df['volume'].where(trend_condition, -df['volume']) * 100  # type: ignore[attr-defined]
-                    
-                    # Calcular EMAs
-                    x_fast = x_trend.ewm(span=fast_period).mean()  # type: ignore[attr-defined]
-                    x_slow = x_trend.ewm(span=slow_period).mean()  # type: ignore[attr-defined]
-                    
-                    # KVO = EMA_fast - EMA_slow
-                    df['KVO'] = x_fast - x_slow
-                    
-                    # Trigger = EMA do KVO
-                    df['KVO_trigger'] = df['KVO'].ewm(span=trigger_period).mean()  # type: ignore[attr-defined]
-                    df['KVO_prev'] = df['KVO'].shift(1)  # type: ignore[attr-defined]
-                    df['KVO_trigger_prev'] = df['KVO_trigger'].shift(1)  # type: ignore[attr-defined]
-                    
-                    # --- Directional Movement Index (DMI) ---
-                    dmi_period = get_dmi_period(timeframe)
-                    df.ta.adx(length=dmi_period, append=True)  # cria ADX_{period}, DMP_{period}, DMN_{period}
-                    adx_col = f"ADX_{dmi_period}"
-                    dip_col = f"DMP_{dmi_period}"
-                    dim_col = f"DMN_{dmi_period}"
-                    df['ADX'] = df[adx_col]
-                    df['DI_plus'] = df[dip_col]
-                    df['DI_minus'] = df[dim_col]
-                    # valores anteriores para possíveis filtros futuros
-                    df['DI_plus_prev'] = df['DI_plus'].shift(1)  # type: ignore[attr-defined]
-                    df['DI_minus_prev'] = df['DI_minus'].shift(1)  # type: ignore[attr-defined]
-                    df['ADX_prev'] = df['ADX'].shift(1)  # type: ignore[attr-defined]
-                    
-                    # --- On Balance Volume (OBV) ---
-                    obv_ma_period = get_obv_ma_period(timeframe)
-                    # var cumVol = 0 / cumVol += volume. Precisamos do OBV acumulativo com sinal
-                    obv_raw = (df['close'].diff()  # type: ignore[attr-defined]
-                                .apply(lambda x: 1 if x > 0 else (-1 if x < 0 else 0)) * df['volume']).fillna(0)
-                    df['OBV'] = obv_raw.cumsum()  # type: ignore[attr-defined]
-                    # Suavizar OBV com EMA (padrão) do período definido
-                    df['OBV_MA'] = df['OBV'].ewm(span=obv_ma_period).mean()  # type: ignore[attr-defined]
-                    df['OBV_prev'] = df['OBV'].shift(1)  # type: ignore[attr-defined]
-                    df['OBV_MA_prev'] = df['OBV_MA'].shift(1)  # type: ignore[attr-defined]
-                    
-                    # --- Chaikin Money Flow (CMF) ---
-                    cmf_period = get_cmf_period(timeframe)
-                    cmf_pos_th, cmf_neg_th = get_cmf_thresholds(timeframe)
-
-                    # Avoid division by zero for (high - low)
-                    hl_range = (df['high'] - df['low']).replace(0, np.nan)  # type: ignore[attr-defined]
-                    ad = ((2 * df['close'] - df['low'] - df['high']) / hl_range) * df['volume']  # type: ignore[arg-type]
-                    cmf_num = ad.rolling(window=cmf_period).sum()  # type: ignore[attr-defined]
-                    cmf_den = df['volume'].rolling(window=cmf_period).sum()  # type: ignore[attr-defined]
-                    df['CMF'] = cmf_num / cmf_den
-                    df['CMF_prev'] = df['CMF'].shift(1)  # type: ignore[attr-defined]
-                    
-                    # Verificar se os indicadores foram calculados corretamente
-                    if (
-                        rsi_col not in df.columns
-                        or 'UO_7_14_28' not in df.columns
-                        or 'AO' not in df.columns
-                        or 'CMO' not in df.columns
-                        or 'KVO' not in df.columns
-                        or 'KVO_trigger' not in df.columns
-                        or 'OBV' not in df.columns
-                        or 'OBV_MA' not in df.columns
-                        or 'CMF' not in df.columns
-                    ):
-                        continue
-                        
-                    # Remover linhas onde os indicadores são NaN
-                    df = df.dropna(subset=[rsi_col, 'UO_7_14_28', 'AO', 'CMO', 'KVO', 'KVO_trigger', 'OBV', 'OBV_MA', 'CMF'])  # type: ignore[arg-type]
-                    
-                    if len(df) == 0:
-                        continue
-                        
-                except Exception as indicator_error:
-                    # Não mostrar warning para cada erro individual, apenas continuar
-                    continue
+        if max_workers <= 1:
+            results = [_fetch_binance_symbol(symbol, timeframe) for symbol in top_symbols]
+        else:
+            results = [None] * len(top_symbols)
+            with ThreadPoolExecutor(max_workers=max_workers) as executor:
+                futures = {
+                    executor.submit(_fetch_binance_symbol, symbol, timeframe): idx
+                    for idx, symbol in enumerate(top_symbols)
+                }
+                for future in as_completed(futures):
+                    results[futures[future]] = future.result()
 
-                # Preparar a última e penúltima vela para detecção de cruzamentos do UO
-                if len(df) < 2:
-                    continue  # Necessário pelo menos duas velas
-
-                last_row = df.iloc[-1:].copy()
-                # Armazenar valor anterior do UO para filtros de cruzamento
-                last_row['UO_prev'] = df['UO_7_14_28'].iloc[-2]
-                # Armazenar valor anterior do AO para filtros de cruzamento
-                last_row['AO_prev'] = df['AO'].iloc[-2]
-                # Armazenar valor anterior do CMO para filtros de cruzamento
-                last_row['CMO_prev'] = df['CMO'].iloc[-2]
-                # Armazenar valores anteriores do KVO para filtros de cruzamento
-                last_row['KVO_prev'] = df['KVO'].iloc[-2]
-                last_row['KVO_trigger_prev'] = df['KVO_trigger'].iloc[-2]
-                last_row['OBV_prev'] = df['OBV'].iloc[-2]
-                last_row['OBV_MA_prev'] = df['OBV_MA'].iloc[-2]
-                last_row['CMF_prev'] = df['CMF'].iloc[-2]
-
-                # --- Variação percentual últimas 3 velas ---
-                if len(df) >= 4:
-                    pct_change_3 = ((df['close'].iloc[-1] - df['close'].iloc[-4]) / df['close'].iloc[-4]) * 100
-                    last_row['pct_change'] = pct_change_3
-                else:
-                    last_row['pct_change'] = 0.0
-
-                all_data.append(last_row)
-                
-            except Exception as symbol_error:
-                # Se houver qualquer erro com este símbolo específico, apenas continuar
-                continue
+        # Manter a ordem por volume, igual à busca sequencial
+        all_data = [df for df in results if df is not None]
 
-        if not all_data:
-            st.warning("Não foi possível obter dados de velas para os principais pares. Tente outro tempo gráfico.")
+        # Indicadores de todos os símbolos num único passe (ver indicators.panel_snapshot)
+        final_df = panel_snapshot(all_data, timeframe)
+        if final_df.empty:
+            scan_log.warning("Não foi possível obter dados de velas para os principais pares. Tente outro tempo gráfico.")
             return pd.DataFrame()
 
-        # Concatenar todos os dataframes em um só
-        final_df = pd.concat(all_data)
         return final_df.reset_index(drop=True)
 
     except requests.exceptions.HTTPError as http_err:
-        st.error(f"Erro de HTTP ao conectar com a Binance: {http_err}")
+        scan_log.error(f"Erro de HTTP ao conectar com a Binance: {http_err}")
         if http_err.response.status_code == 451:
-            st.error("Acesso negado por restrições geográficas (Erro 451).")
+            scan_log.error("Acesso negado por restrições geográficas (Erro 451).")
         return pd.DataFrame()
     except Exception as e:
-        st.error(f"Ocorreu um erro ao buscar os dados: {e}")
+        scan_log.error(f"Ocorreu um erro ao buscar os dados: {e}")
         return pd.DataFrame()
 
-# ----------------- DMI -----------------
-def get_dmi_period(timeframe: str) -> int:
-    """Retorna o período do DMI (DI/ADX) baseado no timeframe"""
-    mapping = {
-        '5m': 10,
-        '15m': 10,
-        '30m': 14,
-        '1h': 14,
-        '2h': 20,
-        '4h': 20,
-        '1d': 25
-    }
-    return mapping.get(timeframe, 14)
-
-# --- Nova função para garantir cálculo único de indicadores ---
-
-def compute_indicators(df: pd.DataFrame, timeframe: str) -> pd.DataFrame:
-    """Calcula todos os indicadores técnicos usados no scanner de forma padronizada.
-    Caso as colunas já existam, elas serão sobrescritas garantindo consistência entre exchanges."""
-    if df.empty:
-        return df
-
-    # --- RSI ---
-    rsi_period = get_rsi_period(timeframe)
-    if len(df) >= rsi_period:
-        df.ta.rsi(length=rsi_period, append=True)
-    
-    # --- Ultimate Oscillator (UO) ---
-    df.ta.uo(length=[7, 14, 28], append=True)
-
-    # --- Awesome Oscillator (AO) ---
-    hl2 = (df["high"] + df["low"]) / 2  # type: ignore[operator]
-    df["AO"] = hl2.rolling(window=5).mean() - hl2.rolling(window=34).mean()
-    df["AO_diff"] = df["AO"].diff()  # type: ignore[attr-defined]
-
-    # --- Chande Momentum Oscillator (CMO) ---
-    cmo_period = get_cmo_period(timeframe)
-    momm = df["close"].diff()  # type: ignore[attr-defined]
-    m1 = momm.where(momm >= 0, 0)
-    m2 = (-momm).where(momm < 0, 0)
-    sm1 = m1.rolling(window=cmo_period).sum()  # type: ignore[attr-defined]
-    sm2 = m2.rolling(window=cmo_period).sum()  # type: ignore[attr-defined]
-    df["CMO"] = 100 * (sm1 - sm2) / (sm1 + sm2)
-
-    # --- Klinger Volume Oscillator (KVO) ---
-    fast_p, slow_p, trg_p = get_kvo_params(timeframe)
-    hlc3 = (df["high"] + df["low"] + df["close"]) / 3
-    trend_condition = hlc3 > hlc3.shift(1)
-    x_trend = df["volume"].where(trend_condition, -df["volume"]) * 100  # type: ignore[attr-defined]
-    x_fast = x_trend.ewm(span=fast_p).mean()
-    x_slow = x_trend.ewm(span=slow_p).mean()
-    df["KVO"] = x_fast - x_slow
-    df["KVO_trigger"] = df["KVO"].ewm(span=trg_p).mean()
-
-    # --- Directional Movement Index (DMI) ---
-    dmi_period = get_dmi_period(timeframe)
-    df.ta.adx(length=dmi_period, append=True)
-    df["ADX"] = df[f"ADX_{dmi_period}"]
-    df["DI_plus"] = df[f"DMP_{dmi_period}"]
-    df["DI_minus"] = df[f"DMN_{dmi_period}"]
-
-    # --- On Balance Volume (OBV) ---
-    obv_ma_p = get_obv_ma_period(timeframe)
-    obv_raw = (
-        df["close"].diff().apply(lambda x: 1 if x > 0 else (-1 if x < 0 else 0)) * df["volume"]
-    ).fillna(0)
-    df["OBV"] = obv_raw.cumsum()
-    df["OBV_MA"] = df["OBV"].ewm(span=obv_ma_p).mean()
-
-    # --- Chaikin Money Flow (CMF) ---
-    cmf_p = get_cmf_period(timeframe)
-    hl_rng = (df["high"] - df["low"]).replace(0, np.nan)
-    ad = ((2 * df["close"] - df["low"] - df["high"]) / hl_rng) * df["volume"]
-    cmf_num = ad.rolling(window=cmf_p).sum()
-    cmf_den = df["volume"].rolling(window=cmf_p).sum()
-    df["CMF"] = cmf_num / cmf_den
-
-    return df
-
-def standardize_final_data(df: pd.DataFrame, timeframe: str) -> pd.DataFrame:
-    """
-    Padroniza a estrutura final dos dados para todas as exchanges.
-    Garante que todos os dados tenham a mesma estrutura e cálculos.
-    """
-    # Garantir que os indicadores estejam atualizados e consistentes
-    df = compute_indicators(df, timeframe)
-
-    if len(df) < 2:
-        return pd.DataFrame()
-    
-    # Pegar apenas a última linha (dados mais recentes)
-    last_row = df.iloc[-1:].copy()
-    
-    # Garantir que temos dados anteriores para cálculos
-    if len(df) >= 2:
-        last_row["UO_prev"] = df["UO_7_14_28"].iloc[-2]
-        last_row["AO_prev"] = df["AO"].iloc[-2]
-        last_row["CMO_prev"] = df["CMO"].iloc[-2]
-        last_row["KVO_prev"] = df["KVO"].iloc[-2]
-        last_row["KVO_trigger_prev"] = df["KVO_trigger"].iloc[-2]
-        last_row["OBV_prev"] = df["OBV"].iloc[-2]
-        last_row["OBV_MA_prev"] = df["OBV_MA"].iloc[-2]
-        last_row["CMF_prev"] = df["CMF"].iloc[-2]
-    
-    # Calcular % de mudança padronizada (últimas 3 velas)
-    if len(df) >= 4:
-        pct_change_3 = ((df["close"].iloc[-1] - df["close"].iloc[-4]) / df["close"].iloc[-4]) * 100
-        last_row["pct_change"] = pct_change_3
-    else:
-        last_row["pct_change"] = 0.0
-    
-    # Garantir que temos informações de preço e volume
-    last_row["price"] = df["close"].iloc[-1]
-    
-    # Adicionar timestamp de processamento para debug
-    last_row["processed_at"] = pd.Timestamp.now()
-    
-    # Validar se todos os indicadores essenciais estão presentes
-    required_cols = ['UO_7_14_28', 'AO', 'CMO', 'KVO', 'KVO_trigger', 'OBV', 'OBV_MA', 'CMF']
-    missing_cols = [col for col in required_cols if col not in last_row.columns or pd.isna(last_row[col].iloc[0])]
-    
-    if missing_cols:
-        # Retornar DataFrame vazio se dados essenciais estão ausentes
-        return pd.DataFrame()
-    
-    return last_row
-
 def debug_exchange_data(df: pd.DataFrame, exchange_name: str) -> None:
     """
     Função de debug para verificar a qualidade dos dados da exchange.
     """
     if df.empty:
-        st.warning(f"⚠️ {exchange_name}: Nenhum dado retornado")
+        scan_log.warning(f"⚠️ {exchange_name}: Nenhum dado retornado")
         return
     
     # Verificar se há valores NaN nos indicadores principais
     nan_cols = df.columns[df.isnull().any()].tolist()
     if nan_cols:
-        st.warning(f"⚠️ {exchange_name}: Valores NaN encontrados em: {', '.join(nan_cols)}")
+        scan_log.warning(f"⚠️ {exchange_name}: Valores NaN encontrados em: {', '.join(nan_cols)}")
     
     # Verificar consistência de pct_change
     if 'pct_change' in df.columns:
         extreme_changes = df[abs(df['pct_change']) > 50]  # Mudanças extremas (>50%)
         if not extreme_changes.empty:
-            st.warning(f"⚠️ {exchange_name}: {len(extreme_changes)} moedas com mudanças extremas (>50%)")
+            scan_log.warning(f"⚠️ {exchange_name}: {len(extreme_changes)} moedas com mudanças extremas (>50%)")
     
     # Log de sucesso
-    st.success(f"✅ {exchange_name}: {len(df)} moedas processadas com sucesso")
+    scan_log.success(f"✅ {exchange_name}: {len(df)} moedas processadas com sucesso")
 
 # ----------------- Bybit DATA -----------------
-@st.cache_data(ttl=300)  # Cache de 10 minutos
+@cached_scan('Bybit')  # Válido até o próximo fechamento de vela do timeframe
 
 def get_bybit_data(timeframe: str, top_n: int = 200) -> pd.DataFrame:
     """Busca e processa dados da Bybit Spot para os top N pares USDT.
@@ -681,16 +359,16 @@ def get_bybit_data(timeframe: str, top_n: int = 200) -> pd.DataFrame:
     try:
         # 1. Buscar lista completa de tickers 24h (Spot)
         tickers_url = "https://api.bybit.com/v5/market/tickers?category=spot"
-        response = requests.get(tickers_url, timeout=10)
+        response = http_get('bybit', tickers_url, timeout=10)
         response.raise_for_status()
         json_resp = response.json()
         if json_resp.get("retCode") != 0:
-            st.warning("Não foi possível obter tickers da Bybit.")
+            scan_log.warning("Não foi possível obter tickers da Bybit.")
             return pd.DataFrame()
 
         tickers_list = json_resp.get("result", {}).get("list", [])
         if not tickers_list:
-            st.warning("Lista de tickers da Bybit vazia.")
+            scan_log.warning("Lista de tickers da Bybit vazia.")
             return pd.DataFrame()
 
         # 2. Filtrar pares USDT e ordenar por volume 24h
@@ -699,7 +377,7 @@ def get_bybit_data(timeframe: str, top_n: int = 200) -> pd.DataFrame:
         top_symbols = [t["symbol"] for t in sorted_tickers[:top_n]]
 
         if not top_symbols:
-            st.warning("Não foi possível encontrar pares USDT na Bybit.")
+            scan_log.warning("Não foi possível encontrar pares USDT na Bybit.")
             return pd.DataFrame()
 
         # 3. Mapear timeframe para intervalo da Bybit
@@ -712,26 +390,27 @@ def get_bybit_data(timeframe: str, top_n: int = 200) -> pd.DataFrame:
             "4h": "240",
             "1d": "D",
         }
-        bybit_interval = tf_map.get(timeframe, "30")
 
         all_data = []
         for symbol in top_symbols:
             try:
-                klines_url = (
-                    f"https://api.bybit.com/v5/market/kline?category=spot&symbol={symbol}&interval={bybit_interval}&limit=100"
-                )
-                kline_resp = requests.get(klines_url, timeout=10)
-                kline_resp.raise_for_status()
-                kline_json = kline_resp.json()
-                if kline_json.get("retCode") != 0:
-                    continue
-                kline_list = kline_json.get("result", {}).get("list", [])
+                def fetch_klines(limit, since, tf):
+                    bybit_interval = tf_map.get(tf, "30")
+                    klines_url = (
+                        f"https://api.bybit.com/v5/market/kline?category=spot&symbol={symbol}&interval={bybit_interval}&limit={limit}"
+                    )
+                    kline_resp = http_get('bybit', klines_url, timeout=10)
+                    kline_resp.raise_for_status()
+                    kline_json = kline_resp.json()
+                    if kline_json.get("retCode") != 0:
+                        return []
+                    # Bybit devolve as velas em ordem reversa (mais recente primeiro)
+                    return kline_json.get("result", {}).get("list", [])[::-1]
+
+                kline_list = get_candles('bybit', symbol, timeframe, fetch_klines, limit=100, candle_format=BYBIT_FORMAT)
                 if len(kline_list) < 20:
                     continue
 
-                # Bybit devolve as velas em ordem reversa (mais recente primeiro)
-                kline_list.reverse()
-
                 # Converter para DataFrame
                 df = pd.DataFrame(
                     kline_list,
@@ -757,128 +436,33 @@ def get_bybit_data(timeframe: str, top_n: int = 200) -> pd.DataFrame:
 
                 df["symbol"] = symbol.replace("USDT", "/USDT")
 
-                # Reutilizar a lógica já existente para indicadores
-                rsi_period = get_rsi_period(timeframe)
-                if len(df) < rsi_period:
-                    continue
-
-                # ----- Indicadores -----
-                try:
-                    df.ta.rsi(length=rsi_period, append=True)
-                    rsi_col = f"RSI_{rsi_period}"
-
-                    df.ta.uo(length=[7, 14, 28], append=True)
-
-                    hl2 = (df["high"] + df["low"]) / 2
-                    df["AO"] = hl2.rolling(window=5).mean() - hl2.rolling(window=34).mean()
-                    df["AO_diff"] = df["AO"].diff()
-
-                    cmo_period = get_cmo_period(timeframe)
-                    momm = df["close"].diff()
-                    m1 = momm.where(momm >= 0, 0)
-                    m2 = (-momm).where(momm < 0, 0)
-                    sm1 = m1.rolling(window=cmo_period).sum()
-                    sm2 = m2.rolling(window=cmo_period).sum()
-                    df["CMO"] = 100 * (sm1 - sm2) / (sm1 + sm2)
-                    df["CMO_prev"] = df["CMO"].shift(1)
-
-                    fast_period, slow_period, trigger_period = get_kvo_params(timeframe)
-                    hlc3 = (df["high"] + df["low"] + df["close"]) / 3
-                    trend_condition = hlc3 > hlc3.shift(1)
-                    x_trend = df["volume"].where(trend_condition, -df["volume"]) * 100
-                    x_fast = x_trend.ewm(span=fast_period).mean()
-                    x_slow = x_trend.ewm(span=slow_period).mean()
-                    df["KVO"] = x_fast - x_slow
-                    df["KVO_trigger"] = df["KVO"].ewm(span=trigger_period).mean()
-
-                    dmi_period = get_dmi_period(timeframe)
-                    df.ta.adx(length=dmi_period, append=True)
-                    df["ADX"] = df[f"ADX_{dmi_period}"]
-                    df["DI_plus"] = df[f"DMP_{dmi_period}"]
-                    df["DI_minus"] = df[f"DMN_{dmi_period}"]
-                    df["DI_plus_prev"] = df["DI_plus"].shift(1)
-                    df["DI_minus_prev"] = df["DI_minus"].shift(1)
-                    df["ADX_prev"] = df["ADX"].shift(1)
-
-                    obv_ma_period = get_obv_ma_period(timeframe)
-                    obv_raw = (
-                        df["close"].diff().apply(lambda x: 1 if x > 0 else (-1 if x < 0 else 0)) * df["volume"]
-                    ).fillna(0)
-                    df["OBV"] = obv_raw.cumsum()
-                    df["OBV_MA"] = df["OBV"].ewm(span=obv_ma_period).mean()
-                    df["OBV_prev"] = df["OBV"].shift(1)
-                    df["OBV_MA_prev"] = df["OBV_MA"].shift(1)
-
-                    cmf_period = get_cmf_period(timeframe)
-                    hl_range = (df["high"] - df["low"]).replace(0, np.nan)
-                    ad = ((2 * df["close"] - df["low"] - df["high"]) / hl_range) * df["volume"]
-                    cmf_num = ad.rolling(window=cmf_period).sum()
-                    cmf_den = df["volume"].rolling(window=cmf_period).sum()
-                    df["CMF"] = cmf_num / cmf_den
-                    df["CMF_prev"] = df["CMF"].shift(1)
-
-                    # Validação de colunas
-                    if (
-                        rsi_col not in df.columns
-                        or "UO_7_14_28" not in df.columns
-                        or "AO" not in df.columns
-                        or "CMO" not in df.columns
-                        or "KVO" not in df.columns
-                        or "KVO_trigger" not in df.columns
-                        or "OBV" not in df.columns
-                        or "OBV_MA" not in df.columns
-                        or "CMF" not in df.columns
-                    ):
-                        continue
-                    df = df.dropna(
-                        subset=[
-                            rsi_col,
-                            "UO_7_14_28",
-                            "AO",
-                            "CMO",
-                            "KVO",
-                            "KVO_trigger",
-                            "OBV",
-                            "OBV_MA",
-                            "CMF",
-                        ]
-                    )
-                    if len(df) == 0:
-                        continue
-                except Exception:
-                    continue
-
-                # Usar função padronizada para estruturar dados finais
-                standardized_row = standardize_final_data(df, timeframe)
-                if not standardized_row.empty:
-                    all_data.append(standardized_row)
+                # Indicadores calculados depois, para todos os símbolos de uma vez
+                all_data.append(df)
             except Exception:
                 continue
 
-        if not all_data:
-            st.warning("Nenhum dado de velas retornado pela Bybit.")
+        # Indicadores de todos os símbolos num único passe (ver indicators.panel_snapshot)
+        final_df = panel_snapshot(all_data, timeframe)
+        if final_df.empty:
+            scan_log.warning("Nenhum dado de velas retornado pela Bybit.")
             return pd.DataFrame()
 
-        final_df = pd.concat(all_data)
         return final_df.reset_index(drop=True)
 
     except Exception as e:
-        st.error(f"Erro ao buscar dados da Bybit: {e}")
+        scan_log.error(f"Erro ao buscar dados da Bybit: {e}")
         return pd.DataFrame()
 
 # ----------------- Bitget DATA -----------------
-@st.cache_data(ttl=300)  # Cache de 10 minutos
+@cached_scan('Bitget')  # Válido até o próximo fechamento de vela do timeframe
 def get_bitget_data(timeframe: str, top_n: int = 200) -> pd.DataFrame:
     """Busca e processa dados Spot da Bitget para os top N pares USDT usando CCXT."""
     try:
-        # 1. Inicializar exchange Bitget com CCXT
-        exchange = ccxt.bitget({
-            'enableRateLimit': True,
-            'sandbox': False,  # Usar API de produção
-        })
+        # 1. Reutilizar a instância CCXT compartilhada da Bitget
+        exchange = get_ccxt_exchange('bitget')
         
-        # 2. Carregar mercados disponíveis
-        markets = exchange.load_markets()
+        # 2. Mercados já carregados (e recarregados em segundo plano após o TTL)
+        markets = exchange.markets
         
         # 3. Filtrar pares USDT do mercado spot
         usdt_spot_pairs = [
@@ -887,11 +471,11 @@ def get_bitget_data(timeframe: str, top_n: int = 200) -> pd.DataFrame:
         ]
         
         if not usdt_spot_pairs:
-            st.warning("⚠️ Nenhum par USDT Spot encontrado na Bitget.")
+            scan_log.warning("⚠️ Nenhum par USDT Spot encontrado na Bitget.")
             return pd.DataFrame()
         
         # 4. Buscar tickers para obter volume
-        tickers = exchange.fetch_tickers(usdt_spot_pairs)
+        tickers = call_with_retry('bitget', exchange.fetch_tickers, usdt_spot_pairs)
         
         # 5. Ordenar por volume e pegar top N
         pairs_with_volume = []
@@ -913,16 +497,17 @@ def get_bitget_data(timeframe: str, top_n: int = 200) -> pd.DataFrame:
         top_pairs = [pair[0] for pair in pairs_with_volume[:top_n]]
 
         if not top_pairs:
-            st.warning("⚠️ Nenhum par com volume > 0 encontrado.")
+            scan_log.warning("⚠️ Nenhum par com volume > 0 encontrado.")
             return pd.DataFrame()
 
         all_data: list[pd.DataFrame] = []
 
-        # 6. Buscar dados OHLCV para cada par
+        # 6. Buscar dados OHLCV de todos os pares (motor sync/async conforme EXCHANGE_CONFIGS)
+        ohlcv_by_symbol = fetch_ohlcv_batch('bitget', top_pairs, timeframe, limit=100)
+
         for symbol in top_pairs:
             try:
-                # Usar CCXT para buscar dados OHLCV
-                ohlcv = exchange.fetch_ohlcv(symbol, timeframe, limit=100)
+                ohlcv = ohlcv_by_symbol.get(symbol, [])
                 
                 if len(ohlcv) < 20:
                     continue
@@ -940,123 +525,34 @@ def get_bitget_data(timeframe: str, top_n: int = 200) -> pd.DataFrame:
                 
                 df["symbol"] = symbol
                 
-                # ---------------- Indicadores ----------------
-                rsi_period = get_rsi_period(timeframe)
-                if len(df) < rsi_period:
-                    continue
-                    
-                try:
-                    # RSI & UO
-                    df.ta.rsi(length=rsi_period, append=True)
-                    rsi_col = f"RSI_{rsi_period}"
-                    df.ta.uo(length=[7, 14, 28], append=True)
-                    
-                    # AO
-                    hl2 = (df["high"] + df["low"]) / 2
-                    df["AO"] = hl2.rolling(window=5).mean() - hl2.rolling(window=34).mean()
-                    df["AO_diff"] = df["AO"].diff()
-                    
-                    # CMO
-                    cmo_period = get_cmo_period(timeframe)
-                    momm = df["close"].diff()
-                    m1 = momm.where(momm >= 0, 0)
-                    m2 = (-momm).where(momm < 0, 0)
-                    sm1 = m1.rolling(window=cmo_period).sum()
-                    sm2 = m2.rolling(window=cmo_period).sum()
-                    df["CMO"] = 100 * (sm1 - sm2) / (sm1 + sm2)
-                    df["CMO_prev"] = df["CMO"].shift(1)
-                    
-                    # KVO
-                    fast_p, slow_p, trg_p = get_kvo_params(timeframe)
-                    hlc3 = (df["high"] + df["low"] + df["close"]) / 3
-                    trend_condition = hlc3 > hlc3.shift(1)
-                    x_trend = df["volume"].where(trend_condition, -df["volume"]) * 100
-                    x_fast = x_trend.ewm(span=fast_p).mean()
-                    x_slow = x_trend.ewm(span=slow_p).mean()
-                    df["KVO"] = x_fast - x_slow
-                    df["KVO_trigger"] = df["KVO"].ewm(span=trg_p).mean()
-                    
-                    # DMI
-                    dmi_p = get_dmi_period(timeframe)
-                    df.ta.adx(length=dmi_p, append=True)
-                    df["ADX"] = df[f"ADX_{dmi_p}"]
-                    df["DI_plus"] = df[f"DMP_{dmi_p}"]
-                    df["DI_minus"] = df[f"DMN_{dmi_p}"]
-                    df["DI_plus_prev"] = df["DI_plus"].shift(1)
-                    df["DI_minus_prev"] = df["DI_minus"].shift(1)
-                    df["ADX_prev"] = df["ADX"].shift(1)
-
-                    # OBV
-                    obv_ma_p = get_obv_ma_period(timeframe)
-                    obv_raw = (
-                        df["close"].diff().apply(lambda x: 1 if x > 0 else (-1 if x < 0 else 0)) * df["volume"]
-                    ).fillna(0)
-                    df["OBV"] = obv_raw.cumsum()
-                    df["OBV_MA"] = df["OBV"].ewm(span=obv_ma_p).mean()
-                    df["OBV_prev"] = df["OBV"].shift(1)
-                    df["OBV_MA_prev"] = df["OBV_MA"].shift(1)
-
-                    # CMF
-                    cmf_p = get_cmf_period(timeframe)
-                    hl_rng = (df["high"] - df["low"]).replace(0, np.nan)
-                    ad = ((2 * df["close"] - df["low"] - df["high"]) / hl_rng) * df["volume"]
-                    cmf_num = ad.rolling(window=cmf_p).sum()
-                    cmf_den = df["volume"].rolling(window=cmf_p).sum()
-                    df["CMF"] = cmf_num / cmf_den
-                    df["CMF_prev"] = df["CMF"].shift(1)
-
-                    # Validação
-                    if (
-                        rsi_col not in df.columns
-                        or "UO_7_14_28" not in df.columns
-                        or "AO" not in df.columns
-                        or "CMO" not in df.columns
-                        or "KVO" not in df.columns
-                        or "KVO_trigger" not in df.columns
-                        or "OBV" not in df.columns
-                        or "OBV_MA" not in df.columns
-                        or "CMF" not in df.columns
-                    ):
-                        continue
-
-                    df = df.dropna(
-                        subset=[
-                            rsi_col,
-                            "UO_7_14_28",
-                            "AO",
-                            "CMO",
-                            "KVO",
-                            "KVO_trigger",
-                            "OBV",
-                            "OBV_MA",
-                            "CMF",
-                        ]
-                    )
-                    if len(df) == 0:
-                        continue
-                except Exception:
-                    continue
-
-                # Usar função padronizada para estruturar dados finais
-                standardized_row = standardize_final_data(df, timeframe)
-                if not standardized_row.empty:
-                    all_data.append(standardized_row)
+                # Indicadores calculados depois, para todos os símbolos de uma vez
+                all_data.append(df)
             except Exception:
                 continue
 
-        if not all_data:
-            st.warning("Nenhum dado de velas retornado pela Bitget.")
+        # Indicadores de todos os símbolos num único passe (ver indicators.panel_snapshot)
+        final_df = panel_snapshot(all_data, timeframe)
+        if final_df.empty:
+            scan_log.warning("Nenhum dado de velas retornado pela Bitget.")
             return pd.DataFrame()
         
-        final_df = pd.concat(all_data)
         return final_df.reset_index(drop=True)
         
     except Exception as e:
-        st.error(f"Erro ao buscar dados da Bitget: {str(e)}")
+        scan_log.error(f"Erro ao buscar dados da Bitget: {str(e)}")
         return pd.DataFrame()
 
 # ----------------- KuCoin DATA -----------------
-@st.cache_data(ttl=300)  # Cache de 10 minutos
+def kucoin_time_range(limit: int, since: int | None, timeframe: str) -> dict:
+    """startAt/endAt (segundos) de /api/v1/market/candles: sem eles a API devolve 1500 velas.
+    Busca completa: as últimas `limit` velas até a vela em formação; incremental: desde `since` (ms)."""
+    step = TIMEFRAME_MS[timeframe]
+    now = int(time.time() * 1000)
+    start = since if since is not None else now // step * step - (limit - 1) * step
+    return {"startAt": start // 1000, "endAt": now // 1000}
+
+
+@cached_scan('KuCoin')  # Válido até o próximo fechamento de vela do timeframe
 
 def get_kucoin_data(timeframe: str, top_n: int = 200) -> pd.DataFrame:
     """Busca e processa dados Spot da KuCoin para os top N pares USDT.
@@ -1064,13 +560,13 @@ def get_kucoin_data(timeframe: str, top_n: int = 200) -> pd.DataFrame:
     try:
         # API v1 da KuCoin para all tickers
         tickers_url = "https://api.kucoin.com/api/v1/market/allTickers"
-        resp = requests.get(tickers_url, timeout=15)
+        resp = http_get('kucoin', tickers_url, timeout=15)
         resp.raise_for_status()
         data = resp.json()
         
         # Verificar se a resposta tem o formato esperado
         if data.get("code") != "200000" or not data.get("data", {}).get("ticker"):
-            st.warning("Resposta inesperada da API da KuCoin")
+            scan_log.warning("Resposta inesperada da API da KuCoin")
             return pd.DataFrame()
         
         tickers_list = data["data"]["ticker"]
@@ -1088,7 +584,7 @@ def get_kucoin_data(timeframe: str, top_n: int = 200) -> pd.DataFrame:
                 })
         
         if not usdt_tickers:
-            st.warning("Não foi possível encontrar pares USDT na KuCoin.")
+            scan_log.warning("Não foi possível encontrar pares USDT na KuCoin.")
             return pd.DataFrame()
         
         # Ordenar por volume e pegar os top N
@@ -1101,31 +597,32 @@ def get_kucoin_data(timeframe: str, top_n: int = 200) -> pd.DataFrame:
             "1h": "1hour", "2h": "2hour", "4h": "4hour", "1d": "1day"
         }
         
-        kucoin_timeframe = timeframe_map.get(timeframe, "1hour")
         all_data: list[pd.DataFrame] = []
         
         for symbol in top_symbols:
             try:
-                # API v1 da KuCoin para candles
-                klines_url = f"https://api.kucoin.com/api/v1/market/candles"
-                params = {
-                    "symbol": symbol,
-                    "type": kucoin_timeframe,
-                    # "limit" não é um parâmetro suportado para candles na V1,
-                    # a API retorna por padrão um número fixo de velas recentes.
-                }
-                
-                kline_resp = requests.get(klines_url, params=params, timeout=10)
-                kline_resp.raise_for_status()
-                kline_data = kline_resp.json()
-                
-                if kline_data.get("code") != "200000" or not kline_data.get("data"):
-                    continue
-                
-                klines = kline_data["data"]
+                def fetch_klines(limit, since, tf):
+                    # API v1 da KuCoin para candles
+                    klines_url = f"https://api.kucoin.com/api/v1/market/candles"
+                    params = {
+                        "symbol": symbol,
+                        "type": timeframe_map.get(tf, "1hour"),
+                        # "limit" não é um parâmetro suportado para candles na V1: a janela
+                        # vem de startAt/endAt
+                        **kucoin_time_range(limit, since, tf),
+                    }
+
+                    kline_resp = http_get('kucoin', klines_url, params=params, timeout=10)
+                    kline_resp.raise_for_status()
+                    kline_data = kline_resp.json()
+
+                    if kline_data.get("code") != "200000" or not kline_data.get("data"):
+                        return []
 
-                # Garantir que os dados estão ordenados do mais antigo para o mais recente
-                klines = sorted(klines, key=lambda x: int(x[0]))
+                    # Garantir que os dados estão ordenados do mais antigo para o mais recente
+                    return sorted(kline_data["data"], key=lambda x: int(x[0]))
+
+                klines = get_candles('kucoin', symbol, timeframe, fetch_klines, limit=100, candle_format=KUCOIN_FORMAT)
 
                 if len(klines) < 20:  # Dados insuficientes
                     continue
@@ -1145,123 +642,25 @@ def get_kucoin_data(timeframe: str, top_n: int = 200) -> pd.DataFrame:
                 
                 df["symbol"] = symbol.replace("-USDT", "/USDT")
                 
-                # ---------------- Indicadores ----------------
-                rsi_period = get_rsi_period(timeframe)
-                if len(df) < rsi_period:
-                    continue
-                    
-                try:
-                    # RSI & UO
-                    df.ta.rsi(length=rsi_period, append=True)
-                    rsi_col = f"RSI_{rsi_period}"
-                    df.ta.uo(length=[7, 14, 28], append=True)
-                    
-                    # AO
-                    hl2 = (df["high"] + df["low"]) / 2
-                    df["AO"] = hl2.rolling(window=5).mean() - hl2.rolling(window=34).mean()
-                    df["AO_diff"] = df["AO"].diff()
-                    
-                    # CMO
-                    cmo_period = get_cmo_period(timeframe)
-                    momm = df["close"].diff()
-                    m1 = momm.where(momm >= 0, 0)
-                    m2 = (-momm).where(momm < 0, 0)
-                    sm1 = m1.rolling(window=cmo_period).sum()
-                    sm2 = m2.rolling(window=cmo_period).sum()
-                    df["CMO"] = 100 * (sm1 - sm2) / (sm1 + sm2)
-                    df["CMO_prev"] = df["CMO"].shift(1)
-                    
-                    # KVO
-                    fast_p, slow_p, trg_p = get_kvo_params(timeframe)
-                    hlc3 = (df["high"] + df["low"] + df["close"]) / 3
-                    trend_condition = hlc3 > hlc3.shift(1)
-                    x_trend = df["volume"].where(trend_condition, -df["volume"]) * 100
-                    x_fast = x_trend.ewm(span=fast_p).mean()
-                    x_slow = x_trend.ewm(span=slow_p).mean()
-                    df["KVO"] = x_fast - x_slow
-                    df["KVO_trigger"] = df["KVO"].ewm(span=trg_p).mean()
-                    
-                    # DMI
-                    dmi_p = get_dmi_period(timeframe)
-                    df.ta.adx(length=dmi_p, append=True)
-                    df["ADX"] = df[f"ADX_{dmi_p}"]
-                    df["DI_plus"] = df[f"DMP_{dmi_p}"]
-                    df["DI_minus"] = df[f"DMN_{dmi_p}"]
-                    df["DI_plus_prev"] = df["DI_plus"].shift(1)
-                    df["DI_minus_prev"] = df["DI_minus"].shift(1)
-                    df["ADX_prev"] = df["ADX"].shift(1)
-
-                    # OBV
-                    obv_ma_p = get_obv_ma_period(timeframe)
-                    obv_raw = (
-                        df["close"].diff().apply(lambda x: 1 if x > 0 else (-1 if x < 0 else 0)) * df["volume"]
-                    ).fillna(0)
-                    df["OBV"] = obv_raw.cumsum()
-                    df["OBV_MA"] = df["OBV"].ewm(span=obv_ma_p).mean()
-                    df["OBV_prev"] = df["OBV"].shift(1)
-                    df["OBV_MA_prev"] = df["OBV_MA"].shift(1)
-
-                    # CMF
-                    cmf_p = get_cmf_period(timeframe)
-                    hl_rng = (df["high"] - df["low"]).replace(0, np.nan)
-                    ad = ((2 * df["close"] - df["low"] - df["high"]) / hl_rng) * df["volume"]
-                    cmf_num = ad.rolling(window=cmf_p).sum()
-                    cmf_den = df["volume"].rolling(window=cmf_p).sum()
-                    df["CMF"] = cmf_num / cmf_den
-                    df["CMF_prev"] = df["CMF"].shift(1)
-
-                    # Validação
-                    if (
-                        rsi_col not in df.columns
-                        or "UO_7_14_28" not in df.columns
-                        or "AO" not in df.columns
-                        or "CMO" not in df.columns
-                        or "KVO" not in df.columns
-                        or "KVO_trigger" not in df.columns
-                        or "OBV" not in df.columns
-                        or "OBV_MA" not in df.columns
-                        or "CMF" not in df.columns
-                    ):
-                        continue
-
-                    df = df.dropna(
-                        subset=[
-                            rsi_col,
-                            "UO_7_14_28",
-                            "AO",
-                            "CMO",
-                            "KVO",
-                            "KVO_trigger",
-                            "OBV",
-                            "OBV_MA",
-                            "CMF",
-                        ]
-                    )
-                    if len(df) == 0:
-                        continue
-                except Exception:
-                    continue
-
-                # Usar função padronizada para estruturar dados finais
-                standardized_row = standardize_final_data(df, timeframe)
-                if not standardized_row.empty:
-                    all_data.append(standardized_row)
+                # Indicadores calculados depois, para todos os símbolos de uma vez
+                all_data.append(df)
             except Exception:
                 continue
 
-        if not all_data:
-            st.warning("Nenhum dado de velas retornado pela KuCoin.")
+        # Indicadores de todos os símbolos num único passe (ver indicators.panel_snapshot)
+        final_df = panel_snapshot(all_data, timeframe)
+        if final_df.empty:
+            scan_log.warning("Nenhum dado de velas retornado pela KuCoin.")
             return pd.DataFrame()
         
-        final_df = pd.concat(all_data)
         return final_df.sort_values(by="timestamp").reset_index(drop=True)
         
     except Exception as e:
-        st.error(f"Erro ao buscar dados da KuCoin: {str(e)}")
+        scan_log.error(f"Erro ao buscar dados da KuCoin: {str(e)}")
         return pd.DataFrame()
 
 # ----------------- OKX DATA -----------------
-@st.cache_data(ttl=300)  # Cache de 10 minutos
+@cached_scan('OKX')  # Válido até o próximo fechamento de vela do timeframe
 
 def get_okx_data(timeframe: str, top_n: int = 200) -> pd.DataFrame:
     """Busca e processa dados Spot da OKX para os top N pares USDT.
@@ -1269,13 +668,13 @@ def get_okx_data(timeframe: str, top_n: int = 200) -> pd.DataFrame:
     try:
         # API v5 da OKX para tickers spot
         tickers_url = "https://www.okx.com/api/v5/market/tickers?instType=SPOT"
-        resp = requests.get(tickers_url, timeout=15)
+        resp = http_get('okx', tickers_url, timeout=15)
         resp.raise_for_status()
         data = resp.json()
         
         # Verificar se a resposta tem o formato esperado
         if data.get("code") != "0" or not data.get("data"):
-            st.warning("Resposta inesperada da API da OKX")
+            scan_log.warning("Resposta inesperada da API da OKX")
             return pd.DataFrame()
         
         tickers_list = data["data"]
@@ -1293,7 +692,7 @@ def get_okx_data(timeframe: str, top_n: int = 200) -> pd.DataFrame:
                 })
         
         if not usdt_tickers:
-            st.warning("Não foi possível encontrar pares USDT na OKX.")
+            scan_log.warning("Não foi possível encontrar pares USDT na OKX.")
             return pd.DataFrame()
         
         # Ordenar por volume e pegar os top N
@@ -1306,30 +705,30 @@ def get_okx_data(timeframe: str, top_n: int = 200) -> pd.DataFrame:
             "1h": "1H", "2h": "2H", "4h": "4H", "1d": "1D"
         }
         
-        okx_timeframe = timeframe_map.get(timeframe, "1H")
         all_data: list[pd.DataFrame] = []
         
         for symbol in top_symbols:
             try:
-                # API v5 da OKX para candles
-                klines_url = f"https://www.okx.com/api/v5/market/candles"
-                params = {
-                    "instId": symbol,
-                    "bar": okx_timeframe,
-                    "limit": "100"
-                }
-                
-                kline_resp = requests.get(klines_url, params=params, timeout=10)
-                kline_resp.raise_for_status()
-                kline_data = kline_resp.json()
-                
-                if kline_data.get("code") != "0" or not kline_data.get("data"):
-                    continue
-                
-                klines = kline_data["data"]
+                def fetch_klines(limit, since, tf):
+                    # API v5 da OKX para candles
+                    klines_url = f"https://www.okx.com/api/v5/market/candles"
+                    params = {
+                        "instId": symbol,
+                        "bar": timeframe_map.get(tf, "1H"),
+                        "limit": str(limit)
+                    }
+
+                    kline_resp = http_get('okx', klines_url, params=params, timeout=10)
+                    kline_resp.raise_for_status()
+                    kline_data = kline_resp.json()
+
+                    if kline_data.get("code") != "0" or not kline_data.get("data"):
+                        return []
+
+                    # A API da OKX retorna do mais recente para o mais antigo, então revertemos.
+                    return kline_data["data"][::-1]
 
-                # A API da OKX retorna do mais recente para o mais antigo, então revertemos.
-                klines.reverse()
+                klines = get_candles('okx', symbol, timeframe, fetch_klines, limit=100, candle_format=OKX_FORMAT)
 
                 if len(klines) < 20:  # Dados insuficientes
                     continue
@@ -1349,134 +748,33 @@ def get_okx_data(timeframe: str, top_n: int = 200) -> pd.DataFrame:
                 
                 df["symbol"] = symbol.replace("-USDT", "/USDT")
                 
-                # ---------------- Indicadores ----------------
-                rsi_period = get_rsi_period(timeframe)
-                if len(df) < rsi_period:
-                    continue
-                    
-                try:
-                    # RSI & UO
-                    df.ta.rsi(length=rsi_period, append=True)
-                    rsi_col = f"RSI_{rsi_period}"
-                    df.ta.uo(length=[7, 14, 28], append=True)
-                    
-                    # AO
-                    hl2 = (df["high"] + df["low"]) / 2
-                    df["AO"] = hl2.rolling(window=5).mean() - hl2.rolling(window=34).mean()
-                    df["AO_diff"] = df["AO"].diff()
-                    
-                    # CMO
-                    cmo_period = get_cmo_period(timeframe)
-                    momm = df["close"].diff()
-                    m1 = momm.where(momm >= 0, 0)
-                    m2 = (-momm).where(momm < 0, 0)
-                    sm1 = m1.rolling(window=cmo_period).sum()
-                    sm2 = m2.rolling(window=cmo_period).sum()
-                    df["CMO"] = 100 * (sm1 - sm2) / (sm1 + sm2)
-                    df["CMO_prev"] = df["CMO"].shift(1)
-                    
-                    # KVO
-                    fast_p, slow_p, trg_p = get_kvo_params(timeframe)
-                    hlc3 = (df["high"] + df["low"] + df["close"]) / 3
-                    trend_condition = hlc3 > hlc3.shift(1)
-                    x_trend = df["volume"].where(trend_condition, -df["volume"]) * 100
-                    x_fast = x_trend.ewm(span=fast_p).mean()
-                    x_slow = x_trend.ewm(span=slow_p).mean()
-                    df["KVO"] = x_fast - x_slow
-                    df["KVO_trigger"] = df["KVO"].ewm(span=trg_p).mean()
-                    
-                    # DMI
-                    dmi_p = get_dmi_period(timeframe)
-                    df.ta.adx(length=dmi_p, append=True)
-                    df["ADX"] = df[f"ADX_{dmi_p}"]
-                    df["DI_plus"] = df[f"DMP_{dmi_p}"]
-                    df["DI_minus"] = df[f"DMN_{dmi_p}"]
-                    df["DI_plus_prev"] = df["DI_plus"].shift(1)
-                    df["DI_minus_prev"] = df["DI_minus"].shift(1)
-                    df["ADX_prev"] = df["ADX"].shift(1)
-
-                    # OBV
-                    obv_ma_p = get_obv_ma_period(timeframe)
-                    obv_raw = (
-                        df["close"].diff().apply(lambda x: 1 if x > 0 else (-1 if x < 0 else 0)) * df["volume"]
-                    ).fillna(0)
-                    df["OBV"] = obv_raw.cumsum()
-                    df["OBV_MA"] = df["OBV"].ewm(span=obv_ma_p).mean()
-                    df["OBV_prev"] = df["OBV"].shift(1)
-                    df["OBV_MA_prev"] = df["OBV_MA"].shift(1)
-
-                    # CMF
-                    cmf_p = get_cmf_period(timeframe)
-                    hl_rng = (df["high"] - df["low"]).replace(0, np.nan)
-                    ad = ((2 * df["close"] - df["low"] - df["high"]) / hl_rng) * df["volume"]
-                    cmf_num = ad.rolling(window=cmf_p).sum()
-                    cmf_den = df["volume"].rolling(window=cmf_p).sum()
-                    df["CMF"] = cmf_num / cmf_den
-                    df["CMF_prev"] = df["CMF"].shift(1)
-
-                    # Validação
-                    if (
-                        rsi_col not in df.columns
-                        or "UO_7_14_28" not in df.columns
-                        or "AO" not in df.columns
-                        or "CMO" not in df.columns
-                        or "KVO" not in df.columns
-                        or "KVO_trigger" not in df.columns
-                        or "OBV" not in df.columns
-                        or "OBV_MA" not in df.columns
-                        or "CMF" not in df.columns
-                    ):
-                        continue
-
-                    df = df.dropna(
-                        subset=[
-                            rsi_col,
-                            "UO_7_14_28",
-                            "AO",
-                            "CMO",
-                            "KVO",
-                            "KVO_trigger",
-                            "OBV",
-                            "OBV_MA",
-                            "CMF",
-                        ]
-                    )
-                    if len(df) == 0:
-                        continue
-                except Exception:
-                    continue
-
-                # Usar função padronizada para estruturar dados finais
-                standardized_row = standardize_final_data(df, timeframe)
-                if not standardized_row.empty:
-                    all_data.append(standardized_row)
+                # Indicadores calculados depois, para todos os símbolos de uma vez
+                all_data.append(df)
             except Exception:
                 continue
 
-        if not all_data:
-            st.warning("Nenhum dado de velas retornado pela OKX.")
+        # Indicadores de todos os símbolos num único passe (ver indicators.panel_snapshot)
+        final_df = panel_snapshot(all_data, timeframe)
+        if final_df.empty:
+            scan_log.warning("Nenhum dado de velas retornado pela OKX.")
             return pd.DataFrame()
         
-        final_df = pd.concat(all_data)
         return final_df.sort_values(by="timestamp").reset_index(drop=True)
         
     except Exception as e:
-        st.error(f"Erro ao buscar dados da OKX: {str(e)}")
+        scan_log.error(f"Erro ao buscar dados da OKX: {str(e)}")
         return pd.DataFrame()
 
 # ----------------- BingX DATA -----------------
-@st.cache_data(ttl=300)  # Cache de 10 minutos
+@cached_scan('BingX')  # Válido até o próximo fechamento de vela do timeframe
 def get_bingx_data(timeframe: str, top_n: int = 200) -> pd.DataFrame:
     """Busca e processa dados Spot da BingX para os top N pares USDT usando CCXT."""
     try:
-        # 1. Inicializar exchange BingX com CCXT
-        exchange = ccxt.bingx({
-            'enableRateLimit': True,
-            'sandbox': False,  # Usar API de produção
-        })
+        # 1. Reutilizar a instância CCXT compartilhada da BingX
+        exchange = get_ccxt_exchange('bingx')
         
-        # 2. Carregar mercados disponíveis
-        markets = exchange.load_markets()
+        # 2. Mercados já carregados (e recarregados em segundo plano após o TTL)
+        markets = exchange.markets
         
         # 3. Filtrar pares USDT do mercado spot
         usdt_spot_pairs = [
@@ -1485,11 +783,11 @@ def get_bingx_data(timeframe: str, top_n: int = 200) -> pd.DataFrame:
         ]
         
         if not usdt_spot_pairs:
-            st.warning("⚠️ Nenhum par USDT Spot encontrado na BingX.")
+            scan_log.warning("⚠️ Nenhum par USDT Spot encontrado na BingX.")
             return pd.DataFrame()
         
         # 4. Buscar tickers para obter volume
-        tickers = exchange.fetch_tickers(usdt_spot_pairs)
+        tickers = call_with_retry('bingx', exchange.fetch_tickers, usdt_spot_pairs)
         
         # 5. Ordenar por volume e pegar top N
         pairs_with_volume = []
@@ -1511,16 +809,17 @@ def get_bingx_data(timeframe: str, top_n: int = 200) -> pd.DataFrame:
         top_pairs = [pair[0] for pair in pairs_with_volume[:top_n]]
 
         if not top_pairs:
-            st.warning("⚠️ Nenhum par com volume > 0 encontrado.")
+            scan_log.warning("⚠️ Nenhum par com volume > 0 encontrado.")
             return pd.DataFrame()
 
         all_data: list[pd.DataFrame] = []
 
-        # 6. Buscar dados OHLCV para cada par
+        # 6. Buscar dados OHLCV de todos os pares (motor sync/async conforme EXCHANGE_CONFIGS)
+        ohlcv_by_symbol = fetch_ohlcv_batch('bingx', top_pairs, timeframe, limit=100)
+
         for symbol in top_pairs:
             try:
-                # Usar CCXT para buscar dados OHLCV
-                ohlcv = exchange.fetch_ohlcv(symbol, timeframe, limit=100)
+                ohlcv = ohlcv_by_symbol.get(symbol, [])
                 
                 if len(ohlcv) < 20:
                     continue
@@ -1538,123 +837,25 @@ def get_bingx_data(timeframe: str, top_n: int = 200) -> pd.DataFrame:
                 
                 df["symbol"] = symbol
                 
-                # --- Indicadores (igual aos outros)
-                rsi_period = get_rsi_period(timeframe)
-                if len(df) < rsi_period:
-                    continue
-                    
-                try:
-                    # RSI & UO
-                    df.ta.rsi(length=rsi_period, append=True)
-                    rsi_col = f"RSI_{rsi_period}"
-                    df.ta.uo(length=[7, 14, 28], append=True)
-                    
-                    # AO
-                    hl2 = (df["high"] + df["low"]) / 2
-                    df["AO"] = hl2.rolling(window=5).mean() - hl2.rolling(window=34).mean()
-                    df["AO_diff"] = df["AO"].diff()
-                    
-                    # CMO
-                    cmo_period = get_cmo_period(timeframe)
-                    momm = df["close"].diff()
-                    m1 = momm.where(momm >= 0, 0)
-                    m2 = (-momm).where(momm < 0, 0)
-                    sm1 = m1.rolling(window=cmo_period).sum()
-                    sm2 = m2.rolling(window=cmo_period).sum()
-                    df["CMO"] = 100 * (sm1 - sm2) / (sm1 + sm2)
-                    df["CMO_prev"] = df["CMO"].shift(1)
-                    
-                    # KVO
-                    fast_p, slow_p, trg_p = get_kvo_params(timeframe)
-                    hlc3 = (df["high"] + df["low"] + df["close"]) / 3
-                    trend_condition = hlc3 > hlc3.shift(1)
-                    x_trend = df["volume"].where(trend_condition, -df["volume"]) * 100
-                    x_fast = x_trend.ewm(span=fast_p).mean()
-                    x_slow = x_trend.ewm(span=slow_p).mean()
-                    df["KVO"] = x_fast - x_slow
-                    df["KVO_trigger"] = df["KVO"].ewm(span=trg_p).mean()
-                    
-                    # DMI
-                    dmi_p = get_dmi_period(timeframe)
-                    df.ta.adx(length=dmi_p, append=True)
-                    df["ADX"] = df[f"ADX_{dmi_p}"]
-                    df["DI_plus"] = df[f"DMP_{dmi_p}"]
-                    df["DI_minus"] = df[f"DMN_{dmi_p}"]
-                    df["DI_plus_prev"] = df["DI_plus"].shift(1)
-                    df["DI_minus_prev"] = df["DI_minus"].shift(1)
-                    df["ADX_prev"] = df["ADX"].shift(1)
-
-                    # OBV
-                    obv_ma_p = get_obv_ma_period(timeframe)
-                    obv_raw = (
-                        df["close"].diff().apply(lambda x: 1 if x > 0 else (-1 if x < 0 else 0)) * df["volume"]
-                    ).fillna(0)
-                    df["OBV"] = obv_raw.cumsum()
-                    df["OBV_MA"] = df["OBV"].ewm(span=obv_ma_p).mean()
-                    df["OBV_prev"] = df["OBV"].shift(1)
-                    df["OBV_MA_prev"] = df["OBV_MA"].shift(1)
-
-                    # CMF
-                    cmf_p = get_cmf_period(timeframe)
-                    hl_rng = (df["high"] - df["low"]).replace(0, np.nan)
-                    ad = ((2 * df["close"] - df["low"] - df["high"]) / hl_rng) * df["volume"]
-                    cmf_num = ad.rolling(window=cmf_p).sum()
-                    cmf_den = df["volume"].rolling(window=cmf_p).sum()
-                    df["CMF"] = cmf_num / cmf_den
-                    df["CMF_prev"] = df["CMF"].shift(1)
-
-                    # Validação
-                    if (
-                        rsi_col not in df.columns
-                        or "UO_7_14_28" not in df.columns
-                        or "AO" not in df.columns
-                        or "CMO" not in df.columns
-                        or "KVO" not in df.columns
-                        or "KVO_trigger" not in df.columns
-                        or "OBV" not in df.columns
-                        or "OBV_MA" not in df.columns
-                        or "CMF" not in df.columns
-                    ):
-                        continue
-
-                    df = df.dropna(
-                        subset=[
-                            rsi_col,
-                            "UO_7_14_28",
-                            "AO",
-                            "CMO",
-                            "KVO",
-                            "KVO_trigger",
-                            "OBV",
-                            "OBV_MA",
-                            "CMF",
-                        ]
-                    )
-                    if len(df) == 0:
-                        continue
-                except Exception:
-                    continue
-
-                # Usar função padronizada para estruturar dados finais
-                standardized_row = standardize_final_data(df, timeframe)
-                if not standardized_row.empty:
-                    all_data.append(standardized_row)
+                # Indicadores calculados depois, para todos os símbolos de uma vez
+                all_data.append(df)
             except Exception:
                 continue
 
-        if not all_data:
-            st.warning("Nenhum dado de velas retornado pela BingX.")
+        # Indicadores de todos os símbolos num único passe (ver indicators.panel_snapshot)
+        final_df = panel_snapshot(all_data, timeframe)
+        if final_df.empty:
+            scan_log.warning("Nenhum dado de velas retornado pela BingX.")
             return pd.DataFrame()
         
-        final_df = pd.concat(all_data)
         return final_df.sort_values(by="timestamp").reset_index(drop=True)
         
     except Exception as e:
-        st.error(f"Erro ao buscar dados da BingX: {str(e)}")
+        scan_log.error(f"Erro ao buscar dados da BingX: {str(e)}")
         return pd.DataFrame()
 
 # ----------------- HUOBI DATA -----------------
-@st.cache_data(ttl=300)  # Cache de 10 minutos
+@cached_scan('HUOBI')  # Válido até o próximo fechamento de vela do timeframe
 
 def get_huobi_data(timeframe: str, top_n: int = 200) -> pd.DataFrame:
     """Busca e processa dados Spot da HUOBI para os top N pares USDT.
@@ -1662,13 +863,13 @@ def get_huobi_data(timeframe: str, top_n: int = 200) -> pd.DataFrame:
     try:
         # API v1 da HUOBI para tickers spot
         tickers_url = "https://api.huobi.pro/market/tickers"
-        resp = requests.get(tickers_url, timeout=15)
+        resp = http_get('huobi', tickers_url, timeout=15)
         resp.raise_for_status()
         data = resp.json()
         
         # Verificar se a resposta tem o formato esperado
         if data.get("status") != "ok" or not data.get("data"):
-            st.warning("Resposta inesperada da API da HUOBI")
+            scan_log.warning("Resposta inesperada da API da HUOBI")
             return pd.DataFrame()
         
         tickers_list = data["data"]
@@ -1686,7 +887,7 @@ def get_huobi_data(timeframe: str, top_n: int = 200) -> pd.DataFrame:
                 })
         
         if not usdt_tickers:
-            st.warning("Não foi possível encontrar pares USDT na HUOBI.")
+            scan_log.warning("Não foi possível encontrar pares USDT na HUOBI.")
             return pd.DataFrame()
         
         # Ordenar por volume e pegar os top N
@@ -1699,27 +900,33 @@ def get_huobi_data(timeframe: str, top_n: int = 200) -> pd.DataFrame:
             "1h": "60min", "2h": "2hour", "4h": "4hour", "1d": "1day"
         }
         
-        huobi_timeframe = timeframe_map.get(timeframe, "60min")
         all_data: list[pd.DataFrame] = []
         
         for symbol in top_symbols:
             try:
-                # API v1 da HUOBI para klines
-                klines_url = f"https://api.huobi.pro/market/history/kline"
-                params = {
-                    "symbol": symbol,
-                    "period": huobi_timeframe,
-                    "size": 100
-                }
-                
-                kline_resp = requests.get(klines_url, params=params, timeout=10)
-                kline_resp.raise_for_status()
-                kline_data = kline_resp.json()
-                
-                if kline_data.get("status") != "ok" or not kline_data.get("data"):
-                    continue
-                
-                klines = kline_data["data"]
+                def fetch_klines(limit, since, tf):
+                    # API v1 da HUOBI para klines
+                    klines_url = f"https://api.huobi.pro/market/history/kline"
+                    params = {
+                        "symbol": symbol,
+                        "period": timeframe_map.get(tf, "60min"),
+                        "size": limit
+                    }
+
+                    kline_resp = http_get('huobi', klines_url, params=params, timeout=10)
+                    kline_resp.raise_for_status()
+                    kline_data = kline_resp.json()
+
+                    if kline_data.get("status") != "ok" or not kline_data.get("data"):
+                        return []
+
+                    # HUOBI retorna mais recentes primeiro; o buffer precisa da ordem crescente
+                    return sorted(kline_data["data"], key=lambda x: int(x["id"]))
+
+                klines = get_candles(
+                    'huobi', symbol, timeframe, fetch_klines,
+                    limit=100, candle_format=HUOBI_FORMAT,
+                )
                 if len(klines) < 20:  # Dados insuficientes
                     continue
                 
@@ -1743,134 +950,33 @@ def get_huobi_data(timeframe: str, top_n: int = 200) -> pd.DataFrame:
                 
                 df["symbol"] = symbol.upper().replace("USDT", "/USDT")
                 
-                # ---------------- Indicadores ----------------
-                rsi_period = get_rsi_period(timeframe)
-                if len(df) < rsi_period:
-                    continue
-                    
-                try:
-                    # RSI & UO
-                    df.ta.rsi(length=rsi_period, append=True)
-                    rsi_col = f"RSI_{rsi_period}"
-                    df.ta.uo(length=[7, 14, 28], append=True)
-                    
-                    # AO
-                    hl2 = (df["high"] + df["low"]) / 2
-                    df["AO"] = hl2.rolling(window=5).mean() - hl2.rolling(window=34).mean()
-                    df["AO_diff"] = df["AO"].diff()
-                    
-                    # CMO
-                    cmo_period = get_cmo_period(timeframe)
-                    momm = df["close"].diff()
-                    m1 = momm.where(momm >= 0, 0)
-                    m2 = (-momm).where(momm < 0, 0)
-                    sm1 = m1.rolling(window=cmo_period).sum()
-                    sm2 = m2.rolling(window=cmo_period).sum()
-                    df["CMO"] = 100 * (sm1 - sm2) / (sm1 + sm2)
-                    df["CMO_prev"] = df["CMO"].shift(1)
-                    
-                    # KVO
-                    fast_p, slow_p, trg_p = get_kvo_params(timeframe)
-                    hlc3 = (df["high"] + df["low"] + df["close"]) / 3
-                    trend_condition = hlc3 > hlc3.shift(1)
-                    x_trend = df["volume"].where(trend_condition, -df["volume"]) * 100
-                    x_fast = x_trend.ewm(span=fast_p).mean()
-                    x_slow = x_trend.ewm(span=slow_p).mean()
-                    df["KVO"] = x_fast - x_slow
-                    df["KVO_trigger"] = df["KVO"].ewm(span=trg_p).mean()
-                    
-                    # DMI
-                    dmi_p = get_dmi_period(timeframe)
-                    df.ta.adx(length=dmi_p, append=True)
-                    df["ADX"] = df[f"ADX_{dmi_p}"]
-                    df["DI_plus"] = df[f"DMP_{dmi_p}"]
-                    df["DI_minus"] = df[f"DMN_{dmi_p}"]
-                    df["DI_plus_prev"] = df["DI_plus"].shift(1)
-                    df["DI_minus_prev"] = df["DI_minus"].shift(1)
-                    df["ADX_prev"] = df["ADX"].shift(1)
-
-                    # OBV
-                    obv_ma_p = get_obv_ma_period(timeframe)
-                    obv_raw = (
-                        df["close"].diff().apply(lambda x: 1 if x > 0 else (-1 if x < 0 else 0)) * df["volume"]
-                    ).fillna(0)
-                    df["OBV"] = obv_raw.cumsum()
-                    df["OBV_MA"] = df["OBV"].ewm(span=obv_ma_p).mean()
-                    df["OBV_prev"] = df["OBV"].shift(1)
-                    df["OBV_MA_prev"] = df["OBV_MA"].shift(1)
-
-                    # CMF
-                    cmf_p = get_cmf_period(timeframe)
-                    hl_rng = (df["high"] - df["low"]).replace(0, np.nan)
-                    ad = ((2 * df["close"] - df["low"] - df["high"]) / hl_rng) * df["volume"]
-                    cmf_num = ad.rolling(window=cmf_p).sum()
-                    cmf_den = df["volume"].rolling(window=cmf_p).sum()
-                    df["CMF"] = cmf_num / cmf_den
-                    df["CMF_prev"] = df["CMF"].shift(1)
-
-                    # Validação
-                    if (
-                        rsi_col not in df.columns
-                        or "UO_7_14_28" not in df.columns
-                        or "AO" not in df.columns
-                        or "CMO" not in df.columns
-                        or "KVO" not in df.columns
-                        or "KVO_trigger" not in df.columns
-                        or "OBV" not in df.columns
-                        or "OBV_MA" not in df.columns
-                        or "CMF" not in df.columns
-                    ):
-                        continue
-
-                    df = df.dropna(
-                        subset=[
-                            rsi_col,
-                            "UO_7_14_28",
-                            "AO",
-                            "CMO",
-                            "KVO",
-                            "KVO_trigger",
-                            "OBV",
-                            "OBV_MA",
-                            "CMF",
-                        ]
-                    )
-                    if len(df) == 0:
-                        continue
-                except Exception:
-                    continue
-
-                # Usar função padronizada para estruturar dados finais
-                standardized_row = standardize_final_data(df, timeframe)
-                if not standardized_row.empty:
-                    all_data.append(standardized_row)
+                # Indicadores calculados depois, para todos os símbolos de uma vez
+                all_data.append(df)
             except Exception:
                 continue
 
-        if not all_data:
-            st.warning("Nenhum dado de velas retornado pela HUOBI.")
+        # Indicadores de todos os símbolos num único passe (ver indicators.panel_snapshot)
+        final_df = panel_snapshot(all_data, timeframe)
+        if final_df.empty:
+            scan_log.warning("Nenhum dado de velas retornado pela HUOBI.")
             return pd.DataFrame()
         
-        final_df = pd.concat(all_data)
         return final_df.sort_values(by="timestamp").reset_index(drop=True)
         
     except Exception as e:
-        st.error(f"Erro ao buscar dados da HUOBI: {str(e)}")
+        scan_log.error(f"Erro ao buscar dados da HUOBI: {str(e)}")
         return pd.DataFrame()
 
 # ----------------- PHEMEX DATA -----------------
-@st.cache_data(ttl=300)  # Cache de 10 minutos
+@cached_scan('PHEMEX')  # Válido até o próximo fechamento de vela do timeframe
 def get_phemex_data(timeframe: str, top_n: int = 200) -> pd.DataFrame:
     """Busca e processa dados Spot da PHEMEX para os top N pares USDT usando CCXT."""
     try:
-        # 1. Inicializar exchange Phemex com CCXT
-        exchange = ccxt.phemex({
-            'enableRateLimit': True,
-            'sandbox': False,  # Usar API de produção
-        })
+        # 1. Reutilizar a instância CCXT compartilhada da Phemex
+        exchange = get_ccxt_exchange('phemex')
         
-        # 2. Carregar mercados disponíveis
-        markets = exchange.load_markets()
+        # 2. Mercados já carregados (e recarregados em segundo plano após o TTL)
+        markets = exchange.markets
         
         # 3. Filtrar pares USDT do mercado spot
         usdt_spot_pairs = [
@@ -1879,11 +985,11 @@ def get_phemex_data(timeframe: str, top_n: int = 200) -> pd.DataFrame:
         ]
         
         if not usdt_spot_pairs:
-            st.warning("⚠️ Nenhum par USDT Spot encontrado na Phemex.")
+            scan_log.warning("⚠️ Nenhum par USDT Spot encontrado na Phemex.")
             return pd.DataFrame()
         
         # 4. Buscar tickers para obter volume
-        tickers = exchange.fetch_tickers(usdt_spot_pairs)
+        tickers = call_with_retry('phemex', exchange.fetch_tickers, usdt_spot_pairs)
         
         # 5. Ordenar por volume e pegar top N
         pairs_with_volume = []
@@ -1905,16 +1011,17 @@ def get_phemex_data(timeframe: str, top_n: int = 200) -> pd.DataFrame:
         top_pairs = [pair[0] for pair in pairs_with_volume[:top_n]]
 
         if not top_pairs:
-            st.warning("⚠️ Nenhum par com volume > 0 encontrado.")
+            scan_log.warning("⚠️ Nenhum par com volume > 0 encontrado.")
             return pd.DataFrame()
 
         all_data: list[pd.DataFrame] = []
 
-        # 6. Buscar dados OHLCV para cada par
+        # 6. Buscar dados OHLCV de todos os pares (motor sync/async conforme EXCHANGE_CONFIGS)
+        ohlcv_by_symbol = fetch_ohlcv_batch('phemex', top_pairs, timeframe, limit=100)
+
         for symbol in top_pairs:
             try:
-                # Usar CCXT para buscar dados OHLCV
-                ohlcv = exchange.fetch_ohlcv(symbol, timeframe, limit=100)
+                ohlcv = ohlcv_by_symbol.get(symbol, [])
                 
                 if len(ohlcv) < 20:
                     continue
@@ -1931,111 +1038,18 @@ def get_phemex_data(timeframe: str, top_n: int = 200) -> pd.DataFrame:
                     continue
                 
                 df["symbol"] = symbol
-                # --- Indicadores (igual aos outros)
-                rsi_period = get_rsi_period(timeframe)
-                if len(df) < rsi_period:
-                    continue
-                try:
-                    df.ta.rsi(length=rsi_period, append=True)
-                    rsi_col = f"RSI_{rsi_period}"
-                    df.ta.uo(length=[7, 14, 28], append=True)
-                    hl2 = (df["high"] + df["low"]) / 2
-                    df["AO"] = hl2.rolling(window=5).mean() - hl2.rolling(window=34).mean()
-                    df["AO_diff"] = df["AO"].diff()
-                    cmo_period = get_cmo_period(timeframe)
-                    momm = df["close"].diff()
-                    m1 = momm.where(momm >= 0, 0)
-                    m2 = (-momm).where(momm < 0, 0)
-                    sm1 = m1.rolling(window=cmo_period).sum()
-                    sm2 = m2.rolling(window=cmo_period).sum()
-                    df["CMO"] = 100 * (sm1 - sm2) / (sm1 + sm2)
-                    df["CMO_prev"] = df["CMO"].shift(1)
-                    fast_p, slow_p, trg_p = get_kvo_params(timeframe)
-                    hlc3 = (df["high"] + df["low"] + df["close"]) / 3
-                    trend_condition = hlc3 > hlc3.shift(1)
-                    x_trend = df["volume"].where(trend_condition, -df["volume"]) * 100
-                    x_fast = x_trend.ewm(span=fast_p).mean()
-                    x_slow = x_trend.ewm(span=slow_p).mean()
-                    df["KVO"] = x_fast - x_slow
-                    df["KVO_trigger"] = df["KVO"].ewm(span=trg_p).mean()
-                    dmi_p = get_dmi_period(timeframe)
-                    df.ta.adx(length=dmi_p, append=True)
-                    df["ADX"] = df[f"ADX_{dmi_p}"]
-                    df["DI_plus"] = df[f"DMP_{dmi_p}"]
-                    df["DI_minus"] = df[f"DMN_{dmi_p}"]
-                    df["DI_plus_prev"] = df["DI_plus"].shift(1)
-                    df["DI_minus_prev"] = df["DI_minus"].shift(1)
-                    df["ADX_prev"] = df["ADX"].shift(1)
-                    obv_ma_p = get_obv_ma_period(timeframe)
-                    obv_raw = (
-                        df["close"].diff().apply(lambda x: 1 if x > 0 else (-1 if x < 0 else 0)) * df["volume"]
-                    ).fillna(0)
-                    df["OBV"] = obv_raw.cumsum()
-                    df["OBV_MA"] = df["OBV"].ewm(span=obv_ma_p).mean()
-                    df["OBV_prev"] = df["OBV"].shift(1)
-                    df["OBV_MA_prev"] = df["OBV_MA"].shift(1)
-                    cmf_p = get_cmf_period(timeframe)
-                    hl_rng = (df["high"] - df["low"]).replace(0, np.nan)
-                    ad = ((2 * df["close"] - df["low"] - df["high"]) / hl_rng) * df["volume"]
-                    cmf_num = ad.rolling(window=cmf_p).sum()
-                    cmf_den = df["volume"].rolling(window=cmf_p).sum()
-                    df["CMF"] = cmf_num / cmf_den
-                    df["CMF_prev"] = df["CMF"].shift(1)
-                    if (
-                        rsi_col not in df.columns
-                        or "UO_7_14_28" not in df.columns
-                        or "AO" not in df.columns
-                        or "CMO" not in df.columns
-                        or "KVO" not in df.columns
-                        or "KVO_trigger" not in df.columns
-                        or "OBV" not in df.columns
-                        or "OBV_MA" not in df.columns
-                        or "CMF" not in df.columns
-                    ):
-                        continue
-                    df = df.dropna(
-                        subset=[
-                            rsi_col,
-                            "UO_7_14_28",
-                            "AO",
-                            "CMO",
-                            "KVO",
-                            "KVO_trigger",
-                            "OBV",
-                            "OBV_MA",
-                            "CMF",
-                        ]
-                    )
-                    if len(df) == 0:
-                        continue
-                except Exception:
-                    continue
-                if len(df) < 2:
-                    continue
-                last_row = df.iloc[-1:].copy()
-                last_row["UO_prev"] = df["UO_7_14_28"].iloc[-2]
-                last_row["AO_prev"] = df["AO"].iloc[-2]
-                last_row["CMO_prev"] = df["CMO"].iloc[-2]
-                last_row["KVO_prev"] = df["KVO"].iloc[-2]
-                last_row["KVO_trigger_prev"] = df["KVO_trigger"].iloc[-2]
-                last_row["OBV_prev"] = df["OBV"].iloc[-2]
-                last_row["OBV_MA_prev"] = df["OBV_MA"].iloc[-2]
-                last_row["CMF_prev"] = df["CMF"].iloc[-2]
-                if len(df) >= 4:
-                    pct_change_3 = ((df["close"].iloc[-1] - df["close"].iloc[-4]) / df["close"].iloc[-4]) * 100
-                    last_row["pct_change"] = pct_change_3
-                else:
-                    last_row["pct_change"] = 0.0
-                all_data.append(last_row)
+                # Indicadores calculados depois, para todos os símbolos de uma vez
+                all_data.append(df)
             except Exception:
                 continue
-        if not all_data:
-            st.warning("Nenhum dado de velas retornado pela PHEMEX.")
+        # Indicadores de todos os símbolos num único passe (ver indicators.panel_snapshot)
+        final_df = panel_snapshot(all_data, timeframe)
+        if final_df.empty:
+            scan_log.warning("Nenhum dado de velas retornado pela PHEMEX.")
             return pd.DataFrame()
-        final_df = pd.concat(all_data)
         return final_df.sort_values(by="timestamp").reset_index(drop=True)
     except Exception as e:
-        st.error(f"Erro ao buscar dados da PHEMEX: {str(e)}")
+        scan_log.error(f"Erro ao buscar dados da PHEMEX: {str(e)}")
         return pd.DataFrame()
 
 # --- Funções auxiliares para validação de pares ---
@@ -2060,8 +1074,8 @@ def get_valid_binance_btc_pairs():
 def get_valid_kucoin_btc_pairs():
     """Retorna lista de pares BTC válidos da KuCoin"""
     try:
-        exchange = ccxt.kucoin({'enableRateLimit': True, 'sandbox': False})
-        markets = exchange.load_markets()
+        exchange = get_ccxt_exchange('kucoin')
+        markets = exchange.markets
         
         valid_pairs = set()
         for symbol, market in markets.items():
@@ -2075,95 +1089,8 @@ def get_valid_kucoin_btc_pairs():
     except:
         return set()
 
-# --- Função para calcular indicadores ---
-def calculate_indicators(df: pd.DataFrame, timeframe: str) -> pd.DataFrame:
-    """Calcula todos os indicadores técnicos usados no scanner de forma padronizada."""
-    try:
-        # Verificar se temos dados suficientes
-        rsi_period = get_rsi_period(timeframe)
-        if len(df) < rsi_period:
-            return df
-            
-        # RSI
-        df.ta.rsi(length=rsi_period, append=True)
-        rsi_col = f"RSI_{rsi_period}"
-        
-        # Ultimate Oscillator (UO)
-        df.ta.uo(length=[7, 14, 28], append=True)
-        
-        # Awesome Oscillator (AO)
-        hl2 = (df['high'] + df['low']) / 2
-        sma_5 = hl2.rolling(window=5).mean()
-        sma_34 = hl2.rolling(window=34).mean()
-        df['AO'] = sma_5 - sma_34
-        df['AO_diff'] = df['AO'].diff()
-        df['AO_prev'] = df['AO'].shift(1)
-        
-        # Chande Momentum Oscillator (CMO)
-        cmo_period = get_cmo_period(timeframe)
-        momm = df['close'].diff()
-        m1 = momm.where(momm >= 0, 0)
-        m2 = (-momm).where(momm < 0, 0)
-        sm1 = m1.rolling(window=cmo_period).sum()
-        sm2 = m2.rolling(window=cmo_period).sum()
-        df['CMO'] = 100 * (sm1 - sm2) / (sm1 + sm2)
-        df['CMO_prev'] = df['CMO'].shift(1)
-        
-        # Klinger Volume Oscillator (KVO)
-        fast_period, slow_period, trigger_period = get_kvo_params(timeframe)
-        hlc3 = (df['high'] + df['low'] + df['close']) / 3
-        trend_condition = hlc3 > hlc3.shift(1)
-        x_trend = df['volume'].where(trend_condition, -df['volume']) * 100
-        x_fast = x_trend.ewm(span=fast_period).mean()
-        x_slow = x_trend.ewm(span=slow_period).mean()
-        df['KVO'] = x_fast - x_slow
-        df['KVO_trigger'] = df['KVO'].ewm(span=trigger_period).mean()
-        df['KVO_prev'] = df['KVO'].shift(1)
-        df['KVO_trigger_prev'] = df['KVO_trigger'].shift(1)
-        
-        # Directional Movement Index (DMI)
-        dmi_period = get_dmi_period(timeframe)
-        df.ta.adx(length=dmi_period, append=True)
-        adx_col = f"ADX_{dmi_period}"
-        dip_col = f"DMP_{dmi_period}"
-        dim_col = f"DMN_{dmi_period}"
-        df['ADX'] = df[adx_col]
-        df['DI_plus'] = df[dip_col]
-        df['DI_minus'] = df[dim_col]
-        df['DI_plus_prev'] = df['DI_plus'].shift(1)
-        df['DI_minus_prev'] = df['DI_minus'].shift(1)
-        df['ADX_prev'] = df['ADX'].shift(1)
-        
-        # On Balance Volume (OBV)
-        obv_ma_period = get_obv_ma_period(timeframe)
-        obv_raw = (df['close'].diff()
-                    .apply(lambda x: 1 if x > 0 else (-1 if x < 0 else 0)) * df['volume']).fillna(0)
-        df['OBV'] = obv_raw.cumsum()
-        df['OBV_MA'] = df['OBV'].ewm(span=obv_ma_period).mean()
-        df['OBV_prev'] = df['OBV'].shift(1)
-        df['OBV_MA_prev'] = df['OBV_MA'].shift(1)
-        
-        # Chaikin Money Flow (CMF)
-        cmf_period = get_cmf_period(timeframe)
-        cmf_pos_th, cmf_neg_th = get_cmf_thresholds(timeframe)
-        hl_range = (df['high'] - df['low']).replace(0, np.nan)
-        ad = ((2 * df['close'] - df['low'] - df['high']) / hl_range) * df['volume']
-        cmf_num = ad.rolling(window=cmf_period).sum()
-        cmf_den = df['volume'].rolling(window=cmf_period).sum()
-        df['CMF'] = cmf_num / cmf_den
-        df['CMF_prev'] = df['CMF'].shift(1)
-        
-        # Remover linhas onde os indicadores são NaN
-        df = df.dropna(subset=[rsi_col, 'UO_7_14_28', 'AO', 'CMO', 'KVO', 'KVO_trigger', 'OBV', 'OBV_MA', 'CMF'])
-        
-        return df
-        
-    except Exception as e:
-        st.warning(f"Erro ao calcular indicadores: {str(e)}")
-        return df
-
 # ----------------- BINANCE BTC DATA -----------------
-@st.cache_data(ttl=300) # Cache de 10 minutos
+@cached_scan('Binance BTC')  # Válido até o próximo fechamento de vela do timeframe
 def get_binance_btc_data(timeframe, top_n=200):
     """
     Busca e processa dados da Binance para as top N moedas do mercado Spot em pares BTC.
@@ -2173,12 +1100,12 @@ def get_binance_btc_data(timeframe, top_n=200):
         # 1. Obter lista de pares BTC válidos
         valid_btc_pairs = get_valid_binance_btc_pairs()
         if not valid_btc_pairs:
-            st.warning("Não foi possível obter lista de pares BTC válidos da Binance.")
+            scan_log.warning("Não foi possível obter lista de pares BTC válidos da Binance.")
             return pd.DataFrame()
         
         # 2. Buscar tickers para todos os pares para pegar o volume via API direta
         tickers_url = "https://api.binance.com/api/v3/ticker/24hr"
-        response = requests.get(tickers_url)
+        response = http_get('binance', tickers_url, weight=80)  # peso 80 na API da Binance (todos os símbolos)
         response.raise_for_status()  # Lança exceção para erros HTTP
         all_tickers = response.json()
 
@@ -2194,7 +1121,7 @@ def get_binance_btc_data(timeframe, top_n=200):
         top_symbols = [t['symbol'] for t in sorted_tickers[:top_n]]
 
         if not top_symbols:
-            st.warning("Não foi possível encontrar pares BTC com volume. A API da Binance pode estar com problemas.")
+            scan_log.warning("Não foi possível encontrar pares BTC com volume. A API da Binance pode estar com problemas.")
             return pd.DataFrame()
 
         all_data = []
@@ -2207,13 +1134,16 @@ def get_binance_btc_data(timeframe, top_n=200):
                     "5m": "5m", "15m": "15m", "30m": "30m",
                     "1h": "1h", "2h": "2h", "4h": "4h", "1d": "1d"
                 }
-                binance_timeframe = timeframe_map.get(timeframe, "1h")
-                
-                # URL para buscar dados OHLCV
-                klines_url = f"https://api.binance.com/api/v3/klines?symbol={symbol}&interval={binance_timeframe}&limit=100"
-                klines_response = requests.get(klines_url, timeout=10)
-                klines_response.raise_for_status()
-                klines = klines_response.json()
+
+                def fetch_klines(limit, since, tf):
+                    # URL para buscar dados OHLCV
+                    binance_timeframe = timeframe_map.get(tf, "1h")
+                    klines_url = f"https://api.binance.com/api/v3/klines?symbol={symbol}&interval={binance_timeframe}&limit={limit}"
+                    klines_response = http_get('binance', klines_url, timeout=10, weight=2)
+                    klines_response.raise_for_status()
+                    return klines_response.json()
+
+                klines = get_candles('binance', symbol, timeframe, fetch_klines, limit=100, candle_format=BINANCE_FORMAT)
 
                 if not klines:
                     continue
@@ -2230,67 +1160,36 @@ def get_binance_btc_data(timeframe, top_n=200):
                 df[numeric_columns] = df[numeric_columns].astype(float)
                 df['timestamp'] = pd.to_datetime(df['timestamp'], unit='ms')
 
-                # Calcular indicadores
-                df = calculate_indicators(df, timeframe)
-                
-                if len(df) == 0:
-                    continue
-                
                 # Verificar se há volume mínimo
                 if df['volume'].sum() == 0:
                     continue
-                
+
                 # Adicionar informações do símbolo
                 df['symbol'] = symbol.replace('BTC', '/BTC')
                 df['exchange'] = 'Binance'
                 df['pair_type'] = 'BTC'
 
-                # Preparar a última e penúltima vela para detecção de cruzamentos
-                if len(df) < 2:
-                    continue
-
-                last_row = df.iloc[-1:].copy()
-                # Armazenar valor anterior do UO para filtros de cruzamento
-                last_row['UO_prev'] = df['UO_7_14_28'].iloc[-2]
-                # Armazenar valor anterior do AO para filtros de cruzamento
-                last_row['AO_prev'] = df['AO'].iloc[-2]
-                # Armazenar valor anterior do CMO para filtros de cruzamento
-                last_row['CMO_prev'] = df['CMO'].iloc[-2]
-                # Armazenar valores anteriores do KVO para filtros de cruzamento
-                last_row['KVO_prev'] = df['KVO'].iloc[-2]
-                last_row['KVO_trigger_prev'] = df['KVO_trigger'].iloc[-2]
-                last_row['OBV_prev'] = df['OBV'].iloc[-2]
-                last_row['OBV_MA_prev'] = df['OBV_MA'].iloc[-2]
-                last_row['CMF_prev'] = df['CMF'].iloc[-2]
-
-                # Variação percentual últimas 3 velas
-                if len(df) >= 4:
-                    pct_change_3 = ((df['close'].iloc[-1] - df['close'].iloc[-4]) / df['close'].iloc[-4]) * 100
-                    last_row['pct_change'] = pct_change_3
-                else:
-                    last_row['pct_change'] = 0.0
-
-                all_data.append(last_row)
+                # Indicadores calculados depois, para todos os símbolos de uma vez
+                all_data.append(df)
 
             except Exception as e:
-                st.warning(f"Erro ao processar {symbol}: {str(e)}")
+                scan_log.warning(f"Erro ao processar {symbol}: {str(e)}")
                 continue
 
-        if not all_data:
-            st.warning("Nenhum dado válido encontrado para pares BTC na Binance.")
+        # Indicadores de todos os símbolos num único passe (ver indicators.panel_snapshot)
+        final_df = panel_snapshot(all_data, timeframe)
+        if final_df.empty:
+            scan_log.warning("Nenhum dado válido encontrado para pares BTC na Binance.")
             return pd.DataFrame()
 
-        # Concatenar todos os DataFrames
-        final_df = pd.concat(all_data, ignore_index=True)
-        
         return final_df
 
     except Exception as e:
-        st.error(f"Erro ao buscar dados da Binance BTC: {str(e)}")
+        scan_log.error(f"Erro ao buscar dados da Binance BTC: {str(e)}")
         return pd.DataFrame()
 
 # ----------------- KUCOIN BTC DATA -----------------
-@st.cache_data(ttl=300)  # Cache de 10 minutos
+@cached_scan('KuCoin BTC')  # Válido até o próximo fechamento de vela do timeframe
 def get_kucoin_btc_data(timeframe: str, top_n: int = 200) -> pd.DataFrame:
     """Busca e processa dados Spot da KuCoin para os top N pares BTC.
     Reaproveita a mesma lógica de indicadores já aplicada no scanner."""
@@ -2298,18 +1197,18 @@ def get_kucoin_btc_data(timeframe: str, top_n: int = 200) -> pd.DataFrame:
         # 1. Obter lista de pares BTC válidos da KuCoin
         valid_btc_pairs = get_valid_kucoin_btc_pairs()
         if not valid_btc_pairs:
-            st.warning("Não foi possível obter lista de pares BTC válidos da KuCoin.")
+            scan_log.warning("Não foi possível obter lista de pares BTC válidos da KuCoin.")
             return pd.DataFrame()
         
         # 2. API v1 da KuCoin para all tickers
         tickers_url = "https://api.kucoin.com/api/v1/market/allTickers"
-        resp = requests.get(tickers_url, timeout=15)
+        resp = http_get('kucoin', tickers_url, timeout=15)
         resp.raise_for_status()
         data = resp.json()
         
         # Verificar se a resposta tem o formato esperado
         if data.get("code") != "200000" or not data.get("data", {}).get("ticker"):
-            st.warning("Resposta inesperada da API da KuCoin")
+            scan_log.warning("Resposta inesperada da API da KuCoin")
             return pd.DataFrame()
         
         tickers_list = data["data"]["ticker"]
@@ -2330,7 +1229,7 @@ def get_kucoin_btc_data(timeframe: str, top_n: int = 200) -> pd.DataFrame:
                     })
         
         if not btc_tickers:
-            st.warning("Não foi possível encontrar pares BTC válidos na KuCoin.")
+            scan_log.warning("Não foi possível encontrar pares BTC válidos na KuCoin.")
             return pd.DataFrame()
         
         # Ordenar por volume e pegar os top N
@@ -2343,7 +1242,6 @@ def get_kucoin_btc_data(timeframe: str, top_n: int = 200) -> pd.DataFrame:
             "1h": "1hour", "2h": "2hour", "4h": "4hour", "1d": "1day"
         }
         
-        kucoin_timeframe = timeframe_map.get(timeframe, "1hour")
         all_data: list[pd.DataFrame] = []
         
         for symbol in top_symbols:
@@ -2351,16 +1249,22 @@ def get_kucoin_btc_data(timeframe: str, top_n: int = 200) -> pd.DataFrame:
                 # Converter formato de símbolo (ETH-BTC -> ETHBTC)
                 clean_symbol = symbol.replace("-", "")
                 
-                # URL para buscar dados OHLCV
-                klines_url = f"https://api.kucoin.com/api/v1/market/candles?type={kucoin_timeframe}&symbol={symbol}&limit=100"
-                klines_resp = requests.get(klines_url, timeout=15)
-                klines_resp.raise_for_status()
-                klines_data = klines_resp.json()
-                
-                if klines_data.get("code") != "200000" or not klines_data.get("data"):
-                    continue
-                
-                klines = klines_data["data"]
+                def fetch_klines(limit, since, tf):
+                    # URL para buscar dados OHLCV (janela em startAt/endAt, em segundos)
+                    kucoin_timeframe = timeframe_map.get(tf, "1hour")
+                    klines_url = "https://api.kucoin.com/api/v1/market/candles"
+                    params = {"type": kucoin_timeframe, "symbol": symbol, **kucoin_time_range(limit, since, tf)}
+                    klines_resp = http_get('kucoin', klines_url, params=params, timeout=15)
+                    klines_resp.raise_for_status()
+                    klines_data = klines_resp.json()
+
+                    if klines_data.get("code") != "200000" or not klines_data.get("data"):
+                        return []
+
+                    # KuCoin devolve as velas mais recentes primeiro
+                    return sorted(klines_data["data"], key=lambda x: int(x[0]))
+
+                klines = get_candles('kucoin', symbol, timeframe, fetch_klines, limit=100, candle_format=KUCOIN_FORMAT)
                 
                 if not klines:
                     continue
@@ -2375,63 +1279,32 @@ def get_kucoin_btc_data(timeframe: str, top_n: int = 200) -> pd.DataFrame:
                 df[numeric_columns] = df[numeric_columns].astype(float)
                 df['timestamp'] = pd.to_datetime(df['timestamp'], unit='s')
                 
-                # Calcular indicadores
-                df = calculate_indicators(df, timeframe)
-                
-                if len(df) == 0:
-                    continue
-                
                 # Verificar se há volume mínimo
                 if df['volume'].sum() == 0:
                     continue
-                
+
                 # Adicionar informações do símbolo
                 df['symbol'] = clean_symbol.replace('BTC', '/BTC')
                 df['exchange'] = 'KuCoin'
                 df['pair_type'] = 'BTC'
-                
-                # Preparar a última e penúltima vela para detecção de cruzamentos
-                if len(df) < 2:
-                    continue
 
-                last_row = df.iloc[-1:].copy()
-                # Armazenar valor anterior do UO para filtros de cruzamento
-                last_row['UO_prev'] = df['UO_7_14_28'].iloc[-2]
-                # Armazenar valor anterior do AO para filtros de cruzamento
-                last_row['AO_prev'] = df['AO'].iloc[-2]
-                # Armazenar valor anterior do CMO para filtros de cruzamento
-                last_row['CMO_prev'] = df['CMO'].iloc[-2]
-                # Armazenar valores anteriores do KVO para filtros de cruzamento
-                last_row['KVO_prev'] = df['KVO'].iloc[-2]
-                last_row['KVO_trigger_prev'] = df['KVO_trigger'].iloc[-2]
-                last_row['OBV_prev'] = df['OBV'].iloc[-2]
-                last_row['OBV_MA_prev'] = df['OBV_MA'].iloc[-2]
-                last_row['CMF_prev'] = df['CMF'].iloc[-2]
-
-                # Variação percentual últimas 3 velas
-                if len(df) >= 4:
-                    pct_change_3 = ((df['close'].iloc[-1] - df['close'].iloc[-4]) / df['close'].iloc[-4]) * 100
-                    last_row['pct_change'] = pct_change_3
-                else:
-                    last_row['pct_change'] = 0.0
-                
-                all_data.append(last_row)
+                # Indicadores calculados depois, para todos os símbolos de uma vez
+                all_data.append(df)
                 
             except Exception as e:
-                st.warning(f"Erro ao processar {symbol}: {str(e)}")
+                scan_log.warning(f"Erro ao processar {symbol}: {str(e)}")
                 continue
         
-        if not all_data:
-            st.warning("Nenhum dado válido encontrado para pares BTC na KuCoin.")
+        # Indicadores de todos os símbolos num único passe (ver indicators.panel_snapshot)
+        final_df = panel_snapshot(all_data, timeframe)
+        if final_df.empty:
+            scan_log.warning("Nenhum dado válido encontrado para pares BTC na KuCoin.")
             return pd.DataFrame()
         
-        # Concatenar todos os DataFrames
-        final_df = pd.concat(all_data, ignore_index=True)
-        
         return final_df
         
     except Exception as e:
-        st.error(f"Erro ao buscar dados da KuCoin BTC: {str(e)}")
+        scan_log.error(f"Erro ao buscar dados da KuCoin BTC: {str(e)}")
         return pd.DataFrame()
 
 # Título e descrição
@@ -2449,12 +1322,10 @@ time_since_check = time.time() - st.session_state.last_auto_check
 if time_since_check >= check_interval:
     st.session_state.last_auto_check = time.time()
     
-    # Se os dados estão muito antigos, força uma atualização
-    if hasattr(st.session_state, 'last_refresh_time'):
-        time_since_last_refresh = time.time() - st.session_state.last_refresh_time
-        if time_since_last_refresh >= 600:  # 10 minutos (mesmo valor de REFRESH_INTERVAL)
-            st.session_state.force_update = True
-            st.rerun()
+    # Se o snapshot exibido já venceu (fechamento de vela), força uma atualização
+    if time.time() >= st.session_state.get('data_expires_at', float('inf')):
+        st.session_state.force_update = True
+        st.rerun()
 
 # Adicionar meta-tag para refresh automático como fallback (apenas em desenvolvimento)
 st.markdown(
@@ -2697,8 +1568,6 @@ exchange_functions = {
 def fetch_selected_exchange_data(exchange_name: str, timeframe_param: str):
     """Busca dados apenas para a exchange selecionada com feedback visual."""
     try:
-        st.cache_data.clear() 
-        
         progress_bar = st.progress(0, text=f"🔄 Buscando dados de {exchange_name} ({timeframe_param})...")
         
         fetch_func = exchange_functions.get(exchange_name)
@@ -2707,6 +1576,8 @@ def fetch_selected_exchange_data(exchange_name: str, timeframe_param: str):
             progress_bar.empty()
             return None
 
+        # Resultado compartilhado entre as sessões (scan_cache): dentro do ttl todas as abas leem o
+        # mesmo snapshot, e pedidos simultâneos esperam um único scan em vez de repeti-lo
         data = fetch_func(timeframe_param)
         
         progress_bar.progress(1.0, text=f"✅ Dados de {exchange_name} carregados!")
@@ -2731,38 +1602,56 @@ if 'force_update' not in st.session_state:
 if 'data_update_timestamp' not in st.session_state:
     st.session_state.data_update_timestamp = time.time()
 
-REFRESH_INTERVAL = 600
-
 current_time = time.time()
-time_since_refresh = current_time - st.session_state.get('last_refresh_time', 0)
 
-needs_fetch = (
-    st.session_state.data_cache.get(exchange, pd.DataFrame()).empty or
-    st.session_state.cached_timeframe != timeframe or
-    st.session_state.force_update or
-    time_since_refresh >= REFRESH_INTERVAL
-)
+# Com o agendador (scan_scheduler) rodando, os scans são refeitos em segundo plano e a página só
+# lê o último snapshot publicado em scan_cache. O snapshot vale até o próximo fechamento de vela
+# do timeframe (ver scan_cache.expires_at). Stale-while-revalidate: um snapshot vencido continua
+# sendo exibido (com a idade no banner) enquanto um scan novo roda em segundo plano; a página só
+# espera o scan quando não há snapshot (primeiro acesso à combinação) ou quando ele venceu há
+# mais de SCAN_CACHE_CONFIG['hard_expiry'].
+scheduled = scan_scheduler.watch(exchange_functions, exchange, timeframe)
+snapshot = scan_cache.latest(exchange, timeframe)
+
+needs_fetch = snapshot is None or -snapshot.remaining() >= SCAN_CACHE_CONFIG['hard_expiry']
+revalidating = not needs_fetch and snapshot.expired()
+if revalidating and not scheduled:
+    # Com o agendador, o próprio executor dele refaz o snapshot vencido (watch acabou de acordá-lo)
+    exchange_functions[exchange].revalidate(timeframe)
+st.session_state.force_update = False
 
 if needs_fetch:
-    st.info(f'🔄 Carregando dados para {exchange}...')
-    st.session_state.force_update = False
+    loading = st.empty()
+    loading.info(f'🔄 Carregando dados para {exchange}...')
+    # Se o agendador já estiver buscando a mesma combinação, espera o scan dele (single-flight)
     new_data = fetch_selected_exchange_data(exchange, timeframe)
-    
-    st.session_state.data_cache[exchange] = new_data if new_data is not None else pd.DataFrame()
-    st.session_state.last_refresh_time = current_time
-    st.session_state.data_update_timestamp = current_time
-    st.session_state.cached_timeframe = timeframe
-    
+    loading.empty()
     if new_data is None:
          st.error(f"Não foi possível carregar os dados para {exchange}.")
-    
-    st.rerun()
+    snapshot = scan_cache.latest(exchange, timeframe)
+
+if snapshot is not None:
+    st.session_state.data_cache[exchange] = snapshot.data
+    # Horário do snapshot compartilhado (pode ter sido calculado por outra sessão ou pelo agendador)
+    st.session_state.last_refresh_time = snapshot.fetched_at
+    st.session_state.data_update_timestamp = snapshot.fetched_at
+    st.session_state.data_expires_at = snapshot.expires_at
+else:
+    # Scan vazio ou com erro (não é guardado): a próxima visita tenta de novo
+    st.session_state.data_cache[exchange] = pd.DataFrame()
+    st.session_state.last_refresh_time = current_time
+    st.session_state.data_update_timestamp = current_time
+    st.session_state.data_expires_at = scan_cache.expires_at(timeframe, current_time)
+st.session_state.cached_timeframe = timeframe
 
 st.info(f'🟢 Exibindo dados para {exchange} ({timeframe})')
 df = st.session_state.data_cache.get(exchange, pd.DataFrame())
 
-time_since_last = current_time - st.session_state.last_refresh_time
-countdown_remaining = int(max(REFRESH_INTERVAL - time_since_last, 0))
+# Contagem até o snapshot vencer (ciclo completo: do scan até o vencimento)
+refresh_interval = int(st.session_state.data_expires_at - st.session_state.last_refresh_time)
+countdown_remaining = int(max(st.session_state.data_expires_at - current_time, 0))
+# O recarregamento só lê o snapshot; se o scan em segundo plano ainda não terminou, tenta de novo logo
+countdown_remaining = max(countdown_remaining, 30)
 
 status_message = ""
 status_color = "transparent"
@@ -2775,7 +1664,11 @@ last_update_time = datetime.fromtimestamp(
     st.session_state.data_update_timestamp,
     tz=ZoneInfo("America/Sao_Paulo")
 ).strftime("%H:%M:%S")
-data_age_info = f"📊 Última atualização: {last_update_time}"
+data_age = int(current_time - st.session_state.data_update_timestamp)
+data_age_text = f"{data_age // 60} min" if data_age >= 60 else f"{data_age}s"
+data_age_info = f"📊 Última atualização: {last_update_time} (há {data_age_text})"
+if revalidating:
+    data_age_info += " · 🔄 atualizando em segundo plano"
 
 timer_key = f"timer_{int(st.session_state.last_refresh_time)}"
 components.html(
@@ -2804,7 +1697,7 @@ components.html(
     </div>
     
     <script>
-        var totalSeconds = {REFRESH_INTERVAL};
+        var totalSeconds = {max(refresh_interval, countdown_remaining)};
         var timerKey = "{timer_key}";
         var countdownElement = document.getElementById("countdown");
         var progressCircle = document.getElementById("progress-circle");
@@ -3346,7 +2239,6 @@ else:
 def fetch_selected_exchange_sync_with_progress(exchange_name: str, timeframe_param: str):
     """Busca dados apenas para a exchange selecionada com feedback visual"""
     try:
-        st.cache_data.clear()  # Garantir dados frescos para esta exchange
         progress_bar = st.progress(0, text=f"🔄 Buscando dados de {exchange_name}...")
 
         fetch_func = exchange_functions.get(exchange_name)
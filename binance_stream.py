@@ -0,0 +1,241 @@
+# Ingestão contínua de velas da Binance via WebSocket (streams combinados de kline)
+# Um stream por intervalo, rodando em uma thread em segundo plano com seu próprio event loop.
+# Cada mensagem atualiza o buffer de velas do símbolo em candle_store, o mesmo usado
+# pelos fetchers REST; enquanto o stream estiver saudável o scan da Binance calcula os
+# indicadores direto desses buffers, sem requisições de klines.
+# O endpoint vem de BINANCE_STREAM_CONFIG['url'], então pode apontar para um servidor
+# local que reproduz mensagens gravadas (ver debug_binance_stream.py).
+# O event loop não toca no SQLite: os buffers são criados (e aumentados, quando a janela do
+# scan cresce) na thread de quem chama subscribe, e as velas fechadas são gravadas num executor.
+# Símbolos que nenhum scan pede há BINANCE_STREAM_CONFIG['unsubscribe_after'] segundos (saíram
+# do top N) recebem UNSUBSCRIBE e deixam de segurar o buffer, então a conexão não acumula streams.
+
+import asyncio
+import json
+import threading
+import time
+
+import websockets
+
+from candle_store import (
+    TIMEFRAME_MS, CandleBuffer, CandleFormat, ensure_capacity, get_buffer, persist, resample_base, resample_rows,
+)
+from vps_config import BINANCE_STREAM_CONFIG
+
+SUBSCRIBE_CHUNK = 200  # streams por mensagem SUBSCRIBE/UNSUBSCRIBE
+
+
+def kline_to_row(kline: dict) -> list:
+    """Converte o objeto "k" do stream para o formato de vela do endpoint REST /klines"""
+    return [
+        kline['t'], kline['o'], kline['h'], kline['l'], kline['c'], kline['v'],
+        kline['T'], kline['q'], kline['n'], kline['V'], kline['Q'], '0',
+    ]
+
+
+class BinanceKlineStream:
+    """Mantém os buffers ('binance', símbolo, intervalo) atualizados a partir do WebSocket.
+
+    Reconecta sozinho em caso de queda; velas perdidas durante a queda deixam um buraco
+    que faz o buffer ficar defasado, e o scan volta para o REST até ele ser completado."""
+
+    def __init__(self, interval: str, window: int, candle_format: CandleFormat, url: str | None = None):
+        self.interval = interval
+        self.window = window
+        self.candle_format = candle_format
+        self.url = url or BINANCE_STREAM_CONFIG['url']
+        self.symbols: set[str] = set()
+        self.buffers: dict[str, CandleBuffer] = {}
+        self.requested: dict[str, float] = {}  # último subscribe que pediu cada símbolo (monotonic)
+        self._symbols_lock = threading.Lock()
+        self.last_message: dict[str, float] = {}
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._ws = None
+        self._stopped = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    # ---- ciclo de vida ----
+    def start(self) -> None:
+        if self._thread is not None:
+            return
+        self._thread = threading.Thread(
+            target=lambda: asyncio.run(self._run()),
+            name=f"binance-stream-{self.interval}", daemon=True,
+        )
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stopped.set()
+        if self._loop is not None and self._ws is not None:
+            asyncio.run_coroutine_threadsafe(self._ws.close(), self._loop)
+
+    def _buffer(self, symbol: str, window: int) -> CandleBuffer:
+        """Buffer do símbolo com pelo menos `window` velas (pode ler o disco: fora do event loop)"""
+        buffer = get_buffer('binance', symbol, self.interval, window, self.candle_format.ts_key)
+        with buffer.lock:
+            ensure_capacity(buffer, window)
+        return buffer
+
+    def subscribe(self, symbols: list[str]) -> None:
+        """Inclui símbolos no stream (os já inscritos são ignorados) e tira os que nenhum
+        subscribe pediu nos últimos unsubscribe_after segundos"""
+        now = time.monotonic()
+        with self._symbols_lock:
+            self.requested.update(dict.fromkeys(symbols, now))
+            gone = [symbol for symbol in self.symbols
+                    if now - self.requested[symbol] > BINANCE_STREAM_CONFIG['unsubscribe_after']]
+            for symbol in gone:
+                self.symbols.discard(symbol)
+                self.buffers.pop(symbol, None)
+                self.last_message.pop(symbol, None)
+                del self.requested[symbol]
+            kept = [self.buffers[symbol] for symbol in symbols if symbol in self.buffers]
+            new = [symbol for symbol in symbols if symbol not in self.symbols]
+        for buffer in kept:
+            buffer.touch()  # em uso pelo stream: candle_store não descarta
+        if gone and self._loop is not None and self._ws is not None:
+            asyncio.run_coroutine_threadsafe(self._send('UNSUBSCRIBE', gone), self._loop)
+        if not new:
+            return
+        # Buffers criados aqui, na thread do scan: get_buffer pode ler o SQLite
+        buffers = {symbol: self._buffer(symbol, self.window) for symbol in new}
+        with self._symbols_lock:
+            new = [symbol for symbol in new if symbol not in self.symbols]
+            self.buffers.update(buffers)
+            self.symbols.update(new)
+        if not new:
+            return
+        if self._loop is not None and self._ws is not None:
+            asyncio.run_coroutine_threadsafe(self._send('SUBSCRIBE', new), self._loop)
+
+    def resize(self, window: int) -> None:
+        """Aumenta a janela do stream (ex.: timeframe novo com janela base maior), completando os
+        buffers já inscritos com as velas do disco"""
+        with self._symbols_lock:
+            if window <= self.window:
+                return
+            self.window = window
+            symbols = list(self.buffers)
+        for symbol in symbols:
+            self._buffer(symbol, window)
+
+    async def _send(self, method: str, symbols) -> None:
+        """Envia SUBSCRIBE/UNSUBSCRIBE dos streams de kline dos símbolos, em blocos"""
+        symbols = sorted(symbols)
+        for start in range(0, len(symbols), SUBSCRIBE_CHUNK):
+            params = [f"{symbol.lower()}@kline_{self.interval}" for symbol in symbols[start:start + SUBSCRIBE_CHUNK]]
+            await self._ws.send(json.dumps({'method': method, 'params': params, 'id': int(time.time() * 1000)}))
+
+    async def _run(self) -> None:
+        self._loop = asyncio.get_running_loop()
+        while not self._stopped.is_set():
+            try:
+                async with websockets.connect(self.url, max_queue=None) as ws:
+                    self._ws = ws
+                    with self._symbols_lock:
+                        symbols = list(self.symbols)
+                    await self._send('SUBSCRIBE', symbols)
+                    async for message in ws:
+                        closed = self.handle_message(message)
+                        if closed is not None:
+                            self._loop.run_in_executor(None, persist, *closed)
+            except Exception:
+                pass  # Queda de conexão: tenta de novo após reconnect_delay
+            finally:
+                self._ws = None
+            if not self._stopped.is_set():
+                await asyncio.sleep(BINANCE_STREAM_CONFIG['reconnect_delay'])
+
+    # ---- mensagens ----
+    def handle_message(self, message) -> tuple[CandleBuffer, list] | None:
+        """Aplica uma mensagem do stream combinado ({"stream": ..., "data": {...}}) ao buffer.
+        Retorna (buffer, [vela]) quando a vela fechou e deve ser gravada em disco (só velas
+        fechadas vão para o disco; a gravação fica com quem chama, fora do event loop)."""
+        try:
+            payload = json.loads(message)
+        except (TypeError, ValueError):
+            return None
+        data = payload.get('data', payload)
+        if not isinstance(data, dict) or data.get('e') != 'kline':
+            return None  # Respostas de SUBSCRIBE e afins
+
+        kline = data['k']
+        symbol = kline['s']
+        buffer = self.buffers.get(symbol)
+        if buffer is None:
+            return None  # Símbolo ainda sem buffer (subscribe em andamento)
+        row = kline_to_row(kline)
+        with buffer.lock:
+            if not buffer.rows or not buffer.merge([row]):
+                return None  # Sem histórico ou com buraco: o REST completa o buffer
+        self.last_message[symbol] = time.time()
+        return (buffer, [row]) if kline['x'] else None
+
+    def live_rows(self, symbol: str, limit: int) -> list | None:
+        """Janela atual do símbolo se o stream estiver em dia com ele, senão None"""
+        if symbol not in self.symbols:
+            return None
+        if time.time() - self.last_message.get(symbol, 0) > BINANCE_STREAM_CONFIG['stale_after']:
+            return None
+        buffer = self.buffers.get(symbol)
+        if buffer is None:
+            return None
+        step = TIMEFRAME_MS[self.interval]
+        with buffer.lock:
+            current_period = int(time.time() * 1000) // step * step
+            if len(buffer.rows) < limit or buffer.last_timestamp < current_period:
+                return None
+            return buffer.rows[-limit:]
+
+
+_streams: dict[str, BinanceKlineStream] = {}
+_streams_lock = threading.Lock()
+
+
+def _stream_params(timeframe: str, limit: int) -> tuple[str, int]:
+    """Intervalo do stream e tamanho da janela: a base do resampling, quando houver"""
+    resample = resample_base('binance', timeframe, limit)
+    return resample if resample is not None else (timeframe, limit)
+
+
+def get_stream(interval: str, window: int, candle_format: CandleFormat) -> BinanceKlineStream:
+    """Retorna (iniciando se necessário) o stream compartilhado do intervalo, com a janela
+    aumentada para `window` se preciso"""
+    with _streams_lock:
+        stream = _streams.get(interval)
+        if stream is None:
+            stream = BinanceKlineStream(interval, window, candle_format)
+            _streams[interval] = stream
+            stream.start()
+    stream.resize(window)
+    return stream
+
+
+def subscribe(symbols: list[str], timeframe: str, limit: int, candle_format: CandleFormat) -> None:
+    """Garante que os `symbols` estejam sendo acompanhados pelo stream (no-op se desabilitado)"""
+    if not BINANCE_STREAM_CONFIG['enabled']:
+        return
+    interval, window = _stream_params(timeframe, limit)
+    get_stream(interval, window, candle_format).subscribe(symbols)
+
+
+def live_candles(symbol: str, timeframe: str, limit: int, candle_format: CandleFormat) -> list | None:
+    """Velas do símbolo vindas do stream, ou None quando é preciso buscar via REST"""
+    if not BINANCE_STREAM_CONFIG['enabled']:
+        return None
+    interval, window = _stream_params(timeframe, limit)
+    stream = _streams.get(interval)
+    if stream is None:
+        return None
+    rows = stream.live_rows(symbol, window)
+    if rows is None or interval == timeframe:
+        return rows
+    return resample_rows(rows, candle_format, timeframe)[-limit:]
+
+
+def stop_streams() -> None:
+    """Encerra todos os streams (ex.: ao desabilitar o streaming em tempo de execução)"""
+    with _streams_lock:
+        for stream in _streams.values():
+            stream.stop()
+        _streams.clear()
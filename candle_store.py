@@ -0,0 +1,404 @@
+# Buffers de velas por (exchange, símbolo, timeframe) para atualização incremental
+# Na primeira busca o buffer recebe a janela completa (ex.: 100 velas). Nas seguintes só
+# as velas novas são pedidas à exchange (limit pequeno / startTime), a vela ainda em
+# formação é substituída e a janela é cortada no mesmo tamanho de uma busca completa,
+# de forma que os indicadores continuem idênticos aos de um download do zero.
+# Os buffers também são gravados em disco (SQLite), então depois de um restart/deploy
+# o scanner parte das velas já salvas e só completa o que falta pela rede.
+# Timeframes maiores (15m, 30m, 1h, 2h, 4h) podem ser montados localmente a partir das
+# velas base de 5m/1h (ver RESAMPLE_CONFIG), então trocar de timeframe não gera um novo
+# download completo.
+# Buffers sem uso há mais de CANDLE_STORE_CONFIG['buffer_idle_ttl'] segundos (símbolo que saiu
+# do top N, timeframe que ninguém mais consulta) são descartados da memória; as velas continuam
+# no disco e voltam na próxima consulta.
+
+import itertools
+import json
+import os
+import sqlite3
+import threading
+import time
+
+from vps_config import CANDLE_STORE_CONFIG, EXCHANGE_CONFIGS, RESAMPLE_CONFIG
+
+TIMEFRAME_MS = {
+    '5m': 5 * 60_000,
+    '15m': 15 * 60_000,
+    '30m': 30 * 60_000,
+    '1h': 60 * 60_000,
+    '2h': 2 * 60 * 60_000,
+    '4h': 4 * 60 * 60_000,
+    '1d': 24 * 60 * 60_000,
+}
+
+
+def default_ts_key(row) -> int:
+    """Timestamp de abertura (ms) de uma vela no formato [timestamp_ms, open, high, ...]"""
+    return int(row[0])
+
+
+def _like(original, value):
+    """Mantém o tipo do campo original (as APIs costumam mandar números como texto)"""
+    if isinstance(original, str):
+        return str(value)
+    if isinstance(original, int):
+        return int(value)
+    return value
+
+
+class CandleFormat:
+    """Onde ficam timestamp e OHLCV numa vela bruta (índices de lista ou chaves de dict).
+
+    `ts_unit` converte o timestamp bruto para milissegundos (1000 para segundos),
+    `sum_fields` são campos somados na agregação (ex.: volume em quote, nº de trades)
+    e `last_fields` copiam o valor da última vela do período (ex.: close_time)."""
+
+    def __init__(self, ts=0, open=1, high=2, low=3, close=4, volume=5, ts_unit=1,
+                 sum_fields=(), last_fields=()):
+        self.ts = ts
+        self.open = open
+        self.high = high
+        self.low = low
+        self.close = close
+        self.volume = volume
+        self.ts_unit = ts_unit
+        self.sum_fields = (volume, *sum_fields)
+        self.last_fields = (close, *last_fields)
+
+    def ts_key(self, row) -> int:
+        return int(row[self.ts]) * self.ts_unit
+
+    def aggregate(self, bucket_ts: int, rows: list):
+        """Junta as velas base de um período numa única vela no mesmo formato bruto"""
+        first, last = rows[0], rows[-1]
+        candle = dict(first) if isinstance(first, dict) else list(first)
+        candle[self.ts] = _like(first[self.ts], bucket_ts // self.ts_unit)
+        candle[self.high] = _like(first[self.high], max(float(row[self.high]) for row in rows))
+        candle[self.low] = _like(first[self.low], min(float(row[self.low]) for row in rows))
+        for field in self.sum_fields:
+            candle[field] = _like(first[field], sum(float(row[field]) for row in rows))
+        for field in self.last_fields:
+            candle[field] = last[field]
+        return candle
+
+
+OHLCV_FORMAT = CandleFormat()  # [timestamp_ms, open, high, low, close, volume] (CCXT)
+
+# Layout das velas brutas de cada API REST
+BINANCE_FORMAT = CandleFormat(sum_fields=(7, 8, 9, 10), last_fields=(6,))
+BYBIT_FORMAT = CandleFormat(sum_fields=(6,))
+KUCOIN_FORMAT = CandleFormat(open=1, close=2, high=3, low=4, volume=5, ts_unit=1000, sum_fields=(6,))
+OKX_FORMAT = CandleFormat(sum_fields=(6, 7), last_fields=(8,))
+HUOBI_FORMAT = CandleFormat(
+    ts='id', open='open', high='high', low='low', close='close', volume='vol',
+    ts_unit=1000, sum_fields=('amount', 'count'),
+)
+
+
+def resample_base(exchange: str, timeframe: str, limit: int) -> tuple[str, int] | None:
+    """Timeframe base e quantidade de velas base para montar `limit` velas de `timeframe`.
+
+    Retorna None (buscar o timeframe nativo) quando não há base configurada ou quando a
+    janela base passaria do máximo de velas por requisição da exchange ('max_candles')."""
+    base = RESAMPLE_CONFIG['bases'].get(timeframe) if RESAMPLE_CONFIG['enabled'] else None
+    if base is None:
+        return None
+    factor = TIMEFRAME_MS[timeframe] // TIMEFRAME_MS[base]
+    window = (limit + 1) * factor  # +1 período: o primeiro pode vir incompleto e é descartado
+    max_candles = EXCHANGE_CONFIGS.get(exchange, {}).get('max_candles')
+    if max_candles is None or window > max_candles:
+        return None
+    return base, window
+
+
+def resample_rows(rows: list, candle_format: CandleFormat, timeframe: str) -> list:
+    """Agrega velas base (ordem crescente) em velas de `timeframe`, alinhadas em UTC.
+
+    O primeiro período é descartado se a base não cobrir o seu início; o último
+    é a vela em formação, como numa busca nativa."""
+    step = TIMEFRAME_MS[timeframe]
+    candles = []
+    for bucket_ts, group in itertools.groupby(rows, key=lambda row: candle_format.ts_key(row) // step * step):
+        group = list(group)
+        if not candles and candle_format.ts_key(group[0]) != bucket_ts:
+            continue
+        candles.append(candle_format.aggregate(bucket_ts, group))
+    return candles
+
+
+def contiguous_tail(rows: list, ts_key, timeframe: str) -> list:
+    """Velas depois do último buraco (timestamps que não avançam exatamente um intervalo).
+
+    As velas salvas em disco podem ter buracos (scanner parado durante uma queda, restart
+    longo); cortando no último buraco, a janela fica incompleta e refresh_limit pede uma
+    busca completa em vez de calcular os indicadores por cima do buraco."""
+    step = TIMEFRAME_MS.get(timeframe)
+    if step is None:
+        return rows
+    for i in range(len(rows) - 1, 0, -1):
+        if ts_key(rows[i]) - ts_key(rows[i - 1]) != step:
+            return rows[i:]
+    return rows
+
+
+def read_contiguous(store: 'SqliteCandleStore', key: tuple[str, str, str], limit: int, ts_key) -> list:
+    """Últimas `limit` velas da chave no disco, sem buracos (ver contiguous_tail)"""
+    return contiguous_tail(store.read(key, limit), ts_key, key[2])
+
+
+class CandleBuffer:
+    """Janela de velas brutas (no formato devolvido pela exchange) em ordem crescente"""
+
+    def __init__(self, maxlen: int, ts_key=default_ts_key):
+        self.key = None  # (exchange, símbolo, timeframe) quando registrado em get_buffer
+        self.maxlen = maxlen
+        self.ts_key = ts_key
+        self.rows: list = []
+        self.lock = threading.Lock()
+        self.last_used = time.monotonic()
+
+    def touch(self) -> None:
+        """Marca o buffer como em uso (adia o descarte por inatividade)"""
+        self.last_used = time.monotonic()
+
+    @property
+    def last_timestamp(self) -> int | None:
+        return self.ts_key(self.rows[-1]) if self.rows else None
+
+    def replace(self, rows: list) -> None:
+        self.rows = list(rows)[-self.maxlen:]
+
+    def merge(self, rows: list) -> bool:
+        """Junta velas novas (ordem crescente) ao buffer, substituindo as que tiverem o mesmo
+        timestamp ou posterior. Retorna False se houver buraco entre buffer e velas novas."""
+        if not rows:
+            return True
+        first_new = self.ts_key(rows[0])
+        keep = [row for row in self.rows if self.ts_key(row) < first_new]
+        if keep and first_new > self.ts_key(keep[-1]) + self._step():
+            return False
+        self.rows = (keep + list(rows))[-self.maxlen:]
+        return True
+
+    def _step(self) -> int:
+        """Intervalo entre velas inferido do próprio buffer"""
+        if len(self.rows) < 2:
+            return 0
+        return self.ts_key(self.rows[-1]) - self.ts_key(self.rows[-2])
+
+
+class SqliteCandleStore:
+    """Armazenamento em disco das velas brutas, chaveado por (exchange, símbolo, timeframe, ts).
+
+    As escritas só acrescentam velas ou sobrescrevem a vela em formação (upsert pelo
+    timestamp); leituras pegam as N velas mais recentes pela chave primária.
+    Cada thread usa sua própria conexão; o modo WAL permite leituras durante escritas."""
+
+    def __init__(self, path: str, max_rows_per_key: int):
+        self.path = path
+        self.max_rows_per_key = max_rows_per_key
+        self._local = threading.local()
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with self._connect() as conn:
+            conn.execute(
+                """CREATE TABLE IF NOT EXISTS candles (
+                    exchange TEXT NOT NULL,
+                    symbol TEXT NOT NULL,
+                    timeframe TEXT NOT NULL,
+                    ts INTEGER NOT NULL,
+                    row TEXT NOT NULL,
+                    PRIMARY KEY (exchange, symbol, timeframe, ts)
+                ) WITHOUT ROWID"""
+            )
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            self._local.conn = conn
+        return conn
+
+    def read(self, key: tuple[str, str, str], limit: int) -> list:
+        """Últimas `limit` velas da chave, em ordem crescente"""
+        cursor = self._connect().execute(
+            "SELECT row FROM candles WHERE exchange = ? AND symbol = ? AND timeframe = ? "
+            "ORDER BY ts DESC LIMIT ?",
+            (*key, limit),
+        )
+        return [json.loads(row) for (row,) in reversed(cursor.fetchall())]
+
+    def write(self, key: tuple[str, str, str], rows: list, ts_key) -> None:
+        """Grava as velas (upsert por timestamp) e descarta as mais antigas além do limite"""
+        if not rows:
+            return
+        with self._connect() as conn:
+            conn.executemany(
+                "INSERT OR REPLACE INTO candles (exchange, symbol, timeframe, ts, row) VALUES (?, ?, ?, ?, ?)",
+                [(*key, ts_key(row), json.dumps(row)) for row in rows],
+            )
+            conn.execute(
+                "DELETE FROM candles WHERE exchange = ? AND symbol = ? AND timeframe = ? AND ts < ("
+                "SELECT ts FROM candles WHERE exchange = ? AND symbol = ? AND timeframe = ? "
+                "ORDER BY ts DESC LIMIT 1 OFFSET ?)",
+                (*key, *key, self.max_rows_per_key - 1),
+            )
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_store() -> SqliteCandleStore | None:
+    """Retorna o armazenamento em disco compartilhado (None se desabilitado em CANDLE_STORE_CONFIG)"""
+    global _store
+    if not CANDLE_STORE_CONFIG['enabled']:
+        return None
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                _store = SqliteCandleStore(CANDLE_STORE_CONFIG['path'], CANDLE_STORE_CONFIG['max_rows_per_key'])
+    return _store
+
+
+_buffers: dict[tuple[str, str, str], CandleBuffer] = {}
+_buffers_lock = threading.Lock()
+_last_sweep = time.monotonic()
+SWEEP_INTERVAL = 60  # segundos entre varreduras de buffers ociosos
+
+
+def _evict_idle(now: float) -> None:
+    """Descarta os buffers sem uso há mais de buffer_idle_ttl segundos (chamar com _buffers_lock)"""
+    global _last_sweep
+    if now - _last_sweep < SWEEP_INTERVAL:
+        return
+    _last_sweep = now
+    ttl = CANDLE_STORE_CONFIG['buffer_idle_ttl']
+    for key in [key for key, buffer in _buffers.items() if now - buffer.last_used > ttl]:
+        del _buffers[key]
+
+
+def get_buffer(exchange: str, symbol: str, timeframe: str, maxlen: int, ts_key=default_ts_key) -> CandleBuffer:
+    """Retorna (criando se necessário) o buffer de velas da chave informada.
+    Um buffer novo já nasce com as velas salvas em disco, quando houver. A leitura do disco
+    acontece com o lock do próprio buffer, não com o do registro: só quem pede a mesma chave
+    espera por ela."""
+    key = (exchange, symbol, timeframe)
+    with _buffers_lock:
+        now = time.monotonic()
+        _evict_idle(now)
+        buffer = _buffers.get(key)
+        created = buffer is None
+        if created:
+            buffer = CandleBuffer(maxlen, ts_key)
+            buffer.key = key
+            buffer.lock.acquire()  # liberado depois da leitura do disco
+            _buffers[key] = buffer
+        buffer.last_used = now
+    if created:
+        try:
+            store = get_store()
+            if store is not None:
+                buffer.replace(read_contiguous(store, key, maxlen, ts_key))
+        except sqlite3.Error:
+            pass  # Sem cache em disco: a primeira busca será completa
+        finally:
+            buffer.lock.release()
+    return buffer
+
+
+def clear_buffers(exchange: str | None = None, timeframe: str | None = None) -> None:
+    """Descarta buffers (todos, ou só os da exchange/timeframe informados)"""
+    with _buffers_lock:
+        for key in list(_buffers):
+            if (exchange is None or key[0] == exchange) and (timeframe is None or key[2] == timeframe):
+                del _buffers[key]
+
+
+def refresh_limit(buffer: CandleBuffer, timeframe: str, limit: int) -> int:
+    """Quantas velas pedir à exchange para atualizar o buffer.
+
+    Retorna `limit` (busca completa) se o buffer estiver vazio/incompleto ou defasado
+    demais; caso contrário, as velas fechadas desde a última + a vela em formação."""
+    last_ts = buffer.last_timestamp
+    step = TIMEFRAME_MS.get(timeframe)
+    if last_ts is None or step is None or len(buffer.rows) < buffer.maxlen:
+        return limit
+    elapsed = max(0, int(time.time() * 1000) - last_ts) // step
+    needed = elapsed + 2  # última vela do buffer (era a vela em formação) + novas + margem
+    return limit if needed >= limit else needed
+
+
+def update_buffer(buffer: CandleBuffer, rows: list, full: bool) -> list | None:
+    """Aplica o resultado de uma busca ao buffer e retorna a janela atualizada.
+    Retorna None se a busca incremental deixou um buraco (é preciso uma busca completa)."""
+    if full:
+        buffer.replace(rows)
+    elif not buffer.merge(rows):
+        return None
+    persist(buffer, rows)
+    return list(buffer.rows)
+
+
+def persist(buffer: CandleBuffer, rows: list) -> None:
+    """Grava no disco as velas recém-baixadas do buffer (falhas de disco não interrompem o scan)"""
+    store = get_store()
+    if store is None or buffer.key is None:
+        return
+    try:
+        store.write(buffer.key, rows, buffer.ts_key)
+    except sqlite3.Error:
+        pass
+
+
+def ensure_capacity(buffer: CandleBuffer, maxlen: int) -> None:
+    """Aumenta a janela do buffer (ex.: quando ele passa a servir de base para resampling),
+    completando com as velas salvas em disco (só a parte sem buracos)"""
+    if buffer.maxlen >= maxlen:
+        return
+    buffer.maxlen = maxlen
+    store = get_store()
+    if store is not None and buffer.key is not None:
+        try:
+            buffer.replace(read_contiguous(store, buffer.key, maxlen, buffer.ts_key))
+        except sqlite3.Error:
+            pass
+
+
+def _get_window(exchange: str, symbol: str, timeframe: str, fetch, limit: int,
+                candle_format: CandleFormat) -> list:
+    buffer = get_buffer(exchange, symbol, timeframe, limit, candle_format.ts_key)
+    # A requisição (com retries e esperas do rate limit) fica fora do buffer.lock: o stream da
+    # Binance aplica as mensagens no mesmo buffer dentro do event loop. Merge e replace são
+    # idempotentes por timestamp, então buscas simultâneas da mesma chave não se atrapalham.
+    with buffer.lock:
+        ensure_capacity(buffer, limit)
+        window = buffer.maxlen
+        request_limit = refresh_limit(buffer, timeframe, window)
+        full = request_limit >= window
+        since = None if full else buffer.last_timestamp
+    fetched = fetch(request_limit, since, timeframe)
+    with buffer.lock:
+        rows = update_buffer(buffer, fetched, full)
+    if rows is None:
+        fetched = fetch(window, None, timeframe)  # buraco entre o buffer e as velas novas
+        with buffer.lock:
+            rows = update_buffer(buffer, fetched, True)
+    return rows[-limit:]
+
+
+def get_candles(exchange: str, symbol: str, timeframe: str, fetch, limit: int = 100,
+                candle_format: CandleFormat = OHLCV_FORMAT) -> list:
+    """Retorna a janela de velas do símbolo, baixando apenas o necessário.
+
+    `fetch(limit, since, timeframe)` deve devolver as velas brutas em ordem crescente;
+    `since` é o timestamp (ms) da última vela do buffer, ou None numa busca completa, para
+    exchanges que paginam por data em vez de limit. Quando o timeframe pode ser montado
+    a partir de uma base (ver resample_base), `fetch` é chamado com o timeframe base."""
+    resample = resample_base(exchange, timeframe, limit)
+    if resample is None:
+        return _get_window(exchange, symbol, timeframe, fetch, limit, candle_format)
+    base, window = resample
+    base_rows = _get_window(exchange, symbol, base, fetch, window, candle_format)
+    return resample_rows(base_rows, candle_format, timeframe)[-limit:]
@@ -0,0 +1,154 @@
+# Busca de velas (OHLCV) em lote para as exchanges atendidas via CCXT
+# Dois motores, escolhidos por exchange em EXCHANGE_CONFIGS['<exchange>']['ccxt_backend']:
+#   'sync'  -> fetch_ohlcv sequencial na instância CCXT compartilhada
+#   'async' -> ccxt.async_support, todo o universo em paralelo limitado por max_concurrency
+# Em ambos, cada símbolo pede só as velas novas desde o último scan (ver candle_store.py),
+# e timeframes com base configurada são montados a partir das velas base.
+# Com `base_url` (ou EXCHANGE_CONFIGS['<exchange>']['api_base_url']) os dois motores usam uma
+# instância própria apontada para outro servidor (ex.: mock HTTP local, ver debug_ccxt_mock.py),
+# sem tocar na instância compartilhada nem na API real; os mercados vêm de `markets`, quando
+# informados, ou do load_markets nesse servidor.
+
+import asyncio
+import re
+
+import ccxt
+import ccxt.async_support as ccxt_async
+
+from candle_store import (
+    OHLCV_FORMAT, ensure_capacity, get_buffer, refresh_limit, resample_base, resample_rows, update_buffer,
+)
+from exchange_client import call_with_retry, call_with_retry_async, get_ccxt_exchange
+from vps_config import EXCHANGE_CONFIGS
+
+
+def get_ccxt_backend(exchange_id: str) -> str:
+    """Retorna o motor configurado para a exchange ('sync' ou 'async')"""
+    return EXCHANGE_CONFIGS.get(exchange_id, {}).get('ccxt_backend', 'sync')
+
+
+def _override_api_urls(urls, base_url: str):
+    """Troca esquema e host de todas as URLs da API por `base_url` (ex.: servidor mock local)"""
+    if isinstance(urls, dict):
+        return {key: _override_api_urls(value, base_url) for key, value in urls.items()}
+    if isinstance(urls, str):
+        return re.sub(r'^https?://[^/]+', base_url.rstrip('/'), urls)
+    return urls
+
+
+def _new_instance(module, exchange_id: str, base_url: str | None):
+    """Instância CCXT nova (síncrona ou assíncrona, conforme `module`), com as URLs da API
+    trocadas por `base_url` antes de qualquer requisição"""
+    exchange = getattr(module, exchange_id)({
+        'enableRateLimit': True,
+        'timeout': EXCHANGE_CONFIGS.get(exchange_id, {}).get('timeout', 30) * 1000,  # CCXT usa milissegundos
+    })
+    if base_url:
+        exchange.urls['api'] = _override_api_urls(exchange.urls['api'], base_url)
+    return exchange
+
+
+async def _fetch_ohlcv_async(exchange_id: str, limits: dict[str, int], timeframe: str, max_concurrency: int,
+                             base_url: str | None, markets, currencies=None) -> dict[str, list]:
+    exchange = _new_instance(ccxt_async, exchange_id, base_url)
+    semaphore = asyncio.Semaphore(max_concurrency)
+
+    async def fetch_one(symbol, limit):
+        async with semaphore:
+            try:
+                return symbol, await call_with_retry_async(
+                    exchange_id, exchange.fetch_ohlcv, symbol, timeframe, limit=limit
+                )
+            except Exception:
+                return symbol, None
+
+    try:
+        if markets is not None:
+            exchange.set_markets(markets, currencies)
+        else:
+            await call_with_retry_async(exchange_id, exchange.load_markets)
+        results = await asyncio.gather(*(fetch_one(symbol, limit) for symbol, limit in limits.items()))
+    finally:
+        await exchange.close()
+    return {symbol: ohlcv for symbol, ohlcv in results if ohlcv is not None}
+
+
+def _fetch_ohlcv(exchange_id: str, limits: dict[str, int], timeframe: str,
+                 base_url: str | None, markets: list | None) -> dict[str, list]:
+    """Busca {symbol: ohlcv} com o `limit` de cada símbolo usando o motor configurado"""
+    config = EXCHANGE_CONFIGS.get(exchange_id, {})
+    base_url = base_url or config.get('api_base_url')
+
+    if get_ccxt_backend(exchange_id) == 'async':
+        currencies = None
+        if markets is None and not base_url:
+            # Reaproveitar os mercados já carregados pela instância síncrona (sem novo load_markets).
+            # get_ccxt_exchange pode carregá-los via HTTP bloqueante: resolver antes do event loop
+            sync_exchange = get_ccxt_exchange(exchange_id)
+            markets, currencies = sync_exchange.markets, sync_exchange.currencies
+        return asyncio.run(_fetch_ohlcv_async(
+            exchange_id, limits, timeframe, config.get('max_concurrency', 8), base_url, markets, currencies,
+        ))
+
+    if base_url or markets is not None:
+        exchange = _new_instance(ccxt, exchange_id, base_url)
+        if markets is not None:
+            exchange.set_markets(markets)
+        else:
+            call_with_retry(exchange_id, exchange.load_markets)
+    else:
+        exchange = get_ccxt_exchange(exchange_id)
+    ohlcv_by_symbol = {}
+    for symbol, limit in limits.items():
+        try:
+            ohlcv_by_symbol[symbol] = call_with_retry(
+                exchange_id, exchange.fetch_ohlcv, symbol, timeframe, limit=limit
+            )
+        except Exception:
+            continue
+    return ohlcv_by_symbol
+
+
+def fetch_ohlcv_batch(exchange_id: str, symbols: list[str], timeframe: str, limit: int = 100,
+                      base_url: str | None = None, markets: list | None = None) -> dict[str, list]:
+    """Busca as velas de todos os `symbols` e retorna {symbol: ohlcv}.
+
+    Símbolos que falharem ficam de fora do dicionário. `base_url` (ou
+    EXCHANGE_CONFIGS['<exchange>']['api_base_url']) redireciona os dois motores para
+    outro servidor, como um mock HTTP local; `markets` (lista de mercados no formato CCXT)
+    evita o load_markets, para mocks que só respondem às velas."""
+    resample = resample_base(exchange_id, timeframe, limit)
+    if resample is not None:
+        base, window = resample
+        return {
+            symbol: resample_rows(ohlcv, OHLCV_FORMAT, timeframe)[-limit:]
+            for symbol, ohlcv in fetch_ohlcv_batch(exchange_id, symbols, base, window, base_url, markets).items()
+        }
+
+    # Os buffers são compartilhados com scans simultâneos: toda leitura/alteração com buffer.lock
+    # (as requisições ficam fora do lock; merge e replace são idempotentes por timestamp)
+    buffers = {symbol: get_buffer(exchange_id, symbol, timeframe, limit) for symbol in symbols}
+    limits = {}
+    for symbol, buffer in buffers.items():
+        with buffer.lock:
+            ensure_capacity(buffer, limit)
+            limits[symbol] = refresh_limit(buffer, timeframe, buffer.maxlen)
+
+    ohlcv_by_symbol = {}
+    needs_full = {}
+    for symbol, ohlcv in _fetch_ohlcv(exchange_id, limits, timeframe, base_url, markets).items():
+        buffer = buffers[symbol]
+        with buffer.lock:
+            rows = update_buffer(buffer, ohlcv, limits[symbol] >= buffer.maxlen)
+            if rows is None:
+                needs_full[symbol] = buffer.maxlen  # buraco entre o buffer e as velas novas
+            else:
+                ohlcv_by_symbol[symbol] = rows[-limit:]
+
+    if needs_full:
+        for symbol, ohlcv in _fetch_ohlcv(exchange_id, needs_full, timeframe, base_url, markets).items():
+            buffer = buffers[symbol]
+            with buffer.lock:
+                ohlcv_by_symbol[symbol] = update_buffer(buffer, ohlcv, True)[-limit:]
+
+    return ohlcv_by_symbol
@@ -0,0 +1,177 @@
+#!/usr/bin/env python3
+"""
+Debug do streaming de velas da Binance (binance_stream.py) contra um servidor WebSocket local
+
+Com mensagens sintéticas também confere que uma busca REST lenta não segura as mensagens do
+stream (a requisição roda fora do lock do buffer) e que símbolos que saíram do top N recebem
+UNSUBSCRIBE e deixam de segurar o buffer.
+
+Uso:
+    python debug_binance_stream.py                       # mensagens sintéticas
+    python debug_binance_stream.py --record frames.jsonl --seconds 60 BTCUSDT ETHUSDT
+    python debug_binance_stream.py --replay frames.jsonl # reproduz mensagens gravadas
+"""
+import argparse
+import asyncio
+import json
+import threading
+import time
+
+import websockets
+
+import vps_config
+vps_config.CANDLE_STORE_CONFIG['enabled'] = False  # não gravar velas de teste em disco
+
+import binance_stream
+from candle_store import BINANCE_FORMAT, TIMEFRAME_MS, get_buffer, get_candles
+
+INTERVAL = '5m'
+BINANCE_URL = 'wss://stream.binance.com:9443/stream'
+
+
+def synthetic_frames(symbols, interval=INTERVAL, updates=5):
+    """Velas históricas (semente do buffer) + mensagens da vela em formação para cada símbolo"""
+    step = TIMEFRAME_MS[interval]
+    current = int(time.time() * 1000) // step * step
+    history, frames = {}, []
+    for n, symbol in enumerate(symbols):
+        price = 100.0 * (n + 1)
+        history[symbol] = [
+            [ts, str(price), str(price * 1.01), str(price * 0.99), str(price), '10',
+             ts + step - 1, '1000', 5, '5', '500', '0']
+            for ts in range(current - 100 * step, current, step)
+        ]
+        for i in range(updates):
+            close = price * (1 + 0.001 * (i + 1))
+            frames.append({'stream': f"{symbol.lower()}@kline_{interval}", 'data': {
+                'e': 'kline', 'E': current + i, 's': symbol, 'k': {
+                    't': current, 'T': current + step - 1, 's': symbol, 'i': interval,
+                    'o': str(price), 'c': str(close), 'h': str(close), 'l': str(price),
+                    'v': str(i + 1), 'n': i + 1, 'x': False, 'q': str(close * (i + 1)),
+                    'V': '0', 'Q': '0', 'B': '0',
+                },
+            }})
+    return history, frames
+
+
+def run_stand_in(frames, port_holder, ready, received):
+    """Servidor local que responde às mensagens SUBSCRIBE reproduzindo `frames`; as mensagens
+    do cliente (SUBSCRIBE/UNSUBSCRIBE) ficam em `received`"""
+    async def handler(ws):
+        received.append(json.loads(await ws.recv()))  # SUBSCRIBE do cliente
+        for frame in frames:
+            await ws.send(json.dumps(frame))
+        async for message in ws:
+            received.append(json.loads(message))
+
+    async def main():
+        async with websockets.serve(handler, '127.0.0.1', 0) as server:
+            port_holder.append(server.sockets[0].getsockname()[1])
+            ready.set()
+            await asyncio.Future()
+
+    threading.Thread(target=lambda: asyncio.run(main()), daemon=True).start()
+
+
+def record(path, symbols, seconds):
+    """Grava as mensagens reais da Binance em JSONL para reproduzir depois"""
+    async def main():
+        params = [f"{s.lower()}@kline_{INTERVAL}" for s in symbols]
+        async with websockets.connect(BINANCE_URL) as ws:
+            await ws.send(json.dumps({'method': 'SUBSCRIBE', 'params': params, 'id': 1}))
+            deadline = time.time() + seconds
+            with open(path, 'w') as f:
+                while time.time() < deadline:
+                    message = await asyncio.wait_for(ws.recv(), timeout=max(deadline - time.time(), 0.1))
+                    if '"e":"kline"' in message:
+                        f.write(message + '\n')
+    asyncio.run(main())
+    print(f"✅ Mensagens gravadas em {path}")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('symbols', nargs='*', default=['BTCUSDT', 'ETHUSDT', 'SOLUSDT'])
+    parser.add_argument('--record')
+    parser.add_argument('--replay')
+    parser.add_argument('--seconds', type=int, default=60)
+    args = parser.parse_args()
+
+    if args.record:
+        record(args.record, args.symbols, args.seconds)
+        return
+
+    if args.replay:
+        with open(args.replay) as f:
+            frames = [json.loads(line) for line in f if line.strip()]
+        symbols = sorted({frame['data']['s'] for frame in frames})
+        # Sem histórico REST: a primeira mensagem de cada símbolo serve de semente
+        history = {}
+        for frame in frames:
+            history.setdefault(frame['data']['s'], [binance_stream.kline_to_row(frame['data']['k'])])
+    else:
+        symbols = args.symbols
+        history, frames = synthetic_frames(symbols)
+
+    print(f"=== DEBUG STREAM BINANCE - {len(frames)} mensagens, {len(symbols)} símbolos ===\n")
+    for symbol, rows in history.items():
+        get_buffer('binance', symbol, INTERVAL, 100, BINANCE_FORMAT.ts_key).replace(rows)
+
+    port_holder, ready, received = [], threading.Event(), []
+    run_stand_in(frames, port_holder, ready, received)
+    ready.wait()
+    vps_config.BINANCE_STREAM_CONFIG['enabled'] = True
+    vps_config.BINANCE_STREAM_CONFIG['url'] = f"ws://127.0.0.1:{port_holder[0]}/stream"
+    print(f"🔌 Servidor local: {vps_config.BINANCE_STREAM_CONFIG['url']}")
+
+    binance_stream.subscribe(symbols, INTERVAL, 100, BINANCE_FORMAT)
+    time.sleep(2)
+
+    for symbol in symbols:
+        buffer = get_buffer('binance', symbol, INTERVAL, 100, BINANCE_FORMAT.ts_key)
+        live = binance_stream.live_candles(symbol, INTERVAL, 100, BINANCE_FORMAT)
+        status = "✅ stream" if live is not None else "⚠️ REST (stream defasado/incompleto)"
+        last = buffer.rows[-1] if buffer.rows else None
+        print(f"{symbol}: {len(buffer.rows)} velas, {status}")
+        if last:
+            print(f"   última vela: ts={last[0]} close={last[4]} volume={last[5]}")
+
+    if not args.replay and len(symbols) > 1:
+        check_slow_rest(symbols[0], frames)
+        check_unsubscribe(symbols, received)
+    binance_stream.stop_streams()
+
+
+def check_slow_rest(symbol, frames):
+    """Mensagem do stream durante uma busca REST lenta do mesmo símbolo não espera a busca"""
+    stream = binance_stream._streams[INTERVAL]
+    frame = json.dumps(next(frame for frame in frames if frame['data']['s'] == symbol))
+
+    def slow_fetch(limit, since, timeframe):
+        time.sleep(1.0)  # retries / espera do rate limit
+        return []
+
+    rest = threading.Thread(target=get_candles, args=('binance', symbol, INTERVAL, slow_fetch, 100, BINANCE_FORMAT))
+    rest.start()
+    time.sleep(0.1)
+    start = time.perf_counter()
+    stream.handle_message(frame)
+    elapsed = time.perf_counter() - start
+    rest.join()
+    print(f"{'✅' if elapsed < 0.1 else '❌'} mensagem aplicada durante busca REST lenta em {elapsed * 1000:.1f} ms")
+
+
+def check_unsubscribe(symbols, received):
+    """Símbolo que nenhum scan pede há unsubscribe_after segundos sai do stream"""
+    stream = binance_stream._streams[INTERVAL]
+    gone = symbols[-1]
+    stream.requested[gone] -= vps_config.BINANCE_STREAM_CONFIG['unsubscribe_after'] + 1
+    binance_stream.subscribe(symbols[:-1], INTERVAL, 100, BINANCE_FORMAT)
+    time.sleep(0.5)
+    unsubscribed = [param for message in received if message.get('method') == 'UNSUBSCRIBE' for param in message['params']]
+    ok = unsubscribed == [f"{gone.lower()}@kline_{INTERVAL}"] and gone not in stream.symbols and gone not in stream.buffers
+    print(f"{'✅' if ok else '❌'} {gone} saiu do stream (UNSUBSCRIBE {unsubscribed}), buffer liberado")
+
+
+if __name__ == "__main__":
+    main()
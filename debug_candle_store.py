@@ -0,0 +1,145 @@
+#!/usr/bin/env python3
+"""
+Debug das velas salvas em disco (candle_store.py) com buracos
+
+Monta um SQLite temporário com a janela base de 5m de um símbolo (303 velas) com um buraco de
+202 velas (scanner parado durante uma queda) e confere que a leitura do disco - na partida
+(get_buffer) e ao aumentar a janela (ensure_capacity) - não usa as velas de antes do buraco:
+a janela fica incompleta e a próxima atualização é uma busca completa, não só as últimas velas.
+Também confere que uma leitura lenta do disco não bloqueia o registro de buffers (outras chaves)
+e que buffers sem uso são descartados da memória e voltam do disco.
+Falha (código de saída 1) se alguma conferência falhar.
+
+Uso:
+    python debug_candle_store.py
+"""
+import os
+import sys
+import tempfile
+import threading
+import time
+
+import candle_store
+from candle_store import TIMEFRAME_MS, CandleBuffer, ensure_capacity, get_buffer, get_candles
+from vps_config import CANDLE_STORE_CONFIG
+
+STEP = TIMEFRAME_MS['5m']
+WINDOW = 303  # janela base de 100 velas de 15m (resample_base)
+
+results = []
+
+
+def check(label, ok):
+    results.append(ok)
+    print(f"{'✅' if ok else '❌'} {label}")
+
+
+def candle(ts):
+    return [ts, 1.0, 1.0, 1.0, 1.0, 1.0]
+
+
+def gapped_rows(now_ts, gap=202):
+    """WINDOW velas até a vela em formação, faltando `gap` velas no meio"""
+    timestamps = [now_ts - i * STEP for i in range(WINDOW + gap)][::-1]
+    before, after = timestamps[:WINDOW // 2], timestamps[WINDOW // 2 + gap:]
+    return [candle(ts) for ts in before + after]
+
+
+def check_slow_disk(store, key):
+    """Leitura lenta do disco na partida de uma chave não segura as outras"""
+    candle_store.clear_buffers()
+    read = store.read
+
+    def slow_read(read_key, limit):
+        if read_key == key:
+            time.sleep(0.5)
+        return read(read_key, limit)
+
+    store.read = slow_read
+    slow = threading.Thread(target=get_buffer, args=(*key, WINDOW))
+    slow.start()
+    time.sleep(0.05)
+    start = time.perf_counter()
+    other = get_buffer('binance', 'OTHERUSDT', '5m', WINDOW)
+    other_elapsed = time.perf_counter() - start
+    start = time.perf_counter()
+    same = get_buffer(*key, WINDOW)
+    with same.lock:
+        same_rows = len(same.rows)
+    same_elapsed = time.perf_counter() - start
+    slow.join()
+    store.read = read
+    check(f"outra chave não espera a leitura lenta ({other_elapsed * 1000:.0f} ms)", other_elapsed < 0.3 and other.rows == [])
+    check(f"mesma chave espera a leitura e vê as {same_rows} velas ({same_elapsed * 1000:.0f} ms)",
+          same_rows == WINDOW and same_elapsed > 0.3)
+
+
+def check_eviction(key):
+    """Buffers sem uso saem da memória; a chave volta do disco na próxima consulta"""
+    ttl = CANDLE_STORE_CONFIG['buffer_idle_ttl']
+    buffer = get_buffer(*key, WINDOW)
+    idle = get_buffer('binance', 'IDLEUSDT', '5m', WINDOW)
+    idle.last_used -= ttl + 1
+    candle_store._last_sweep -= candle_store.SWEEP_INTERVAL
+    again = get_buffer(*key, WINDOW)
+    check("buffer ocioso descartado, buffer em uso mantido",
+          ('binance', 'IDLEUSDT', '5m') not in candle_store._buffers and again is buffer)
+    buffer.last_used -= ttl + 1
+    candle_store._last_sweep -= candle_store.SWEEP_INTERVAL
+    reloaded = get_buffer(*key, WINDOW)
+    check(f"chave descartada volta do disco com {len(reloaded.rows)} velas", reloaded is not buffer and len(reloaded.rows) == WINDOW)
+
+
+
+def main():
+    print("=== DEBUG CANDLE STORE - velas em disco com buraco ===\n")
+    with tempfile.TemporaryDirectory() as tmp:
+        CANDLE_STORE_CONFIG['path'] = os.path.join(tmp, 'candles.sqlite3')
+        store = candle_store.get_store()
+        now_ts = int(time.time() * 1000) // STEP * STEP
+        rows = gapped_rows(now_ts)
+        key = ('binance', 'BTCUSDT', '5m')
+        store.write(key, rows, candle_store.default_ts_key)
+        check(f"disco com {len(store.read(key, WINDOW))} velas e um buraco de 202", len(store.read(key, WINDOW)) == WINDOW)
+
+        # Partida: buffer novo lido do disco
+        buffer = get_buffer(*key, WINDOW)
+        after_gap = WINDOW - WINDOW // 2
+        check(f"get_buffer guarda só as {len(buffer.rows)} velas depois do buraco", len(buffer.rows) == after_gap)
+        limit = candle_store.refresh_limit(buffer, '5m', WINDOW)
+        check(f"próxima atualização é completa (limit={limit})", limit == WINDOW)
+
+        # Janela aumentada (buffer passa a servir de base para resampling)
+        small = CandleBuffer(100)
+        small.key = key
+        small.replace(rows[-100:])
+        ensure_capacity(small, WINDOW)
+        check(f"ensure_capacity guarda só as {len(small.rows)} velas depois do buraco", len(small.rows) == after_gap)
+
+        # Caminho completo: 15m montado a partir do 5m
+        requested = []
+
+        def fetch(limit, since, timeframe):
+            requested.append(limit)
+            start = now_ts - (limit - 1) * STEP
+            return [candle(start + i * STEP) for i in range(limit)]
+
+        candle_store.clear_buffers()
+        candles = get_candles('binance', 'BTCUSDT', '15m', fetch, limit=100)
+        check(f"15m pede a janela base completa (limits={requested}) e devolve {len(candles)} velas",
+              requested == [WINDOW] and len(candles) == 100)
+
+        # Disco sem buraco continua servindo a partida incremental
+        key_ok = ('binance', 'ETHUSDT', '5m')
+        store.write(key_ok, [candle(now_ts - i * STEP) for i in range(WINDOW)][::-1], candle_store.default_ts_key)
+        warm = get_buffer(*key_ok, WINDOW)
+        check(f"disco sem buraco: buffer completo e atualização incremental (limit={candle_store.refresh_limit(warm, '5m', WINDOW)})",
+              len(warm.rows) == WINDOW and candle_store.refresh_limit(warm, '5m', WINDOW) < WINDOW)
+
+        check_slow_disk(store, key_ok)
+        check_eviction(key_ok)
+    sys.exit(0 if all(results) else 1)
+
+
+if __name__ == "__main__":
+    main()
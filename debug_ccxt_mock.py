@@ -0,0 +1,151 @@
+#!/usr/bin/env python3
+"""
+Debug do motor CCXT (ccxt_backend.py) contra um servidor mock local
+
+Sobe um servidor HTTP em 127.0.0.1 que responde às velas spot da Bitget
+(/api/v2/spot/market/candles) e roda fetch_ohlcv_batch com base_url apontando para ele, nos
+motores 'sync' e 'async'. Os mercados são injetados (`markets`), então nenhuma requisição vai
+para a API real: confere que todas as requisições chegaram ao mock, que a segunda busca é
+incremental (limit pequeno) e que a instância CCXT compartilhada não foi criada. Sem base_url,
+confere que o motor 'async' pega os mercados da instância compartilhada antes do event loop.
+Falha (código de saída 1) se alguma conferência falhar.
+
+Uso:
+    python debug_ccxt_mock.py
+    python debug_ccxt_mock.py --symbols 50 --delay 0.05    # latência simulada por requisição
+"""
+import argparse
+import json
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import asyncio
+
+import ccxt_backend
+import exchange_client
+from ccxt_backend import fetch_ohlcv_batch
+from candle_store import TIMEFRAME_MS, clear_buffers
+from vps_config import CANDLE_STORE_CONFIG, EXCHANGE_CONFIGS
+
+DAY = TIMEFRAME_MS['1d']
+
+results = []
+requests_seen = []
+
+
+def check(label, ok):
+    results.append(ok)
+    print(f"{'✅' if ok else '❌'} {label}")
+
+
+class MockBitget(BaseHTTPRequestHandler):
+    delay = 0.0
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        params = {key: values[0] for key, values in parse_qs(url.query).items()}
+        requests_seen.append((url.path, params))
+        time.sleep(self.delay)
+        if url.path != '/api/v2/spot/market/candles':
+            self.send_error(404)
+            return
+        limit = int(params.get('limit', 100))
+        last = int(time.time() * 1000) // DAY * DAY
+        candles = [
+            [str(ts), "100", "110", "90", "105", "1000", "105000", "105000"]
+            for ts in range(last - (limit - 1) * DAY, last + 1, DAY)
+        ]
+        body = json.dumps({"code": "00000", "msg": "success", "requestTime": 0, "data": candles}).encode()
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+def market(symbol):
+    base, quote = symbol.split('/')
+    return {
+        'id': base + quote, 'symbol': symbol, 'base': base, 'quote': quote, 'baseId': base, 'quoteId': quote,
+        'type': 'spot', 'spot': True, 'swap': False, 'future': False, 'option': False, 'contract': False,
+        'active': True, 'linear': None, 'inverse': None, 'settle': None, 'settleId': None,
+        'precision': {}, 'limits': {}, 'info': {},
+    }
+
+
+def check_shared_markets(markets):
+    """Motor 'async' sem base_url: get_ccxt_exchange (bloqueante) roda fora do event loop"""
+    calls = []
+
+    class Shared:
+        currencies = {}
+
+    def get_shared(exchange_id):
+        try:
+            asyncio.get_running_loop()
+            calls.append('dentro do event loop')
+        except RuntimeError:
+            calls.append('fora do event loop')
+        shared = Shared()
+        shared.markets = {market['symbol']: market for market in markets}
+        return shared
+
+    EXCHANGE_CONFIGS['bitget']['ccxt_backend'] = 'async'
+    get_ccxt_exchange = ccxt_backend.get_ccxt_exchange
+    ccxt_backend.get_ccxt_exchange = get_shared
+    try:
+        ccxt_backend._fetch_ohlcv('bitget', {}, '1d', None, None)  # sem símbolos: nenhuma requisição
+    finally:
+        ccxt_backend.get_ccxt_exchange = get_ccxt_exchange
+    check(f"async: mercados da instância compartilhada obtidos {calls}", calls == ['fora do event loop'])
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--symbols', type=int, default=20)
+    parser.add_argument('--delay', type=float, default=0.0)
+    args = parser.parse_args()
+
+    CANDLE_STORE_CONFIG['enabled'] = False  # só buffers em memória
+    MockBitget.delay = args.delay
+    server = ThreadingHTTPServer(('127.0.0.1', 0), MockBitget)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base_url = f"http://127.0.0.1:{server.server_port}"
+
+    symbols = [f"C{i}/USDT" for i in range(args.symbols)]
+    markets = [market(symbol) for symbol in symbols]
+    print(f"=== DEBUG CCXT MOCK - bitget, {args.symbols} símbolos, {base_url} ===\n")
+
+    for backend in ('sync', 'async'):
+        EXCHANGE_CONFIGS['bitget']['ccxt_backend'] = backend
+        clear_buffers('bitget')
+        requests_seen.clear()
+        start = time.perf_counter()
+        first = fetch_ohlcv_batch('bitget', symbols, '1d', limit=100, base_url=base_url, markets=markets)
+        elapsed = time.perf_counter() - start
+        check(f"{backend}: {len(first)} símbolos x {min(map(len, first.values()), default=0)} velas "
+              f"em {elapsed * 1000:.0f} ms, {len(requests_seen)} requisições no mock",
+              len(first) == args.symbols and all(len(rows) == 100 for rows in first.values())
+              and len(requests_seen) == args.symbols)
+
+        requests_seen.clear()
+        second = fetch_ohlcv_batch('bitget', symbols, '1d', limit=100, base_url=base_url, markets=markets)
+        limits = sorted({int(params['limit']) for _, params in requests_seen})
+        check(f"{backend}: segunda busca incremental (limits={limits})",
+              limits and max(limits) <= 2 and all(len(rows) == 100 for rows in second.values()))
+
+    check("instância CCXT compartilhada não foi criada (nenhum acesso à API real)",
+          'bitget' not in exchange_client._ccxt_instances)
+    server.shutdown()
+    check_shared_markets(markets)
+    sys.exit(0 if all(results) else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""
+Debug do modo compacto (INDICATOR_CONFIG['compact']): painel e indicadores em float32
+
+Compara os indicadores do painel float32 com os do painel float64 e falha (código de saída 1)
+se a diferença passar dos limites abaixo. São dois erros:
+  - cálculo: mesmas velas (já arredondadas para float32) nos dois painéis; mede só o que os
+    kernels perdem em float32 (as acumulações rodam em float64);
+  - total: velas originais em float64 x painel float32; inclui o arredondamento das velas,
+    que o CMF amplifica em velas com range pequeno (close - HL2 dividido por high - low).
+O erro é relativo à escala da série (máximo absoluto, no mínimo 1). Mostra também a memória
+do painel e do snapshot nos dois modos e confere que um erro no cálculo (ex.: coluna não
+numérica no painel float32) é registrado no log em vez de virar um snapshot vazio silencioso.
+
+Uso:
+    python debug_compact_mode.py                 # 1h, 500 símbolos x 300 velas
+    python debug_compact_mode.py 5m --symbols 1000 --candles 500
+"""
+import argparse
+import logging
+import sys
+
+import numpy as np
+
+import indicators
+from debug_indicator_benchmark import synthetic_frames
+from indicators import build_panel, compute_panel, panel_snapshot
+
+# Limites de erro relativo por coluna (as demais usam DEFAULT_BOUND)
+CALC_BOUND = 1e-6
+DEFAULT_BOUND = 1e-4
+TOTAL_BOUNDS = {'CMF': 2e-3}
+
+
+def drift(expected, actual):
+    """Maior erro relativo por linha (escala = máximo absoluto da linha, no mínimo 1); NaN precisam coincidir"""
+    expected, actual = np.asarray(expected, dtype=np.float64), np.asarray(actual, dtype=np.float64)
+    if not np.array_equal(np.isnan(expected), np.isnan(actual)):
+        return np.inf
+    if np.isnan(expected).all():
+        return 0.0
+    scale = np.maximum(np.nanmax(np.abs(expected), axis=-1, keepdims=True), 1.0)
+    return float(np.nanmax(np.abs(actual - expected) / scale))
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('timeframe', nargs='?', default='1h')
+    parser.add_argument('--symbols', type=int, default=500)
+    parser.add_argument('--candles', type=int, default=300)
+    args = parser.parse_args()
+
+    print(f"=== DEBUG MODO COMPACTO - {args.timeframe}, {args.symbols} símbolos x {args.candles} velas ===\n")
+    frames = synthetic_frames(args.symbols, args.candles)
+    for df in frames:  # preços com 4 casas decimais, como nas exchanges
+        for col in ('open', 'high', 'low', 'close'):
+            df[col] = df[col].round(4)
+
+    panel64, _ = build_panel(frames)
+    panel32, _ = build_panel(frames, np.float32)
+    rounded64 = {col: arr.astype(np.float64) for col, arr in panel32.items()}
+    full64 = compute_panel(panel64, args.timeframe, tail=None)
+    rounded = compute_panel(rounded64, args.timeframe, tail=None)
+    full32 = compute_panel(panel32, args.timeframe, tail=None)
+
+    failed = False
+    print(f"{'coluna':<14} {'cálculo':>10} {'total':>10}")
+    for col, expected in full64.items():
+        calc_err = drift(rounded[col], full32[col])
+        total_err = drift(expected, full32[col])
+        ok = calc_err <= CALC_BOUND and total_err <= TOTAL_BOUNDS.get(col, DEFAULT_BOUND)
+        failed |= not ok
+        print(f"{'✅' if ok else '❌'} {col:<12} {calc_err:10.1e} {total_err:10.1e}")
+
+    # Memória: painel de velas e snapshot (o que fica no cache do Streamlit)
+    sizes = {}
+    for compact in (False, True):
+        indicators.INDICATOR_CONFIG['compact'] = compact
+        panel, _ = build_panel(frames, indicators.panel_dtype())
+        snapshot = panel_snapshot(frames, args.timeframe)
+        sizes[compact] = (sum(arr.nbytes for arr in panel.values()), snapshot.memory_usage(deep=True).sum())
+    indicators.INDICATOR_CONFIG['compact'] = False
+    print()
+    for label, i in (('painel', 0), ('snapshot', 1)):
+        print(f"💾 {label:<9} float64 {sizes[False][i] / 1e6:7.2f} MB | compacto {sizes[True][i] / 1e6:7.2f} MB")
+
+    failed |= not check_logged_error(frames, args.timeframe)
+    sys.exit(1 if failed else 0)
+
+
+def check_logged_error(frames, timeframe):
+    """Coluna não numérica no modo compacto: snapshot vazio e erro no log 'scanner'"""
+    records = []
+    handler = logging.Handler()
+    handler.emit = records.append
+    logger = logging.getLogger('scanner')
+    logger.addHandler(handler)
+    broken = [df.copy() for df in frames[:3]]
+    broken[1]['close'] = broken[1]['close'].astype(str) + 'x'
+    indicators.INDICATOR_CONFIG['compact'] = True
+    try:
+        snapshot = panel_snapshot(broken, timeframe)
+    finally:
+        indicators.INDICATOR_CONFIG['compact'] = False
+        logger.removeHandler(handler)
+    errors = [record.getMessage() for record in records if record.levelno >= logging.ERROR]
+    ok = snapshot.empty and len(errors) == 1
+    print(f"\n{'✅' if ok else '❌'} erro no cálculo registrado no log: {errors[0] if errors else 'nenhum'}")
+    return ok
+
+
+if __name__ == "__main__":
+    main()
@@ -2,7 +2,7 @@ import pandas as pd
 import numpy as np
 import requests
 import ccxt
-import pandas_ta as ta
+import indicator_kernels as kernels
 from datetime import datetime
 import time
 import warnings
@@ -27,8 +27,9 @@ def fetch_binance_debug(timeframe="1h"):
                     
                     if len(df) >= 20:
                         # Calcular RSI
-                        df.ta.rsi(length=14, append=True)
-                        df.ta.uo(length=[7, 14, 28], append=True)
+                        high, low, close = (df[col].to_numpy(dtype=np.float64) for col in ('high', 'low', 'close'))
+                        df['RSI_14'] = kernels.rsi(close, 14, kernels.empty_like(close))
+                        df['UO_7_14_28'] = kernels.uo(high, low, close, kernels.empty_like(close))
                         
                         # Últimas 3 velas para % change
                         pct_change = ((df['close'].iloc[-1] - df['close'].iloc[-4]) / df['close'].iloc[-4]) * 100 if len(df) >= 4 else 0
@@ -87,8 +88,9 @@ def fetch_ccxt_debug(exchange_name, timeframe="1h"):
                     df.columns = ['timestamp', 'open', 'high', 'low', 'close', 'volume']
                     
                     # Calcular indicadores básicos
-                    df.ta.rsi(length=14, append=True)
-                    df.ta.uo(length=[7, 14, 28], append=True)
+                    high, low, close = (df[col].to_numpy(dtype=np.float64) for col in ('high', 'low', 'close'))
+                    df['RSI_14'] = kernels.rsi(close, 14, kernels.empty_like(close))
+                    df['UO_7_14_28'] = kernels.uo(high, low, close, kernels.empty_like(close))
                     
                     # % change
                     pct_change = ((df['close'].iloc[-1] - df['close'].iloc[-4]) / df['close'].iloc[-4]) * 100 if len(df) >= 4 else 0
@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""
+Benchmark do motor de indicadores: compute_indicators por símbolo (pandas) x painel NumPy x painel Numba,
+com o relatório de reaproveitamento dos intermediários compartilhados (indicator_kernels.Intermediates)
+
+Uso:
+    python debug_indicator_benchmark.py                      # 200 símbolos x 100 velas, 1h
+    python debug_indicator_benchmark.py --symbols 1000 --candles 500 --timeframe 5m
+"""
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+import indicator_kernels
+from indicators import build_panel, compute_indicators, compute_panel, panel_snapshot
+
+
+def synthetic_frames(symbols, candles, seed=0):
+    """DataFrames OHLCV sintéticos, um por símbolo"""
+    rng = np.random.default_rng(seed)
+    frames = []
+    for i in range(symbols):
+        close = 100 * np.exp(np.cumsum(rng.normal(0, 0.01, candles)))
+        frames.append(pd.DataFrame({
+            'timestamp': np.arange(candles) * 60_000,
+            'open': close,
+            'high': close * (1 + np.abs(rng.normal(0, 0.004, candles))),
+            'low': close * (1 - np.abs(rng.normal(0, 0.004, candles))),
+            'close': close,
+            'volume': rng.uniform(1e3, 1e6, candles),
+            'symbol': f"S{i}/USDT",
+        }))
+    return frames
+
+
+def best_of(func, repeat):
+    """Menor tempo (s) entre `repeat` execuções"""
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--symbols', type=int, default=200)
+    parser.add_argument('--candles', type=int, default=100)
+    parser.add_argument('--timeframe', default='1h')
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    frames = synthetic_frames(args.symbols, args.candles)
+    print(f"=== BENCHMARK INDICADORES - {args.symbols} símbolos x {args.candles} velas, {args.timeframe} ===\n")
+
+    results = {}
+    results['compute_indicators (por símbolo)'] = best_of(
+        lambda: [compute_indicators(df.copy(), args.timeframe) for df in frames], max(1, args.repeat // 2)
+    )
+
+    panel, _ = build_panel(frames)
+    full = {}
+    for backend in ('numpy', 'numba'):
+        active = indicator_kernels.set_backend(backend)
+        if active != backend:
+            print(f"⚠️ Numba não instalado (pip install numba): backend '{backend}' ignorado\n")
+            continue
+        start = time.perf_counter()
+        full[backend] = compute_panel(panel, args.timeframe, tail=None)  # 1ª chamada: compila/carrega o cache
+        first_call = time.perf_counter() - start
+        results[f'compute_panel {backend} (séries completas)'] = best_of(
+            lambda: compute_panel(panel, args.timeframe, tail=None), args.repeat
+        )
+        results[f'panel_snapshot {backend}'] = best_of(lambda: panel_snapshot(frames, args.timeframe), args.repeat)
+        print(f"⏱️ 1ª chamada com backend {backend}: {first_call * 1000:.1f} ms")
+
+    baseline = results['compute_indicators (por símbolo)']
+    print()
+    for name, seconds in results.items():
+        print(f"{name:<45} {seconds * 1000:9.1f} ms   {baseline / seconds:6.1f}x")
+
+    shared = indicator_kernels.Intermediates(**{col: panel[col] for col in ('high', 'low', 'close', 'volume')})
+    compute_panel(panel, args.timeframe, tail=None, shared=shared)
+    print(f"\n♻️ Intermediários compartilhados (backend {indicator_kernels.get_backend()}):")
+    for name, stats in shared.report().items():
+        print(f"   {name:<22} reaproveitado {stats['reused']}x   {stats['saved_bytes'] / 1e6:8.2f} MB não recalculados")
+
+    if len(full) == 2:
+        worst = 0.0
+        for col, expected in full['numpy'].items():
+            actual = full['numba'][col]
+            mask = ~np.isnan(expected)
+            if not np.array_equal(mask, ~np.isnan(actual)):
+                worst = np.inf
+                break
+            if mask.any():
+                scale = max(1.0, np.abs(expected[mask]).max())
+                worst = max(worst, np.abs(actual[mask] - expected[mask]).max() / scale)
+        status = "✅" if worst < 1e-9 else "❌"
+        print(f"\n{status} Numba x NumPy: erro relativo máximo {worst:.2e}")
+
+    indicator_kernels.set_backend(indicator_kernels.INDICATOR_CONFIG['backend'])
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+"""
+Paridade dos indicadores nativos (indicator_kernels.py) com o pandas-ta
+
+O app não depende mais do pandas-ta: RSI, UO e ADX são calculados pelos kernels. Este script
+usa o pandas-ta apenas como referência, na versão fixada em requirements-dev.txt
+(pandas-ta-classic 0.3.14b1, o código do pandas-ta 0.3.14b0; pip install -r requirements-dev.txt
+e, com NumPy 2, rode antes o fix_pandas_ta.py), e compara, vela a vela, as colunas de
+compute_indicators com as do df.ta em séries sintéticas (algumas com trechos parados). Outras
+versões mudam a inicialização da RMA e não servem de referência: o script recusa e falha.
+
+Uso:
+    python debug_pandas_ta_parity.py                # 1h, 50 séries de 300 velas
+    python debug_pandas_ta_parity.py 5m --symbols 200 --candles 500
+"""
+import argparse
+import sys
+import time
+from importlib import metadata
+
+import numpy as np
+import pandas as pd
+
+from indicators import compute_indicators, get_dmi_period, get_rsi_period
+
+try:
+    import pandas_ta_classic as pandas_ta  # noqa: F401 - registra o accessor df.ta
+    import_error = None
+except ImportError as exc:
+    pandas_ta, import_error = None, exc
+
+REFERENCE = ('pandas-ta-classic', '0.3.14b1')  # mesma versão de requirements-dev.txt
+TOLERANCE = 1e-9
+
+
+def reference_version():
+    """Versão instalada da distribuição de referência (None se não estiver instalada)"""
+    try:
+        return metadata.version(REFERENCE[0])
+    except metadata.PackageNotFoundError:
+        return None
+
+
+def synthetic_frame(n, seed):
+    """DataFrame OHLCV sintético; algumas séries têm um trecho sem variação (high == low)"""
+    rng = np.random.default_rng(seed)
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.01, n)))
+    high = close * (1 + np.abs(rng.normal(0, 0.004, n)))
+    low = close * (1 - np.abs(rng.normal(0, 0.004, n)))
+    volume = rng.uniform(1e3, 1e6, n)
+    if seed % 3 == 0:
+        flat = slice(n // 2, n // 2 + 20)
+        close[flat] = high[flat] = low[flat] = close[n // 2]
+        volume[flat] = 0.0
+    return pd.DataFrame({
+        'timestamp': np.arange(n) * 60_000,
+        'open': np.concatenate(([close[0]], close[:-1])),
+        'high': high,
+        'low': low,
+        'close': close,
+        'volume': volume,
+    })
+
+
+def reference_columns(df, timeframe):
+    """RSI, UO e ADX/DMP/DMN calculados pelo pandas-ta"""
+    ref = df[['open', 'high', 'low', 'close', 'volume']].copy()
+    ref.ta.rsi(length=get_rsi_period(timeframe), append=True)
+    ref.ta.uo(length=[7, 14, 28], append=True)
+    ref.ta.adx(length=get_dmi_period(timeframe), append=True)
+    return ref
+
+
+def relative_error(actual, expected):
+    """Maior erro relativo (escala da série); NaN precisam coincidir"""
+    actual, expected = np.asarray(actual, dtype=float), np.asarray(expected, dtype=float)
+    if not np.array_equal(np.isnan(actual), np.isnan(expected)):
+        return np.inf
+    mask = ~np.isnan(expected)
+    if not mask.any():
+        return 0.0
+    return float(np.max(np.abs(actual[mask] - expected[mask])) / max(1.0, np.max(np.abs(expected[mask]))))
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('timeframe', nargs='?', default='1h')
+    parser.add_argument('--symbols', type=int, default=50)
+    parser.add_argument('--candles', type=int, default=300)
+    args = parser.parse_args()
+
+    print(f"=== PARIDADE PANDAS-TA - {args.timeframe}, {args.symbols} séries x {args.candles} velas ===\n")
+    if pandas_ta is None:
+        print(f"⚠️ referência indisponível ({import_error}): pip install -r requirements-dev.txt "
+              f"(com NumPy 2, rode antes o fix_pandas_ta.py); nada a comparar")
+        return
+    version = reference_version()
+    if version != REFERENCE[1]:
+        print(f"❌ referência é {REFERENCE[0]} {version}, esperado {REFERENCE[1]} (pip install -r requirements-dev.txt)")
+        sys.exit(1)
+
+    rsi_period = get_rsi_period(args.timeframe)
+    dmi_period = get_dmi_period(args.timeframe)
+    columns = [f"RSI_{rsi_period}", 'UO_7_14_28', f"ADX_{dmi_period}", f"DMP_{dmi_period}", f"DMN_{dmi_period}"]
+
+    worst = dict.fromkeys(columns, 0.0)
+    native_time = reference_time = 0.0
+    for seed in range(args.symbols):
+        df = synthetic_frame(args.candles, seed)
+
+        start = time.perf_counter()
+        native = compute_indicators(df.copy(), args.timeframe)
+        native_time += time.perf_counter() - start
+
+        start = time.perf_counter()
+        ref = reference_columns(df, args.timeframe)
+        reference_time += time.perf_counter() - start
+
+        for col in columns:
+            if col not in ref:
+                continue
+            worst[col] = max(worst[col], relative_error(native[col], ref[col]))
+
+    print("Erro relativo máximo (nativo x pandas-ta):")
+    for col, err in worst.items():
+        status = "✅" if err < TOLERANCE else "❌"
+        print(f"   {status} {col}: {err:.2e}")
+    print(f"\n⏱️ compute_indicators {native_time * 1000:.1f} ms | pandas-ta (só RSI/UO/ADX) {reference_time * 1000:.1f} ms")
+    sys.exit(0 if all(err < TOLERANCE for err in worst.values()) else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+"""
+Debug do limitador de taxa (rate_limiter.py) com os pesos da Binance
+
+Simula as reservas de um scan da Binance (ticker 24h = 80 + 200 velas x 2) sem rede nem
+espera e confere: um scan - e o da Binance BTC logo em seguida, que divide o mesmo limitador -
+passa pelo burst sem esperar; scans repetidos respeitam o peso por minuto; o cabeçalho
+X-MBX-USED-WEIGHT-1M reduz o saldo quando a exchange já contou mais peso do que o limitador.
+Falha (código de saída 1) se alguma conferência falhar.
+
+Uso:
+    python debug_rate_limiter.py
+"""
+import sys
+
+import rate_limiter
+from rate_limiter import TokenBucket
+from vps_config import EXCHANGE_CONFIGS
+
+SYMBOLS = 200
+
+results = []
+
+
+def check(label, ok):
+    results.append(ok)
+    print(f"{'✅' if ok else '❌'} {label}")
+
+
+def scan_waits(bucket):
+    """Tempo de espera de cada reserva de um scan (ticker + velas de SYMBOLS símbolos)"""
+    return [bucket._reserve(80)] + [bucket._reserve(2) for _ in range(SYMBOLS)]
+
+
+def main():
+    config = EXCHANGE_CONFIGS['binance']
+    print(f"=== DEBUG RATE LIMITER - binance, {config['weight_per_minute']}/min, burst {config['burst']} ===\n")
+
+    bucket = TokenBucket(config['weight_per_minute'], config['burst'])
+    waits = scan_waits(bucket)
+    check(f"scan Binance: espera máxima {max(waits):.2f}s", max(waits) == 0.0)
+    waits = scan_waits(bucket)
+    check(f"scan Binance BTC em seguida (mesmo limitador): espera máxima {max(waits):.2f}s", max(waits) == 0.0)
+
+    # 20 scans seguidos: o que passar do burst espera a reposição de weight_per_minute
+    waits = [max(scan_waits(bucket)) for _ in range(18)]
+    expected = (20 * (80 + 2 * SYMBOLS) - config['burst']) / (config['weight_per_minute'] / 60)
+    check(f"20 scans seguidos: último espera {waits[-1]:.1f}s (esperado {expected:.1f}s)", abs(waits[-1] - expected) < 0.5)
+
+    # Cabeçalho de peso usado: outro processo no mesmo IP já gastou quase todo o minuto
+    bucket = TokenBucket(config['weight_per_minute'], config['burst'])
+    rate_limiter._limiters['binance'] = bucket
+    rate_limiter.sync_used_weight('binance', {'X-MBX-USED-WEIGHT-1M': str(config['weight_per_minute'] - 100)})
+    wait = bucket._reserve(80)
+    check(f"peso usado informado pela exchange: ticker cabe no saldo restante (espera {wait:.2f}s)", wait == 0.0)
+    wait = bucket._reserve(80)
+    check(f"peso usado informado pela exchange: além dele espera a reposição ({wait:.2f}s)", wait > 0)
+    rate_limiter.sync_used_weight('binance', {})
+    check("resposta sem o cabeçalho não altera o saldo", abs(bucket._reserve(0) - wait) < 0.01)
+    sys.exit(0 if all(results) else 1)
+
+
+if __name__ == "__main__":
+    main()
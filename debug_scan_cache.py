@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+"""
+Debug do cache de scans (scan_cache.py): resultados negativos e backoff
+
+Usa funções de scan falsas (sem rede) que levantam exceção ou voltam vazias e confere quantas
+vezes o scan roda: durante o backoff os pedidos (inclusive os simultâneos) não repetem o scan e
+recebem o último resultado bom, se houver; o agendador (scan_scheduler) também espera o backoff
+em vez de repetir o scan sem parar. Refresh e revalidate não repetem o scan de uma entrada
+ainda válida nem agendam revalidações duplicadas. Falha (código de saída 1) se alguma conferência falhar.
+
+Uso:
+    python debug_scan_cache.py
+"""
+import sys
+import threading
+import time
+
+import pandas as pd
+
+import scan_cache
+import scan_scheduler
+from vps_config import SCAN_CACHE_CONFIG, SCAN_SCHEDULER_CONFIG
+
+BACKOFF = 0.5  # segundos (reduzido para o teste)
+
+results = []
+
+
+def check(label, ok):
+    results.append(ok)
+    print(f"{'✅' if ok else '❌'} {label}")
+
+
+def fake_scan(exchange, outcome):
+    """Scan falso de `exchange`: outcome() devolve o resultado ou levanta exceção; conta as chamadas"""
+    calls = []
+
+    @scan_cache.cached_scan(exchange)
+    def scan(timeframe):
+        calls.append(time.time())
+        time.sleep(0.05)
+        return outcome()
+
+    return scan, calls
+
+
+def raise_error():
+    raise RuntimeError("HTTP 451")
+
+
+def check_failures():
+    scan, calls = fake_scan('Falha', raise_error)
+    try:
+        scan('5m')
+    except RuntimeError:
+        pass
+    for _ in range(20):
+        scan('5m')  # dentro do backoff: não levanta nem repete o scan
+    check(f"exceção: 1 scan em 21 pedidos durante o backoff (rodou {len(calls)})", len(calls) == 1)
+    time.sleep(BACKOFF + 0.05)
+    try:
+        scan('5m')
+    except RuntimeError:
+        pass
+    check(f"exceção: novo scan depois do backoff (rodou {len(calls)})", len(calls) == 2)
+    failures = scan_cache._failures[('Falha', '5m', (), ())].count
+    retry_in = scan_cache.backoff_until('Falha', '5m') - time.time()
+    check(f"backoff dobra a cada falha seguida ({failures} falhas, {retry_in:.2f}s)", failures == 2 and retry_in > BACKOFF)
+
+    scan, calls = fake_scan('Vazio', pd.DataFrame)
+    threads = [threading.Thread(target=scan, args=('1h',)) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    for _ in range(10):
+        served = scan('1h')
+    check(f"vazio: 1 scan para 8 pedidos simultâneos + 10 seguidos (rodou {len(calls)})", len(calls) == 1)
+    check("vazio: pedidos recebem o resultado vazio", isinstance(served, pd.DataFrame) and served.empty)
+
+
+def check_last_good():
+    state = {'fail': False}
+
+    def outcome():
+        if state['fail']:
+            return pd.DataFrame()
+        return pd.DataFrame({'symbol': ['BTCUSDT']})
+
+    scan, calls = fake_scan('Recupera', outcome)
+    good = scan('15m')
+    scan_cache.mark_stale('Recupera', '15m')
+    state['fail'] = True
+    scan('15m')
+    served = scan('15m')
+    check(f"durante o backoff serve o último resultado bom (rodou {len(calls)})", served is good and len(calls) == 2)
+    state['fail'] = False
+    time.sleep(BACKOFF + 0.05)
+    fresh = scan('15m')
+    check("depois do backoff, scan bom limpa o resultado negativo",
+          fresh is not good and scan_cache.backoff_until('Recupera', '15m') == 0.0)
+
+
+def check_revalidate():
+    scan, calls = fake_scan('Revalida', lambda: pd.DataFrame({'symbol': ['BTCUSDT']}))
+    scan('1d')
+    scan.refresh('1d')
+    check(f"refresh com entrada válida não repete o scan (rodou {len(calls)})", len(calls) == 1)
+    check("revalidate com entrada válida não agenda scan", scan.revalidate('1d') is False)
+
+    scan_cache.mark_stale('Revalida', '1d')
+    started = [scan.revalidate('1d') for _ in range(8)]
+    time.sleep(0.3)
+    check(f"8 revalidates seguidos: {sum(started)} agendado(s), {len(calls) - 1} scan(s)",
+          sum(started) == 1 and len(calls) == 2)
+    # Job do agendador que ficou na fila atrás de max_parallel: a entrada já foi renovada
+    scan.refresh('1d')
+    check(f"refresh depois da revalidação não repete o scan (rodou {len(calls)})", len(calls) == 2)
+
+
+def check_scheduler():
+    SCAN_SCHEDULER_CONFIG['poll_interval'] = 0.05
+    for exchange, outcome in (('Agendada falha', raise_error), ('Agendada vazia', pd.DataFrame)):
+        scan, calls = fake_scan(exchange, outcome)
+        scan_scheduler.watch({exchange: scan}, exchange, '4h')
+        time.sleep(2.2 * BACKOFF)
+        # Backoff 0,5s e depois 1s: 2 scans em 1,1s (sem backoff seriam ~20)
+        check(f"agendador ({exchange.split()[1]}): {len(calls)} scans em {2.2 * BACKOFF:.1f}s", len(calls) == 2)
+
+
+def main():
+    SCAN_CACHE_CONFIG['failure_backoff'] = BACKOFF
+    SCAN_CACHE_CONFIG['failure_backoff_max'] = 4 * BACKOFF
+    print("=== DEBUG SCAN CACHE - resultados negativos ===\n")
+    check_failures()
+    check_last_good()
+    check_revalidate()
+    check_scheduler()
+    sys.exit(0 if all(results) else 1)
+
+
+if __name__ == "__main__":
+    main()
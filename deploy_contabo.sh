@@ -240,7 +240,7 @@ if [[ -f "requirements.txt" ]]; then
     pip install -r requirements.txt
 else
     warn "requirements.txt não encontrado. Instalando dependências básicas..."
-    pip install streamlit pandas requests numpy ccxt python-binance pandas-ta
+    pip install streamlit pandas requests numpy ccxt python-binance
 fi
 
 # 12. Criar configuração de produção
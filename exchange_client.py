@@ -0,0 +1,301 @@
+# Camada HTTP compartilhada pelos fetchers REST das exchanges
+# Mantém uma única sessão por processo (e não por rerun do Streamlit), com pool de
+# conexões keep-alive por host, evitando um handshake TCP/TLS a cada requisição de velas.
+# Também concentra a política de retry (backoff exponencial com jitter) e o circuit
+# breaker por exchange, usados tanto pelas chamadas REST quanto pelas chamadas CCXT,
+# e o registro de instâncias CCXT de longa duração (mercados carregados uma única vez).
+
+import asyncio
+import random
+import threading
+import time
+
+import ccxt
+import requests
+from requests.adapters import HTTPAdapter
+
+import rate_limiter
+from vps_config import CCXT_CONFIG, EXCHANGE_CONFIGS, HTTP_POOL_CONFIG, RETRY_CONFIG
+
+DEFAULT_HEADERS = {
+    'Accept': 'application/json',
+    'Accept-Encoding': 'gzip, deflate',
+    'Connection': 'keep-alive',
+    'User-Agent': 'crypto-scanner/1.0',
+}
+
+_session = None
+_session_lock = threading.Lock()
+
+
+def _build_session() -> requests.Session:
+    """Cria a sessão HTTP com adaptadores de pool configurados via HTTP_POOL_CONFIG"""
+    session = requests.Session()
+    session.headers.update(DEFAULT_HEADERS)
+
+    # Um pool por host (pool_connections) com até pool_maxsize conexões reutilizáveis cada.
+    # pool_block faz as threads esperarem por uma conexão livre em vez de abrir conexões descartáveis.
+    adapter = HTTPAdapter(
+        pool_connections=HTTP_POOL_CONFIG['pool_connections'],
+        pool_maxsize=HTTP_POOL_CONFIG['pool_maxsize'],
+        pool_block=HTTP_POOL_CONFIG['pool_block'],
+    )
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    return session
+
+
+def get_session() -> requests.Session:
+    """Retorna a sessão HTTP compartilhada do processo, criando-a na primeira chamada"""
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                _session = _build_session()
+    return _session
+
+
+def reset_session() -> None:
+    """Fecha a sessão atual (e suas conexões). A próxima chamada cria uma nova."""
+    global _session
+    with _session_lock:
+        if _session is not None:
+            _session.close()
+        _session = None
+
+
+# ----------------- Circuit breaker -----------------
+class CircuitOpenError(Exception):
+    """Levantada quando o circuit breaker da exchange está aberto"""
+
+
+class CircuitBreaker:
+    """Circuit breaker simples: abre após `failure_threshold` falhas consecutivas e,
+    passados `reset_timeout` segundos, libera uma única requisição de teste (half-open)."""
+
+    def __init__(self, exchange: str, failure_threshold: int, reset_timeout: float):
+        self.exchange = exchange
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = 'closed'
+        self._failures = 0
+        self._opened_at = 0.0
+        self._probe_in_flight = False
+        self._lock = threading.Lock()
+
+    def before_request(self) -> None:
+        """Levanta CircuitOpenError se a requisição não deve ser feita agora"""
+        with self._lock:
+            if self.state == 'closed':
+                return
+            remaining = self.reset_timeout - (time.monotonic() - self._opened_at)
+            if self.state == 'open' and remaining <= 0:
+                self.state = 'half_open'
+            if self.state == 'half_open' and not self._probe_in_flight:
+                self._probe_in_flight = True
+                return
+        raise CircuitOpenError(
+            f"{self.exchange} temporariamente indisponível "
+            f"(circuit breaker aberto, nova tentativa em {max(remaining, 0):.0f}s)"
+        )
+
+    def record_success(self) -> None:
+        with self._lock:
+            self.state = 'closed'
+            self._failures = 0
+            self._probe_in_flight = False
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self._failures += 1
+            if self.state == 'half_open' or self._failures >= self.failure_threshold:
+                self.state = 'open'
+                self._opened_at = time.monotonic()
+            self._probe_in_flight = False
+
+
+_breakers: dict[str, CircuitBreaker] = {}
+_breakers_lock = threading.Lock()
+
+
+def get_circuit_breaker(exchange: str) -> CircuitBreaker:
+    """Retorna o circuit breaker compartilhado da exchange"""
+    with _breakers_lock:
+        breaker = _breakers.get(exchange)
+        if breaker is None:
+            breaker = CircuitBreaker(
+                exchange,
+                RETRY_CONFIG['failure_threshold'],
+                RETRY_CONFIG['reset_timeout'],
+            )
+            _breakers[exchange] = breaker
+        return breaker
+
+
+# ----------------- Retry -----------------
+RETRYABLE_STATUS = {418, 429, 500, 502, 503, 504}
+
+
+class RetryableHTTPError(requests.exceptions.HTTPError):
+    """Resposta HTTP com status transitório (429/418/5xx)"""
+
+
+def _retry_after(exc: Exception) -> float | None:
+    """Lê o cabeçalho Retry-After (em segundos) de respostas 429/418, se existir"""
+    response = getattr(exc, 'response', None)
+    if response is None:
+        return None
+    try:
+        return float(response.headers.get('Retry-After'))
+    except (TypeError, ValueError):
+        return None
+
+
+def _is_retryable(exc: Exception) -> bool:
+    """Erros de rede, timeouts e status transitórios merecem nova tentativa;
+    erros de requisição (ex.: símbolo inválido) não."""
+    if isinstance(exc, RetryableHTTPError):
+        return True
+    if isinstance(exc, (requests.exceptions.ConnectionError, requests.exceptions.Timeout)):
+        return True
+    return isinstance(exc, ccxt.NetworkError)
+
+
+def backoff_delay(attempt: int, retry_after: float | None = None) -> float:
+    """Backoff exponencial com jitter completo: uniforme em [0, base * 2^attempt], limitado a backoff_max"""
+    if retry_after is not None:
+        return retry_after
+    cap = min(RETRY_CONFIG['backoff_max'], RETRY_CONFIG['backoff_base'] * (2 ** attempt))
+    return random.uniform(0, cap)
+
+
+def _after_failure(breaker: CircuitBreaker, exc: Exception, attempt: int, attempts: int) -> float:
+    """Registra a falha no circuit breaker e retorna quanto esperar antes da próxima
+    tentativa; relança `exc` quando não há mais o que tentar."""
+    if not _is_retryable(exc):
+        # A exchange respondeu: o erro é da requisição, não da exchange
+        breaker.record_success()
+        raise exc
+    breaker.record_failure()
+    delay = backoff_delay(attempt, _retry_after(exc))
+    if attempt == attempts - 1 or delay > RETRY_CONFIG['backoff_max']:
+        raise exc
+    return delay
+
+
+def call_with_retry(exchange: str, func, *args, weight: float = 1, **kwargs):
+    """Executa `func(*args, **kwargs)` respeitando o rate limit, o circuit breaker e a
+    política de retry da exchange (retry_attempts = número total de tentativas)."""
+    attempts = max(1, EXCHANGE_CONFIGS.get(exchange, {}).get('retry_attempts', 1))
+    breaker = get_circuit_breaker(exchange)
+
+    for attempt in range(attempts):
+        breaker.before_request()
+        rate_limiter.acquire(exchange, weight)
+        try:
+            result = func(*args, **kwargs)
+        except Exception as exc:
+            time.sleep(_after_failure(breaker, exc, attempt, attempts))
+        else:
+            breaker.record_success()
+            return result
+
+
+async def call_with_retry_async(exchange: str, func, *args, weight: float = 1, **kwargs):
+    """Versão asyncio de call_with_retry() para corrotinas (ex.: ccxt.async_support)"""
+    attempts = max(1, EXCHANGE_CONFIGS.get(exchange, {}).get('retry_attempts', 1))
+    breaker = get_circuit_breaker(exchange)
+
+    for attempt in range(attempts):
+        breaker.before_request()
+        await rate_limiter.acquire_async(exchange, weight)
+        try:
+            result = await func(*args, **kwargs)
+        except Exception as exc:
+            await asyncio.sleep(_after_failure(breaker, exc, attempt, attempts))
+        else:
+            breaker.record_success()
+            return result
+
+
+def _get_checked(url: str, params, timeout) -> requests.Response:
+    response = get_session().get(url, params=params, timeout=timeout)
+    if response.status_code in RETRYABLE_STATUS:
+        raise RetryableHTTPError(f"{response.status_code} para {url}", response=response)
+    return response
+
+
+def http_get(exchange: str, url: str, params=None, timeout=None, weight: float = 1) -> requests.Response:
+    """GET através da sessão compartilhada, com rate limit, retry e circuit breaker.
+
+    `exchange` identifica a exchange de destino (chave de EXCHANGE_CONFIGS) e `weight`
+    quantos tokens do limitador de taxa dela a requisição consome. Sem `timeout`
+    explícito usa o timeout configurado para a exchange."""
+    if timeout is None:
+        timeout = EXCHANGE_CONFIGS.get(exchange, {}).get('timeout')
+    response = call_with_retry(exchange, _get_checked, url, params, timeout, weight=weight)
+    rate_limiter.sync_used_weight(exchange, response.headers)
+    return response
+
+
+# ----------------- Instâncias CCXT compartilhadas -----------------
+_ccxt_instances: dict[str, dict] = {}
+_ccxt_lock = threading.Lock()
+
+
+def _new_ccxt_exchange(exchange_id: str) -> ccxt.Exchange:
+    """Cria uma instância CCXT síncrona configurada e com os mercados carregados"""
+    exchange = getattr(ccxt, exchange_id)({
+        'enableRateLimit': True,
+        'sandbox': False,  # Usar API de produção
+        'timeout': EXCHANGE_CONFIGS.get(exchange_id, {}).get('timeout', 30) * 1000,  # CCXT usa milissegundos
+    })
+    call_with_retry(exchange_id, exchange.load_markets)
+    return exchange
+
+
+def _refresh_ccxt_exchange(exchange_id: str) -> None:
+    """Recarrega os mercados em uma instância nova e troca a entrada do registro.
+    Quem já pegou a instância antiga continua usando-a normalmente."""
+    entry = _ccxt_instances[exchange_id]
+    try:
+        fresh = _new_ccxt_exchange(exchange_id)
+        with _ccxt_lock:
+            entry['exchange'] = fresh
+            entry['loaded_at'] = time.time()
+    except Exception:
+        pass  # Mantém os mercados antigos; nova tentativa no próximo acesso
+    finally:
+        entry['refreshing'] = False
+
+
+def get_ccxt_exchange(exchange_id: str) -> ccxt.Exchange:
+    """Retorna a instância CCXT compartilhada da exchange (ex.: 'bitget').
+
+    A primeira chamada carrega os mercados de forma síncrona; depois disso, quando
+    os mercados passam de CCXT_CONFIG['markets_ttl'], a recarga acontece em uma thread
+    em segundo plano e a instância atual continua sendo servida."""
+    with _ccxt_lock:
+        entry = _ccxt_instances.get(exchange_id)
+        if entry is None:
+            entry = {'exchange': None, 'loaded_at': 0.0, 'refreshing': False, 'init_lock': threading.Lock()}
+            _ccxt_instances[exchange_id] = entry
+
+    if entry['exchange'] is None:
+        with entry['init_lock']:
+            if entry['exchange'] is None:
+                exchange = _new_ccxt_exchange(exchange_id)
+                with _ccxt_lock:
+                    entry['exchange'] = exchange
+                    entry['loaded_at'] = time.time()
+        return entry['exchange']
+
+    with _ccxt_lock:
+        stale = time.time() - entry['loaded_at'] >= CCXT_CONFIG['markets_ttl']
+        if stale and not entry['refreshing']:
+            entry['refreshing'] = True
+            threading.Thread(
+                target=_refresh_ccxt_exchange, args=(exchange_id,),
+                name=f"ccxt-markets-{exchange_id}", daemon=True,
+            ).start()
+        return entry['exchange']
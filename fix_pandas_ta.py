@@ -2,22 +2,30 @@
 """
 Script para corrigir o erro de importação do pandas_ta com NumPy
 Substitui 'from numpy import NaN as npNaN' por 'from numpy import nan as npNaN'
+O app não usa mais o pandas-ta (RSI, UO e ADX são nativos em indicator_kernels.py); este
+script só é necessário ao instalar a referência de requirements-dev.txt (pandas-ta-classic
+0.3.14b1, mesmo código do pandas-ta 0.3.14b0) para rodar debug_pandas_ta_parity.py
 """
 
+import glob
+import importlib.util
 import os
 import sys
 
+
+def find_squeeze_pro():
+    """squeeze_pro.py do pacote instalado (pandas_ta_classic ou pandas_ta), sem importá-lo"""
+    for package in ('pandas_ta_classic', 'pandas_ta'):
+        spec = importlib.util.find_spec(package)
+        if spec is not None and spec.submodule_search_locations:
+            return os.path.join(spec.submodule_search_locations[0], 'momentum', 'squeeze_pro.py')
+    # Sem o pacote no ambiente atual: .venv do projeto (layout do Windows)
+    return os.path.join(os.getcwd(), '.venv', 'Lib', 'site-packages', 'pandas_ta', 'momentum', 'squeeze_pro.py')
+
+
 def fix_pandas_ta_import():
     # Caminho para o arquivo problemático
-    venv_path = os.path.join(os.getcwd(), '.venv')
-    squeeze_pro_path = os.path.join(
-        venv_path, 
-        'Lib', 
-        'site-packages', 
-        'pandas_ta', 
-        'momentum', 
-        'squeeze_pro.py'
-    )
+    squeeze_pro_path = find_squeeze_pro()
     
     print(f"Procurando arquivo em: {squeeze_pro_path}")
     
@@ -41,6 +49,11 @@ def fix_pandas_ta_import():
             # Salvar o arquivo corrigido
             with open(squeeze_pro_path, 'w', encoding='utf-8') as file:
                 file.write(content)
+            # O .pyc compilado na instalação pode ter o mesmo tamanho e segundo de modificação do
+            # arquivo corrigido e continuar sendo usado: apagar o cache do módulo
+            cache_dir = os.path.join(os.path.dirname(squeeze_pro_path), '__pycache__')
+            for cached in glob.glob(os.path.join(cache_dir, 'squeeze_pro.*.pyc')):
+                os.remove(cached)
             
             print("✅ Correção aplicada com sucesso!")
             print(f"Substituído: '{old_import}'")
@@ -61,7 +74,7 @@ if __name__ == "__main__":
     
     if success:
         print("\n🎉 Correção concluída! Agora você pode executar:")
-        print("python -m streamlit run app.py")
+        print("python debug_pandas_ta_parity.py")
     else:
         print("\n❌ Falha na correção. Verifique os erros acima.")
     
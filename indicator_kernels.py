@@ -0,0 +1,370 @@
+# Kernels NumPy dos indicadores do scanner
+# Cada kernel recebe arrays float contíguos e escreve o resultado em arrays de saída
+# já alocados pelo chamador (`out`), sem criar Series/DataFrames. Todos operam sobre o
+# último eixo, então funcionam tanto para um símbolo (1-D, velas) quanto para um painel
+# (2-D, símbolos x velas).
+# Modo cauda: quando `out` é mais curto que a série (out.shape[-1] < velas), o kernel percorre
+# a série inteira (aquecimento das médias), mas só materializa as últimas out.shape[-1] velas.
+# Os resultados reproduzem os cálculos de indicators.compute_indicators (pandas e
+# pandas-ta): mesmas médias (EWM com adjust=True, rma de Wilder), mesmas velas de
+# aquecimento em NaN e mesmo tratamento de divisões por zero.
+# As partes sequenciais (médias exponenciais e OBV acumulado) usam os kernels compilados de
+# indicator_kernels_numba.py quando INDICATOR_CONFIG['backend'] == 'numba' e o Numba está
+# instalado; sem ele, tudo roda em NumPy.
+# Intermediários usados por mais de um indicador (diferença do fechamento, fechamento anterior,
+# high - low, HL2, HLC3, somas de volume) vêm de um grafo compartilhado (Intermediates): cada
+# um é calculado uma vez por símbolo/painel e reaproveitado pelos demais kernels.
+# Modo compacto (INDICATOR_CONFIG['compact']): o painel chega em float32 e as saídas seguem
+# o dtype da entrada, mas as acumulações sensíveis à precisão (médias exponenciais, somas
+# móveis, OBV acumulado e diferenças de médias como AO e KVO) rodam em float64.
+
+import sys
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+from vps_config import INDICATOR_CONFIG
+
+EPSILON = sys.float_info.epsilon
+
+# Tamanho máximo do bloco do filtro exponencial: w^-bloco fica abaixo deste limite,
+# o que mantém a soma acumulada de cada bloco longe de overflow e de perda de precisão
+_MAX_BLOCK_SCALE = 1e8
+
+
+_jit = None  # indicator_kernels_numba, quando o backend Numba está ativo
+
+
+def set_backend(name: str) -> str:
+    """Seleciona o backend das partes sequenciais ('numba' ou 'numpy') e retorna o que ficou
+    ativo: sem o Numba instalado, 'numba' cai automaticamente para 'numpy'."""
+    global _jit
+    _jit = None
+    if name == 'numba':
+        try:
+            import indicator_kernels_numba
+        except ImportError:
+            return 'numpy'
+        _jit = indicator_kernels_numba
+    return get_backend()
+
+
+def get_backend() -> str:
+    """Backend ativo ('numba' ou 'numpy')"""
+    return 'numpy' if _jit is None else 'numba'
+
+
+def _rows(x: np.ndarray) -> np.ndarray:
+    """Visão 2-D (linhas x velas) exigida pelos kernels compilados"""
+    return x.reshape(-1, x.shape[-1])
+
+
+def _run_jit(kernel, out: np.ndarray, *inputs) -> np.ndarray:
+    """Executa um kernel compilado sobre as visões 2-D e devolve `out` preenchido"""
+    target = _rows(out)
+    kernel(*(_rows(np.ascontiguousarray(x)) for x in inputs), target)
+    if not np.shares_memory(target, out):  # `out` não contíguo: reshape gerou cópia
+        out[...] = target.reshape(out.shape)
+    return out
+
+
+def empty_like(x: np.ndarray, tail: int | None = None) -> np.ndarray:
+    """Array de saída com formato e dtype de `x` (ou só as últimas `tail` velas)"""
+    return np.empty(x.shape if tail is None else (*x.shape[:-1], tail), dtype=x.dtype)
+
+
+def _float64(kernel, x: np.ndarray, *params, out: np.ndarray) -> np.ndarray:
+    """Roda a acumulação `kernel` em float64 (modo compacto) e grava o resultado em `out`"""
+    out[...] = kernel(x.astype(np.float64), *params, np.empty(out.shape))
+    return out
+
+
+# ----------------- Primitivas -----------------
+def shift(x: np.ndarray, out: np.ndarray, periods: int = 1) -> np.ndarray:
+    """Equivalente a Series.shift(periods) para periods > 0"""
+    out[..., :periods] = np.nan
+    out[..., periods:] = x[..., :-periods]
+    return out
+
+
+def diff(x: np.ndarray, out: np.ndarray) -> np.ndarray:
+    """Equivalente a Series.diff()"""
+    out[..., :1] = np.nan
+    np.subtract(x[..., 1:], x[..., :-1], out=out[..., 1:])
+    return out
+
+
+def rolling_sum(x: np.ndarray, window: int, out: np.ndarray) -> np.ndarray:
+    """Equivalente a Series.rolling(window).sum(): NaN nas primeiras window-1 velas
+    e em qualquer janela que contenha NaN"""
+    if x.dtype != np.float64 or out.dtype != np.float64:
+        return _float64(rolling_sum, x, window, out=out)
+    n = x.shape[-1]
+    start = n - out.shape[-1]
+    first = max(start, window - 1)  # primeira vela com janela completa
+    out[..., :first - start] = np.nan
+    if first < n:
+        windows = sliding_window_view(x[..., first - window + 1:], window, axis=-1)
+        np.sum(windows, axis=-1, out=out[..., first - start:])
+    return out
+
+
+def rolling_mean(x: np.ndarray, window: int, out: np.ndarray) -> np.ndarray:
+    """Equivalente a Series.rolling(window).mean()"""
+    rolling_sum(x, window, out)
+    out /= window
+    return out
+
+
+def _decay_filter(u: np.ndarray, w: float, out: np.ndarray) -> np.ndarray:
+    """y[t] = w * y[t-1] + u[t] (y[-1] = 0) ao longo do último eixo.
+
+    O estado antes da cauda sai de um único produto escalar com os pesos w^k; a cauda é
+    calculada em blocos com somas acumuladas reescaladas por w^-k, sem laço por vela."""
+    n = u.shape[-1]
+    start = n - out.shape[-1]
+    carry = u[..., :start] @ w ** np.arange(start - 1, -1, -1, dtype=np.float64)
+    block = n if w >= 1 else max(1, int(np.log(_MAX_BLOCK_SCALE) / -np.log(w)))
+    for begin in range(start, n, block):
+        stop = min(begin + block, n)
+        steps = np.arange(stop - begin)
+        acc = np.cumsum(u[..., begin:stop] * w ** -steps, axis=-1)
+        acc += np.expand_dims(w * carry, -1)
+        np.multiply(acc, w ** steps, out=out[..., begin - start:stop - start])
+        carry = out[..., stop - start - 1]
+    return out
+
+
+def ewm_mean(x: np.ndarray, alpha: float, min_periods: int, out: np.ndarray) -> np.ndarray:
+    """Equivalente a Series.ewm(alpha=alpha, min_periods=min_periods).mean() (adjust=True,
+    ignore_na=False): NaN não contribuem, mas os pesos continuam decaindo"""
+    if x.dtype != np.float64 or out.dtype != np.float64:
+        return _float64(ewm_mean, x, alpha, min_periods, out=out)
+    if _jit is not None:
+        return _run_jit(lambda x2d, target: _jit.ewm_mean(x2d, alpha, min_periods, target), out, x)
+
+    observed = ~np.isnan(x)
+    w = 1.0 - alpha
+    numerator = _decay_filter(np.where(observed, x, 0.0), w, empty_like(out))
+    weights = _decay_filter(observed.astype(np.float64), w, empty_like(out))
+    with np.errstate(invalid='ignore', divide='ignore'):
+        np.divide(numerator, weights, out=out)
+    counts = np.cumsum(observed, axis=-1)[..., x.shape[-1] - out.shape[-1]:]
+    out[counts < max(min_periods, 1)] = np.nan
+    return out
+
+
+def ema(x: np.ndarray, span: int, out: np.ndarray) -> np.ndarray:
+    """Equivalente a Series.ewm(span=span).mean()"""
+    return ewm_mean(x, 2.0 / (span + 1.0), 0, out)
+
+
+def rma(x: np.ndarray, length: int, out: np.ndarray) -> np.ndarray:
+    """Média de Wilder, como pandas_ta.rma: ewm(alpha=1/length, min_periods=length)"""
+    return ewm_mean(x, 1.0 / length, length, out)
+
+
+# ----------------- Intermediários compartilhados -----------------
+def _volume_sum(volume: np.ndarray, length: int, tail: int) -> np.ndarray:
+    return rolling_sum(volume, length, empty_like(volume, tail))
+
+
+# nome: (dependências, função); as dependências são entradas (high, low, close, volume) ou
+# outros intermediários, e os parâmetros extras de Intermediates.get seguem para a função
+INTERMEDIATES = {
+    'close_diff': (('close',), lambda close: diff(close, empty_like(close))),
+    'prev_close': (('close',), lambda close: shift(close, empty_like(close))),
+    'high_low': (('high', 'low'), np.subtract),
+    # HL2 e HLC3 ficam em float64 mesmo no modo compacto: o CMF usa close - HL2 (cancelamento)
+    # e o KVO compara o HLC3 de velas vizinhas
+    'hl2': (('high', 'low'), lambda high, low: np.add(high, low, dtype=np.float64) / 2.0),
+    'hlc3': (('high', 'low', 'close'), lambda high, low, close: (np.add(high, low, dtype=np.float64) + close) / 3.0),
+    'volume_sum': (('volume',), _volume_sum),
+}
+
+
+class Intermediates:
+    """Grafo de intermediários compartilhados entre os kernels de um símbolo ou painel.
+    Cada nó é calculado na primeira vez que um indicador o pede e reaproveitado pelos demais;
+    os arrays devolvidos são somente leitura (o kernel que precisa alterá-los faz uma cópia)."""
+
+    def __init__(self, **inputs: np.ndarray | None):
+        self._values = {name: x for name, x in inputs.items() if x is not None}
+        self._nbytes = {}  # intermediário calculado -> tamanho em bytes
+        self._reused = {}  # intermediário -> vezes em que foi servido do cache
+
+    def get(self, name: str, *params) -> np.ndarray:
+        """Valor do intermediário (ou da entrada) `name`, calculando-o e às dependências uma vez"""
+        key = f"{name}{params}" if params else name
+        if key in self._values:
+            if key in self._nbytes:
+                self._reused[key] = self._reused.get(key, 0) + 1
+            return self._values[key]
+        dependencies, func = INTERMEDIATES[name]
+        value = func(*(self.get(dep) for dep in dependencies), *params)
+        value.flags.writeable = False
+        self._values[key] = value
+        self._nbytes[key] = value.nbytes
+        return value
+
+    def report(self) -> dict[str, dict[str, int]]:
+        """{intermediário: {'reused': reaproveitamentos, 'saved_bytes': bytes não recalculados}}"""
+        return {
+            key: {'reused': self._reused.get(key, 0), 'saved_bytes': self._reused.get(key, 0) * nbytes}
+            for key, nbytes in self._nbytes.items()
+        }
+
+
+def _graph(shared: Intermediates | None, **inputs: np.ndarray) -> Intermediates:
+    """Grafo recebido pelo kernel ou, numa chamada isolada, um grafo local"""
+    return Intermediates(**inputs) if shared is None else shared
+
+
+# ----------------- Indicadores -----------------
+def rsi(close: np.ndarray, length: int, out: np.ndarray, shared: Intermediates | None = None) -> np.ndarray:
+    """RSI de Wilder (pandas_ta.rsi)"""
+    change = _graph(shared, close=close).get('close_diff')
+    positive = np.where(change < 0, 0.0, change)
+    negative = np.where(change > 0, 0.0, change)
+    positive_avg = rma(positive, length, empty_like(out))
+    negative_avg = rma(negative, length, empty_like(out))
+    with np.errstate(invalid='ignore', divide='ignore'):
+        np.divide(100.0 * positive_avg, positive_avg + np.abs(negative_avg), out=out)
+    return out
+
+
+def uo(high: np.ndarray, low: np.ndarray, close: np.ndarray, out: np.ndarray,
+       fast: int = 7, medium: int = 14, slow: int = 28,
+       fast_w: float = 4.0, medium_w: float = 2.0, slow_w: float = 1.0,
+       shared: Intermediates | None = None) -> np.ndarray:
+    """Ultimate Oscillator (pandas_ta.uo, coluna UO_7_14_28)"""
+    prev_close = _graph(shared, close=close).get('prev_close')
+    min_low_or_pc = np.fmin(low, prev_close)
+    buying_pressure = close - min_low_or_pc
+    true_range = np.fmax(high, prev_close) - min_low_or_pc
+
+    bp_sum = empty_like(out)
+    tr_sum = empty_like(out)
+    out[...] = 0.0
+    with np.errstate(invalid='ignore', divide='ignore'):
+        for length, weight in ((fast, fast_w), (medium, medium_w), (slow, slow_w)):
+            rolling_sum(buying_pressure, length, bp_sum)
+            rolling_sum(true_range, length, tr_sum)
+            out += weight * (bp_sum / tr_sum)
+    out *= 100.0 / (fast_w + medium_w + slow_w)
+    return out
+
+
+def ao(high: np.ndarray, low: np.ndarray, out: np.ndarray, fast: int = 5, slow: int = 34,
+       shared: Intermediates | None = None) -> np.ndarray:
+    """Awesome Oscillator: SMA(HL2, 5) - SMA(HL2, 34)"""
+    hl2 = _graph(shared, high=high, low=low).get('hl2')
+    # As duas médias ficam próximas: a diferença é feita em float64
+    fast_sma = rolling_mean(hl2, fast, np.empty(out.shape))
+    fast_sma -= rolling_mean(hl2, slow, np.empty(out.shape))
+    out[...] = fast_sma
+    return out
+
+
+def cmo(close: np.ndarray, length: int, out: np.ndarray, shared: Intermediates | None = None) -> np.ndarray:
+    """Chande Momentum Oscillator: 100 * (ganhos - perdas) / (ganhos + perdas) na janela"""
+    momentum = _graph(shared, close=close).get('close_diff')
+    gains = np.where(momentum >= 0, momentum, 0.0)  # a 1ª vela (NaN) vira 0, como no pandas
+    losses = np.where(momentum < 0, -momentum, 0.0)
+    padding = np.isnan(close)  # posições sem vela (painel) continuam NaN
+    gains[padding] = np.nan
+    losses[padding] = np.nan
+    sum_gains = rolling_sum(gains, length, empty_like(out))
+    sum_losses = rolling_sum(losses, length, empty_like(out))
+    with np.errstate(invalid='ignore', divide='ignore'):
+        np.divide(100.0 * (sum_gains - sum_losses), sum_gains + sum_losses, out=out)
+    return out
+
+
+def kvo(high: np.ndarray, low: np.ndarray, close: np.ndarray, volume: np.ndarray,
+        fast: int, slow: int, trigger: int, out: np.ndarray, out_trigger: np.ndarray,
+        shared: Intermediates | None = None) -> tuple[np.ndarray, np.ndarray]:
+    """Klinger Volume Oscillator: EMA(xTrend, fast) - EMA(xTrend, slow) e sua linha de sinal"""
+    hlc3 = _graph(shared, high=high, low=low, close=close).get('hlc3')
+    rising = np.zeros(hlc3.shape, dtype=bool)
+    np.greater(hlc3[..., 1:], hlc3[..., :-1], out=rising[..., 1:])
+    x_trend = np.where(rising, volume, -volume) * 100.0
+    # A linha de sinal precisa do KVO inteiro; só a cauda vai para `out`
+    line = ema(x_trend, fast, np.empty(x_trend.shape))
+    line -= ema(x_trend, slow, np.empty(x_trend.shape))
+    out[...] = line[..., line.shape[-1] - out.shape[-1]:]
+    ema(line, trigger, out_trigger)
+    return out, out_trigger
+
+
+def true_range(high: np.ndarray, low: np.ndarray, close: np.ndarray, out: np.ndarray,
+               shared: Intermediates | None = None) -> np.ndarray:
+    """True range como pandas_ta.true_range (high - low recebe +epsilon na série inteira se
+    alguma vela tiver range zero; a vela sem fechamento anterior fica NaN)"""
+    shared = _graph(shared, high=high, low=low, close=close)
+    high_low = shared.get('high_low')
+    high_low = high_low + EPSILON * (high_low == 0).any(axis=-1, keepdims=True)
+    prev_close = shared.get('prev_close')
+    np.fmax(np.abs(high_low), np.abs(high - prev_close), out=out)
+    np.fmax(out, np.abs(prev_close - low), out=out)
+    out[np.isnan(prev_close)] = np.nan
+    return out
+
+
+def adx(high: np.ndarray, low: np.ndarray, close: np.ndarray, length: int,
+        out: np.ndarray, out_dmp: np.ndarray, out_dmn: np.ndarray,
+        shared: Intermediates | None = None) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """ADX, DI+ e DI- (pandas_ta.adx com mamode rma): colunas ADX_n, DMP_n e DMN_n"""
+    atr = rma(true_range(high, low, close, empty_like(close), shared), length, empty_like(close))
+
+    up = diff(high, empty_like(high))
+    down = -diff(low, empty_like(low))
+    # A 1ª vela fica NaN (0 * NaN), como na versão pandas
+    pos = ((up > down) & (up > 0)) * up
+    neg = ((down > up) & (down > 0)) * down
+    pos[np.abs(pos) < EPSILON] = 0.0
+    neg[np.abs(neg) < EPSILON] = 0.0
+
+    with np.errstate(invalid='ignore', divide='ignore'):
+        k = 100.0 / atr
+        dmp = k * rma(pos, length, empty_like(pos))
+        dmn = k * rma(neg, length, empty_like(neg))
+        dx = 100.0 * np.abs(dmp - dmn) / (dmp + dmn)
+    start = dx.shape[-1] - out.shape[-1]
+    out_dmp[...] = dmp[..., start:]
+    out_dmn[...] = dmn[..., start:]
+    rma(dx, length, out)
+    return out, out_dmp, out_dmn
+
+
+def obv(close: np.ndarray, volume: np.ndarray, ma_period: int,
+        out: np.ndarray, out_ma: np.ndarray, shared: Intermediates | None = None) -> tuple[np.ndarray, np.ndarray]:
+    """On Balance Volume acumulado e sua EMA"""
+    if _jit is not None:
+        line = _run_jit(_jit.obv_line, np.empty(close.shape), close, volume)
+    else:
+        change = _graph(shared, close=close).get('close_diff')
+        direction = (change > 0).astype(np.float64) - (change < 0)  # NaN -> 0
+        signed_volume = np.nan_to_num(direction * volume, nan=0.0)
+        line = np.cumsum(signed_volume, axis=-1, dtype=np.float64)
+        line[np.isnan(close)] = np.nan  # posições sem vela (painel) não entram na EMA
+    out[...] = line[..., line.shape[-1] - out.shape[-1]:]
+    ema(line, ma_period, out_ma)
+    return out, out_ma
+
+
+def cmf(high: np.ndarray, low: np.ndarray, close: np.ndarray, volume: np.ndarray,
+        length: int, out: np.ndarray, shared: Intermediates | None = None) -> np.ndarray:
+    """Chaikin Money Flow: soma(AD, n) / soma(volume, n); velas com high == low ficam NaN"""
+    shared = _graph(shared, high=high, low=low, close=close, volume=volume)
+    high_low = shared.get('high_low')
+    hl_range = np.where(high_low == 0, np.nan, high_low)  # evitar divisão por zero
+    money_flow = (2.0 * (close - shared.get('hl2')) / hl_range) * volume  # 2*close - low - high
+    volume_sum = shared.get('volume_sum', length, out.shape[-1])
+    rolling_sum(money_flow, length, out)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        out /= volume_sum
+    return out
+
+
+set_backend(INDICATOR_CONFIG['backend'])
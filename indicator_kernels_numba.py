@@ -0,0 +1,60 @@
+# Versões compiladas (Numba) das partes sequenciais dos kernels de indicator_kernels.py
+# Só é importado quando INDICATOR_CONFIG['backend'] == 'numba' e o Numba está instalado
+# (pip install numba); caso contrário os kernels seguem no NumPy puro.
+# cache=True grava o código compilado em __pycache__, então só o primeiro start paga a compilação.
+# Todas as funções recebem arrays 2-D (símbolos x velas) e escrevem só as últimas out.shape[1] velas.
+
+import numpy as np
+from numba import njit
+
+
+@njit(cache=True, nogil=True)
+def ewm_mean(x, alpha, min_periods, out):
+    """Series.ewm(alpha=alpha, min_periods=min_periods).mean() (adjust=True, ignore_na=False),
+    na mesma sequência de operações do pandas (ewma em pandas/_libs/window/aggregations.pyx)"""
+    rows, n = x.shape
+    start = n - out.shape[1]
+    decay = 1.0 - alpha
+    minp = max(min_periods, 1)
+    for r in range(rows):
+        weighted = x[r, 0]
+        nobs = 0 if np.isnan(weighted) else 1
+        old_wt = 1.0
+        if start == 0:
+            out[r, 0] = weighted if nobs >= minp else np.nan
+        for t in range(1, n):
+            cur = x[r, t]
+            observed = not np.isnan(cur)
+            if observed:
+                nobs += 1
+            if not np.isnan(weighted):
+                old_wt *= decay
+                if observed:
+                    if weighted != cur:
+                        weighted = (old_wt * weighted + cur) / (old_wt + 1.0)
+                    old_wt += 1.0
+            elif observed:
+                weighted = cur
+            if t >= start:
+                out[r, t - start] = weighted if nobs >= minp else np.nan
+
+
+@njit(cache=True, nogil=True)
+def obv_line(close, volume, out):
+    """OBV acumulado (direção do fechamento x volume); posições sem vela (close NaN) ficam NaN"""
+    rows, n = close.shape
+    for r in range(rows):
+        total = 0.0
+        prev = np.nan
+        for t in range(n):
+            cur = close[r, t]
+            if cur > prev:
+                signed = volume[r, t]
+            elif cur < prev:
+                signed = -volume[r, t]
+            else:
+                signed = 0.0
+            if not np.isnan(signed):
+                total += signed
+            out[r, t] = np.nan if np.isnan(cur) else total
+            prev = cur
@@ -0,0 +1,405 @@
+# Motor único de indicadores técnicos do scanner
+# Todas as exchanges (USDT e BTC) passam por panel_snapshot(): as velas de todo o universo
+# são empilhadas num painel (símbolos x velas), os indicadores são calculados num único passe
+# vetorizado e só a última vela de cada símbolo segue para os filtros.
+# Os cálculos numéricos ficam nos kernels NumPy de indicator_kernels.py, inclusive RSI, UO e
+# ADX: o pandas-ta não é mais importado pelo app (só serve de referência em debug_pandas_ta_parity.py).
+
+import numpy as np
+import pandas as pd
+
+import indicator_kernels as kernels
+import scan_log
+from vps_config import INDICATOR_CONFIG
+
+
+# ----------------- Parâmetros por timeframe -----------------
+def get_cmo_period(timeframe):
+    """Retorna o período apropriado do CMO baseado no timeframe"""
+    timeframe_periods = {
+        '5m': 9,
+        '15m': 9,
+        '30m': 14,
+        '1h': 14,
+        '2h': 20,
+        '4h': 20,
+        '1d': 28
+    }
+    return timeframe_periods.get(timeframe, 14)  # padrão 14
+
+def get_cmo_levels(timeframe):
+    """Retorna os níveis de sobrecompra/sobrevenda do CMO baseado no timeframe"""
+    if timeframe in ['5m', '15m', '30m']:
+        return 50, -50  # +50, -50
+    else:
+        return 40, -40  # +40, -40
+
+def get_kvo_params(timeframe):
+    """Retorna os parâmetros do KVO baseados no timeframe (fast, slow, trigger)"""
+    timeframe_params = {
+        '5m': (14, 28, 9),
+        '15m': (21, 34, 9),
+        '30m': (26, 45, 10),
+        '1h': (30, 50, 13),
+        '2h': (34, 55, 13),
+        '4h': (34, 60, 14),
+        '1d': (40, 75, 20)
+    }
+    return timeframe_params.get(timeframe, (34, 55, 13))  # padrão clássico
+
+# ----------------- OBV -----------------
+def get_obv_ma_period(timeframe):
+    """Retorna o período da média móvel usada para suavizar o OBV de acordo com o timeframe"""
+    mapping = {
+        '5m': 7,
+        '15m': 10,
+        '30m': 14,
+        '1h': 20,
+        '2h': 30,
+        '4h': 40,
+        '1d': 50
+    }
+    return mapping.get(timeframe, 20)
+
+# ----------------- CMF -----------------
+def get_cmf_period(timeframe):
+    """Retorna o período do CMF baseado no timeframe"""
+    mapping = {
+        '5m': 10,
+        '15m': 14,
+        '30m': 14,
+        '1h': 21,
+        '2h': 25,
+        '4h': 32,
+        '1d': 34
+    }
+    return mapping.get(timeframe, 20)
+
+def get_cmf_thresholds(timeframe):
+    """Retorna (positivo, negativo) thresholds para CMF"""
+    if timeframe in ['5m', '15m', '30m']:
+        return 0.1, -0.1
+    elif timeframe in ['1h', '2h', '4h']:
+        return 0.2, -0.2
+    else:
+        return 0.25, -0.25
+
+# ----------------- RSI -----------------
+def get_rsi_period(timeframe):
+    """Retorna o período do RSI baseado no timeframe"""
+    mapping = {
+        '5m': 9,
+        '15m': 9,
+        '30m': 10,
+        '1h': 10,
+        '2h': 14,
+        '4h': 14,
+        '1d': 14
+    }
+    return mapping.get(timeframe, 14)
+
+def get_rsi_levels(timeframe):
+    """Retorna (sobrecompra, sobrevenda) níveis para RSI"""
+    if timeframe == '5m':
+        return 80, 20
+    else:
+        return 70, 30
+
+# ----------------- DMI -----------------
+def get_dmi_period(timeframe: str) -> int:
+    """Retorna o período do DMI (DI/ADX) baseado no timeframe"""
+    mapping = {
+        '5m': 10,
+        '15m': 10,
+        '30m': 14,
+        '1h': 14,
+        '2h': 20,
+        '4h': 20,
+        '1d': 25
+    }
+    return mapping.get(timeframe, 14)
+
+
+# ----------------- Motor de indicadores -----------------
+# Colunas que precisam estar preenchidas na última vela para o par entrar no scanner
+REQUIRED_COLUMNS = ['UO_7_14_28', 'AO', 'CMO', 'KVO', 'KVO_trigger', 'OBV', 'OBV_MA', 'CMF']
+
+# Valor da vela anterior usado pelos filtros de cruzamento: coluna_prev -> coluna
+PREV_COLUMNS = {
+    'UO_prev': 'UO_7_14_28',
+    'AO_prev': 'AO',
+    'CMO_prev': 'CMO',
+    'KVO_prev': 'KVO',
+    'KVO_trigger_prev': 'KVO_trigger',
+    'OBV_prev': 'OBV',
+    'OBV_MA_prev': 'OBV_MA',
+    'CMF_prev': 'CMF',
+}
+
+
+def compute_indicators(df: pd.DataFrame, timeframe: str) -> pd.DataFrame:
+    """Calcula todos os indicadores técnicos usados no scanner de forma padronizada.
+    Caso as colunas já existam, elas serão sobrescritas garantindo consistência entre exchanges."""
+    if df.empty:
+        return df
+
+    high, low, close, volume = (
+        np.ascontiguousarray(df[col], dtype=np.float64) for col in ("high", "low", "close", "volume")
+    )
+    shared = kernels.Intermediates(high=high, low=low, close=close, volume=volume)
+
+    # --- RSI ---
+    rsi_period = get_rsi_period(timeframe)
+    if len(df) >= rsi_period:
+        df[f"RSI_{rsi_period}"] = kernels.rsi(close, rsi_period, kernels.empty_like(close), shared)
+
+    # --- Ultimate Oscillator (UO) ---
+    df["UO_7_14_28"] = kernels.uo(high, low, close, kernels.empty_like(close), shared=shared)
+
+    # --- Awesome Oscillator (AO) ---
+    # AO = SMA(HL2, 5) - SMA(HL2, 34)
+    df["AO"] = kernels.ao(high, low, kernels.empty_like(close), shared=shared)
+    df["AO_diff"] = df["AO"].diff()  # type: ignore[attr-defined]
+    df["AO_prev"] = df["AO"].shift(1)  # type: ignore[attr-defined]
+
+    # --- Chande Momentum Oscillator (CMO) ---
+    df["CMO"] = kernels.cmo(close, get_cmo_period(timeframe), kernels.empty_like(close), shared)
+    df["CMO_prev"] = df["CMO"].shift(1)  # type: ignore[attr-defined]
+
+    # --- Klinger Volume Oscillator (KVO) ---
+    fast_p, slow_p, trg_p = get_kvo_params(timeframe)
+    kvo, kvo_trigger = kernels.kvo(
+        high, low, close, volume, fast_p, slow_p, trg_p, kernels.empty_like(close), kernels.empty_like(close), shared
+    )
+    df["KVO"] = kvo
+    df["KVO_trigger"] = kvo_trigger
+    df["KVO_prev"] = df["KVO"].shift(1)
+    df["KVO_trigger_prev"] = df["KVO_trigger"].shift(1)
+
+    # --- Directional Movement Index (DMI) ---
+    dmi_period = get_dmi_period(timeframe)
+    adx, dmp, dmn = kernels.adx(
+        high, low, close, dmi_period,
+        kernels.empty_like(close), kernels.empty_like(close), kernels.empty_like(close), shared,
+    )
+    df[f"ADX_{dmi_period}"] = adx
+    df[f"DMP_{dmi_period}"] = dmp
+    df[f"DMN_{dmi_period}"] = dmn
+    df["ADX"] = df[f"ADX_{dmi_period}"]
+    df["DI_plus"] = df[f"DMP_{dmi_period}"]
+    df["DI_minus"] = df[f"DMN_{dmi_period}"]
+    df["DI_plus_prev"] = df["DI_plus"].shift(1)
+    df["DI_minus_prev"] = df["DI_minus"].shift(1)
+    df["ADX_prev"] = df["ADX"].shift(1)
+
+    # --- On Balance Volume (OBV) ---
+    obv, obv_ma = kernels.obv(
+        close, volume, get_obv_ma_period(timeframe), kernels.empty_like(close), kernels.empty_like(close), shared
+    )
+    df["OBV"] = obv
+    df["OBV_MA"] = obv_ma
+    df["OBV_prev"] = df["OBV"].shift(1)
+    df["OBV_MA_prev"] = df["OBV_MA"].shift(1)
+
+    # --- Chaikin Money Flow (CMF) ---
+    df["CMF"] = kernels.cmf(
+        high, low, close, volume, get_cmf_period(timeframe), kernels.empty_like(close), shared
+    )
+    df["CMF_prev"] = df["CMF"].shift(1)
+
+    return df
+
+
+def indicator_snapshot(df: pd.DataFrame, timeframe: str) -> pd.DataFrame:
+    """Snapshot de um único símbolo: a última vela com indicadores (ver panel_snapshot).
+    Retorna um DataFrame vazio quando o par não tem dados suficientes."""
+    return panel_snapshot([df], timeframe)
+
+
+# ----------------- Painel (símbolos x velas) -----------------
+PANEL_COLUMNS = ('open', 'high', 'low', 'close', 'volume')
+
+# Colunas de identificação copiadas do DataFrame do símbolo para o registro (se existirem)
+RECORD_COLUMNS = ('symbol', 'exchange', 'pair_type', 'timestamp')
+
+# Velas materializadas por panel_snapshot: a última, a anterior (filtros de cruzamento)
+# e a 4ª última (variação % das últimas 3 velas)
+SNAPSHOT_TAIL = 4
+
+
+def panel_dtype() -> type:
+    """dtype do painel e dos indicadores: float32 no modo compacto (INDICATOR_CONFIG['compact'])"""
+    return np.float32 if INDICATOR_CONFIG.get('compact') else np.float64
+
+
+def build_panel(frames: list[pd.DataFrame], dtype: type = np.float64) -> tuple[dict[str, np.ndarray], np.ndarray]:
+    """Empilha as velas de cada DataFrame em arrays (símbolos x velas) alinhados pela última vela.
+    Históricos mais curtos são completados à esquerda com NaN, que os kernels tratam como
+    "sem vela": o resultado de cada linha é o mesmo do cálculo isolado do símbolo.
+    Só as colunas OHLCV são copiadas, cada uma num array contíguo do `dtype` pedido."""
+    lengths = np.array([len(df) for df in frames])
+    width = int(lengths.max(initial=0))
+    panel = {col: np.full((len(frames), width), np.nan, dtype=dtype) for col in PANEL_COLUMNS}
+    for i, df in enumerate(frames):
+        for col in PANEL_COLUMNS:
+            panel[col][i, width - lengths[i]:] = df[col].to_numpy(dtype=np.float64)
+    return panel, lengths
+
+
+def compute_panel(panel: dict[str, np.ndarray], timeframe: str, tail: int | None = 2,
+                  shared: kernels.Intermediates | None = None) -> dict[str, np.ndarray]:
+    """Calcula todos os indicadores do universo de uma vez sobre o painel (símbolos x velas).
+    Retorna {coluna: array símbolos x velas} com os mesmos nomes de compute_indicators, além
+    das colunas OHLCV. Só as últimas `tail` velas são materializadas (as médias aquecem sobre
+    o histórico inteiro); tail=None devolve as séries completas.
+    `shared` permite passar o grafo de intermediários (e depois ler shared.report())."""
+    high, low, close, volume = (panel[col] for col in PANEL_COLUMNS[1:])
+    if shared is None:
+        shared = kernels.Intermediates(high=high, low=low, close=close, volume=volume)
+    width = close.shape[-1]
+    tail = width if tail is None else min(tail, width)
+
+    def out():
+        return kernels.empty_like(close, tail)
+
+    rsi_period = get_rsi_period(timeframe)
+    dmi_period = get_dmi_period(timeframe)
+    fast_p, slow_p, trg_p = get_kvo_params(timeframe)
+    kvo, kvo_trigger = kernels.kvo(high, low, close, volume, fast_p, slow_p, trg_p, out(), out(), shared)
+    adx, dmp, dmn = kernels.adx(high, low, close, dmi_period, out(), out(), out(), shared)
+    obv, obv_ma = kernels.obv(close, volume, get_obv_ma_period(timeframe), out(), out(), shared)
+    values = {col: panel[col][..., width - tail:] for col in PANEL_COLUMNS}
+    values.update({
+        f'RSI_{rsi_period}': kernels.rsi(close, rsi_period, out(), shared),
+        'UO_7_14_28': kernels.uo(high, low, close, out(), shared=shared),
+        'AO': kernels.ao(high, low, out(), shared=shared),
+        'CMO': kernels.cmo(close, get_cmo_period(timeframe), out(), shared),
+        'KVO': kvo,
+        'KVO_trigger': kvo_trigger,
+        f'ADX_{dmi_period}': adx,
+        f'DMP_{dmi_period}': dmp,
+        f'DMN_{dmi_period}': dmn,
+        'OBV': obv,
+        'OBV_MA': obv_ma,
+        'CMF': kernels.cmf(high, low, close, volume, get_cmf_period(timeframe), out(), shared),
+    })
+    return values
+
+
+def _valid_candles(values: dict[str, np.ndarray], timeframe: str) -> np.ndarray:
+    """Velas com RSI e todas as colunas obrigatórias preenchidas (fora do aquecimento)"""
+    valid = np.ones(values['close'].shape, dtype=bool)
+    for col in (f"RSI_{get_rsi_period(timeframe)}", *REQUIRED_COLUMNS):
+        valid &= ~np.isnan(values[col])
+    return valid
+
+
+def _nth_last_valid(valid: np.ndarray, n: int) -> np.ndarray:
+    """Índice (por linha) da n-ésima última vela válida; 0 quando não existe"""
+    rank = np.cumsum(valid, axis=1)
+    target = rank[:, -1:] - (n - 1)
+    return np.argmax(valid & (rank == target), axis=1)
+
+
+def _records(values: dict[str, np.ndarray], timeframe: str) -> tuple[np.ndarray, np.ndarray, dict[str, np.ndarray]]:
+    """Registro compacto de cada símbolo: última vela válida, valores anteriores dos filtros
+    de cruzamento e variação % das últimas 3 velas, como o dropna + iloc[-1]/iloc[-2] por símbolo.
+    Retorna (símbolos com pelo menos duas velas válidas, distância da última vela válida até o
+    fim da série, {coluna: valor por símbolo})."""
+    valid = _valid_candles(values, timeframe)
+    counts = valid.sum(axis=1)
+    rows = np.arange(len(counts))
+    last = _nth_last_valid(valid, 1)
+    prev = _nth_last_valid(valid, 2)
+    fourth = _nth_last_valid(valid, 4)
+    before = np.maximum(last - 1, 0)  # vela imediatamente anterior (colunas calculadas com shift)
+
+    def at(col, index):
+        return values[col][rows, index]
+
+    rsi_col = f"RSI_{get_rsi_period(timeframe)}"
+    dmi_period = get_dmi_period(timeframe)
+    record = {col: at(col, last) for col in PANEL_COLUMNS}
+    record[rsi_col] = at(rsi_col, last)
+    record['UO_7_14_28'] = at('UO_7_14_28', last)
+    record['AO'] = at('AO', last)
+    record['AO_diff'] = at('AO', last) - at('AO', before)
+    record['AO_prev'] = at('AO', prev)
+    record['CMO'] = at('CMO', last)
+    record['CMO_prev'] = at('CMO', prev)
+    record['KVO'] = at('KVO', last)
+    record['KVO_trigger'] = at('KVO_trigger', last)
+    record['KVO_prev'] = at('KVO', prev)
+    record['KVO_trigger_prev'] = at('KVO_trigger', prev)
+    for col in (f"ADX_{dmi_period}", f"DMP_{dmi_period}", f"DMN_{dmi_period}"):
+        record[col] = at(col, last)
+    record['ADX'] = record[f"ADX_{dmi_period}"]
+    record['DI_plus'] = record[f"DMP_{dmi_period}"]
+    record['DI_minus'] = record[f"DMN_{dmi_period}"]
+    record['DI_plus_prev'] = at(f"DMP_{dmi_period}", before)
+    record['DI_minus_prev'] = at(f"DMN_{dmi_period}", before)
+    record['ADX_prev'] = at(f"ADX_{dmi_period}", before)
+    record['OBV'] = at('OBV', last)
+    record['OBV_MA'] = at('OBV_MA', last)
+    record['OBV_prev'] = at('OBV', prev)
+    record['OBV_MA_prev'] = at('OBV_MA', prev)
+    record['CMF'] = at('CMF', last)
+    record['CMF_prev'] = at('CMF', prev)
+    record['UO_prev'] = at('UO_7_14_28', prev)
+
+    # --- Variação percentual últimas 3 velas ---
+    close_last = at('close', last)
+    close_fourth = at('close', fourth).astype(np.float64)  # variação pequena: calcular em float64
+    record['pct_change'] = np.where(
+        counts >= 4, (close_last - close_fourth) / close_fourth * 100, 0.0
+    ).astype(close_last.dtype)
+    record['price'] = close_last
+    return counts >= 2, valid.shape[1] - 1 - last, record
+
+
+def panel_snapshot(frames: list[pd.DataFrame], timeframe: str) -> pd.DataFrame:
+    """Calcula os indicadores de todos os símbolos num único passe vetorizado e devolve um
+    registro compacto por símbolo (identificação, OHLCV da última vela, indicadores com os
+    valores anteriores para os filtros de cruzamento, variação % das últimas 3 velas e preço).
+    Só as últimas SNAPSHOT_TAIL velas de cada indicador são materializadas; símbolos em que
+    alguma delas ainda é inválida são recalculados com a série inteira.
+    Símbolos sem dados suficientes ficam de fora; a ordem de `frames` é mantida.
+    No modo compacto (INDICATOR_CONFIG['compact']) painel e registro ficam em float32."""
+    rsi_period = get_rsi_period(timeframe)
+    frames = [df for df in frames if len(df) >= rsi_period]
+    if not frames:
+        return pd.DataFrame()
+
+    try:
+        panel, lengths = build_panel(frames, panel_dtype())
+        values = compute_panel(panel, timeframe, tail=SNAPSHOT_TAIL)
+        keep, offset, record = _records(values, timeframe)
+
+        # Cauda com vela inválida (histórico curto ou indicador NaN): recalcular a série inteira
+        # para achar as últimas velas válidas, como o dropna por símbolo
+        redo = np.flatnonzero(~_valid_candles(values, timeframe).all(axis=1))
+        if redo.size:
+            sub_panel = {col: panel[col][redo] for col in PANEL_COLUMNS}
+            sub_keep, sub_offset, sub_record = _records(compute_panel(sub_panel, timeframe, tail=None), timeframe)
+            keep[redo], offset[redo] = sub_keep, sub_offset
+            for col, arr in sub_record.items():
+                record[col][redo] = arr
+    except Exception as e:
+        # Erro de dados (coluna não numérica) ou dos kernels: sem registro, a exchange apareceria
+        # apenas como "nenhum símbolo"
+        scan_log.error(f"Erro ao calcular indicadores ({timeframe}, {len(frames)} símbolos): {type(e).__name__}: {e}")
+        return pd.DataFrame()
+
+    kept = np.flatnonzero(keep)
+    if kept.size == 0:
+        return pd.DataFrame()
+
+    result = pd.DataFrame({
+        col: [frames[i][col].iat[lengths[i] - 1 - offset[i]] for i in kept]
+        for col in RECORD_COLUMNS if col in frames[0].columns
+    })
+    for col, arr in record.items():
+        result[col] = arr[kept]
+    # Timestamp de processamento para debug
+    result['processed_at'] = pd.Timestamp.now()
+    return result
@@ -0,0 +1,112 @@
+# Limitador de taxa (token bucket) por exchange, compartilhado por todo o processo
+# As taxas vêm de vps_config.EXCHANGE_CONFIGS['<exchange>']['weight_per_minute']: peso por minuto,
+# não requisições - cada requisição consome o seu peso (ex.: na Binance, 2 por klines e 80 pelo
+# ticker 24h completo; 1 por padrão). 'burst' é o saldo máximo acumulado: um scan inteiro
+# (ticker + velas de todos os símbolos) cabe nele sem esperar pela reposição.
+# Exchanges que informam o peso já usado no minuto (Binance: X-MBX-USED-WEIGHT-1M, configurado
+# em 'used_weight_header') têm o saldo ajustado a cada resposta, incluindo o peso gasto por
+# outros processos no mesmo IP.
+
+import asyncio
+import threading
+import time
+
+from vps_config import EXCHANGE_CONFIGS
+
+
+class TokenBucket:
+    """Token bucket seguro para threads e para asyncio.
+
+    Cada aquisição reserva os tokens imediatamente (o saldo pode ficar negativo) e
+    devolve quanto tempo o chamador deve esperar. O lock só protege a aritmética,
+    nunca é mantido durante a espera, então pode ser usado dentro do event loop."""
+
+    def __init__(self, weight_per_minute: float, capacity: float | None = None):
+        self.weight_per_minute = weight_per_minute
+        self.rate = weight_per_minute / 60.0  # tokens (peso) por segundo
+        # Sem 'burst' configurado: 10 segundos de reposição
+        self.capacity = capacity if capacity else max(1.0, 10 * self.rate)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self) -> None:
+        """Repõe os tokens do tempo decorrido (chamar com o lock)"""
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def _reserve(self, cost: float) -> float:
+        """Reserva `cost` tokens e retorna o tempo de espera em segundos"""
+        with self._lock:
+            self._refill()
+            self._tokens -= cost
+            if self._tokens >= 0:
+                return 0.0
+            return -self._tokens / self.rate
+
+    def acquire(self, cost: float = 1) -> None:
+        """Bloqueia a thread atual até haver tokens disponíveis"""
+        wait = self._reserve(cost)
+        if wait > 0:
+            time.sleep(wait)
+
+    async def acquire_async(self, cost: float = 1) -> None:
+        """Versão assíncrona de acquire(): cede o event loop durante a espera"""
+        wait = self._reserve(cost)
+        if wait > 0:
+            await asyncio.sleep(wait)
+
+    def sync_used(self, used: float) -> None:
+        """Limita o saldo ao que a exchange ainda aceita no minuto corrente (`used` = peso já
+        usado segundo a resposta). Reservas ainda não contadas pela exchange ficam descontadas
+        duas vezes, o que só deixa o limitador mais conservador."""
+        with self._lock:
+            self._refill()
+            self._tokens = min(self._tokens, self.weight_per_minute - used)
+
+
+_limiters: dict[str, TokenBucket] = {}
+_limiters_lock = threading.Lock()
+
+
+def get_rate_limiter(exchange: str) -> TokenBucket | None:
+    """Retorna o limitador compartilhado da exchange (None se ela não tiver weight_per_minute configurado)"""
+    limiter = _limiters.get(exchange)
+    if limiter is None:
+        config = EXCHANGE_CONFIGS.get(exchange, {})
+        if not config.get('weight_per_minute'):
+            return None
+        with _limiters_lock:
+            limiter = _limiters.get(exchange)
+            if limiter is None:
+                limiter = TokenBucket(config['weight_per_minute'], config.get('burst'))
+                _limiters[exchange] = limiter
+    return limiter
+
+
+def acquire(exchange: str, cost: float = 1) -> None:
+    """Consome `cost` tokens (o peso da requisição) da exchange antes de uma requisição (bloqueante)"""
+    limiter = get_rate_limiter(exchange)
+    if limiter is not None:
+        limiter.acquire(cost)
+
+
+async def acquire_async(exchange: str, cost: float = 1) -> None:
+    """Consome `cost` tokens da exchange antes de uma requisição (asyncio)"""
+    limiter = get_rate_limiter(exchange)
+    if limiter is not None:
+        await limiter.acquire_async(cost)
+
+
+def sync_used_weight(exchange: str, headers) -> None:
+    """Ajusta o limitador da exchange pelo cabeçalho de peso usado da resposta, se configurado"""
+    header = EXCHANGE_CONFIGS.get(exchange, {}).get('used_weight_header')
+    limiter = get_rate_limiter(exchange)
+    if not header or limiter is None:
+        return
+    try:
+        used = float(headers.get(header))
+    except (TypeError, ValueError):
+        return
+    limiter.sync_used(used)
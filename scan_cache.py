@@ -0,0 +1,270 @@
+# Cache dos resultados de scan por (exchange, timeframe)
+# Substitui o @st.cache_data das funções de busca das exchanges: o st.cache_data só pode ser
+# limpo por inteiro (st.cache_data.clear()), o que derrubava os resultados de todas as
+# exchanges e timeframes - e os caches de pares válidos - para todos os usuários a cada
+# atualização. Aqui cada entrada é chaveada por (exchange, timeframe, demais argumentos) e
+# pode ser descartada (invalidate) ou só marcada como velha (mark_stale) individualmente.
+# O cache é do processo e compartilhado entre as sessões do Streamlit: todas as abas abertas
+# na mesma exchange/timeframe leem o mesmo snapshot (um DataFrame que ninguém altera; os
+# filtros do app trabalham sobre df.copy()). Pedidos simultâneos para uma chave sem resultado
+# válido esperam um único scan em andamento (single-flight) em vez de repetir o scan.
+# A validade de cada resultado segue o fechamento das velas do timeframe (ver expires_at): um
+# scan de 1d vale até o próximo fechamento diário (ou até o próximo 'forming_refresh'), um de
+# 5m só até o próximo fechamento de 5m, em vez de um ttl fixo para todos os timeframes.
+# Scans que falham ou voltam vazios ficam guardados como resultado negativo (_Failure): até o fim
+# do backoff (exponencial, ver SCAN_CACHE_CONFIG['failure_backoff']) os pedidos recebem o último
+# resultado bom (ou o vazio) sem repetir o scan, e o agendador não agenda a chave.
+
+import functools
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from candle_store import TIMEFRAME_MS
+from scan_log import logger
+from vps_config import SCAN_CACHE_CONFIG, SCAN_SCHEDULER_CONFIG
+
+
+class ScanEntry:
+    """Resultado de um scan e o momento em que foi calculado"""
+
+    __slots__ = ('data', 'fetched_at', 'expires_at', 'stale')
+
+    def __init__(self, data, fetched_at: float, expires_at: float):
+        self.data = data
+        self.fetched_at = fetched_at
+        self.expires_at = expires_at
+        self.stale = False
+
+    def age(self) -> float:
+        return time.time() - self.fetched_at
+
+    def remaining(self) -> float:
+        """Segundos até vencer (negativo depois de vencido)"""
+        return self.expires_at - time.time()
+
+    def expired(self) -> bool:
+        return self.stale or time.time() >= self.expires_at
+
+
+class _Flight:
+    """Scan em andamento de uma chave; os demais pedidos esperam `done`"""
+
+    __slots__ = ('done', 'returned', 'data')
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.returned = False  # False: o scan levantou exceção (ou foi interrompido)
+        self.data = None
+
+
+class _Failure:
+    """Resultado negativo de uma chave: scans seguidos que falharam ou voltaram vazios"""
+
+    __slots__ = ('count', 'retry_at', 'data')
+
+    def __init__(self, count: int, retry_at: float, data):
+        self.count = count
+        self.retry_at = retry_at
+        self.data = data  # resultado vazio devolvido pelo scan (None se levantou exceção)
+
+
+_entries: dict[tuple, ScanEntry] = {}
+_inflight: dict[tuple, _Flight] = {}
+_failures: dict[tuple, _Failure] = {}
+_revalidating: set[tuple] = set()  # chaves com revalidação na fila ou rodando
+_entries_lock = threading.Lock()
+
+_revalidate_executor = None
+_revalidate_executor_lock = threading.Lock()
+
+
+def _revalidate_pool() -> ThreadPoolExecutor:
+    """Executor das revalidações, com o mesmo limite de scans simultâneos do agendador"""
+    global _revalidate_executor
+    if _revalidate_executor is None:
+        with _revalidate_executor_lock:
+            if _revalidate_executor is None:
+                _revalidate_executor = ThreadPoolExecutor(
+                    max_workers=SCAN_SCHEDULER_CONFIG['max_parallel'], thread_name_prefix='scan-revalidate'
+                )
+    return _revalidate_executor
+
+
+def _matching(exchange: str, timeframe: str | None) -> list[tuple]:
+    """Chaves da exchange (e do timeframe, se informado); chamar com _entries_lock"""
+    return [key for key in _entries if key[0] == exchange and (timeframe is None or key[1] == timeframe)]
+
+
+def expires_at(timeframe: str, fetched_at: float) -> float:
+    """Validade de um scan do timeframe: o próximo fechamento de vela (UTC) mais 'close_grace',
+    para a exchange já devolver a vela fechada. Com 'forming_refresh' para o timeframe, o scan
+    vence antes disso, a cada intervalo, só para atualizar a vela em formação (a busca
+    incremental do candle_store pede apenas as últimas velas de cada símbolo)."""
+    step = TIMEFRAME_MS.get(timeframe)
+    if step is None:
+        return fetched_at + SCAN_CACHE_CONFIG['default_ttl']
+    step /= 1000
+    grace = SCAN_CACHE_CONFIG['close_grace']
+    # Um scan feito dentro da carência de um fechamento pode não ter a vela fechada: vence no fim dela
+    next_close = ((fetched_at - grace) // step + 1) * step + grace
+    forming = SCAN_CACHE_CONFIG['forming_refresh'].get(timeframe)
+    return min(next_close, fetched_at + forming) if forming else next_close
+
+
+def put_entry(key: tuple, data) -> ScanEntry:
+    now = time.time()
+    entry = ScanEntry(data, now, expires_at(key[1], now))
+    with _entries_lock:
+        _entries[key] = entry
+    return entry
+
+
+def _record_failure(key: tuple, data) -> None:
+    """Guarda o resultado negativo da chave, dobrando o backoff a cada falha seguida; chamar com _entries_lock"""
+    failure = _failures.get(key)
+    count = failure.count + 1 if failure is not None else 1
+    delay = min(SCAN_CACHE_CONFIG['failure_backoff'] * 2 ** (count - 1), SCAN_CACHE_CONFIG['failure_backoff_max'])
+    _failures[key] = _Failure(count, time.time() + delay, data)
+
+
+def backoff_until(exchange: str, timeframe: str) -> float:
+    """Momento até o qual a exchange/timeframe não deve ser escaneada (0 sem falhas recentes)"""
+    with _entries_lock:
+        return max(
+            (failure.retry_at for key, failure in _failures.items() if key[0] == exchange and key[1] == timeframe),
+            default=0.0,
+        )
+
+
+def latest(exchange: str, timeframe: str) -> ScanEntry | None:
+    """Entrada mais recente da exchange/timeframe (mesmo velha), ou None"""
+    with _entries_lock:
+        entries = [_entries[key] for key in _matching(exchange, timeframe)]
+    return max(entries, key=lambda entry: entry.fetched_at, default=None)
+
+
+def invalidate(exchange: str, timeframe: str | None = None) -> int:
+    """Descarta os resultados da exchange (só do timeframe, se informado); retorna quantos"""
+    with _entries_lock:
+        keys = _matching(exchange, timeframe)
+        for key in keys:
+            del _entries[key]
+        for key in [key for key in _failures if key[0] == exchange and (timeframe is None or key[1] == timeframe)]:
+            del _failures[key]
+    return len(keys)
+
+
+def mark_stale(exchange: str, timeframe: str | None = None) -> int:
+    """Marca os resultados como velhos: a próxima chamada refaz o scan, mas a entrada continua
+    guardada até ser substituída. Retorna quantas entradas foram marcadas."""
+    with _entries_lock:
+        keys = _matching(exchange, timeframe)
+        for key in keys:
+            _entries[key].stale = True
+    return len(keys)
+
+
+def _single_flight(key: tuple, compute, is_fresh):
+    """Resultado guardado da chave, se is_fresh(entrada); senão roda compute() uma única vez
+    entre os pedidos simultâneos (os demais esperam e recebem o mesmo objeto).
+    Resultados vazios (erro ou exchange sem dados) e exceções viram resultado negativo: até o
+    fim do backoff a chave devolve o último resultado bom (ou o vazio) sem refazer o scan."""
+    while True:
+        with _entries_lock:
+            entry = _entries.get(key)
+            if entry is not None and is_fresh(entry):
+                return entry.data
+            failure = _failures.get(key)
+            if failure is not None and time.time() < failure.retry_at:
+                return entry.data if entry is not None else failure.data
+            flight = _inflight.get(key)
+            leader = flight is None
+            if leader:
+                flight = _inflight[key] = _Flight()
+        if leader:
+            break
+        flight.done.wait()
+        if flight.returned:
+            return flight.data
+        # O scan do outro pedido levantou exceção (já registrada como falha, devolvida acima)
+        # ou foi interrompido (ex.: rerun da sessão dele): tentar de novo
+
+    failed = False
+    try:
+        data = compute()
+        flight.data, flight.returned = data, True
+        return data
+    except Exception:
+        failed = True
+        raise
+    finally:
+        with _entries_lock:
+            if flight.returned and flight.data is not None and not getattr(flight.data, 'empty', False):
+                now = time.time()
+                _entries[key] = ScanEntry(flight.data, now, expires_at(key[1], now))
+                _failures.pop(key, None)
+            elif flight.returned or failed:
+                _record_failure(key, flight.data)
+            # Interrompido (rerun/stop do Streamlit, fora de Exception): não conta como falha
+            del _inflight[key]
+        flight.done.set()
+
+
+def cached_scan(exchange: str):
+    """Decorator das funções de busca `func(timeframe, *args)`: devolve o resultado guardado
+    enquanto não vencer (expires_at) nem estiver marcado como velho; senão refaz o scan
+    (single-flight). `func.refresh(timeframe, *args)` é o mesmo pedido para o agendador em
+    segundo plano (scan_scheduler); `func.revalidate(...)` o faz em segundo plano, para a página
+    continuar exibindo o resultado antigo enquanto isso (quando não há agendador)."""
+    def decorator(func):
+        def key_of(timeframe, args, kwargs):
+            return (exchange, timeframe, args, tuple(sorted(kwargs.items())))
+
+        @functools.wraps(func)
+        def wrapper(timeframe, *args, **kwargs):
+            return _single_flight(
+                key_of(timeframe, args, kwargs),
+                lambda: func(timeframe, *args, **kwargs),
+                lambda entry: not entry.expired(),
+            )
+
+        def refresh(timeframe, *args, **kwargs):
+            """Refaz o scan se a entrada tiver vencido. Quem esperou na fila (agendador,
+            revalidação) e encontra a entrada já renovada por outro scan recebe essa entrada."""
+            return _single_flight(
+                key_of(timeframe, args, kwargs),
+                lambda: func(timeframe, *args, **kwargs),
+                lambda entry: not entry.expired(),
+            )
+
+        def revalidate(timeframe, *args, **kwargs):
+            """Refaz o scan em segundo plano, sem esperar (stale-while-revalidate), no executor
+            limitado a SCAN_SCHEDULER_CONFIG['max_parallel'] scans. Não faz nada se a entrada já
+            estiver válida ou se já houver scan ou revalidação da chave. Retorna True se agendou."""
+            key = key_of(timeframe, args, kwargs)
+            with _entries_lock:
+                entry = _entries.get(key)
+                if (entry is not None and not entry.expired()) or key in _inflight or key in _revalidating:
+                    return False
+                _revalidating.add(key)
+
+            def run():
+                try:
+                    refresh(timeframe, *args, **kwargs)
+                except Exception:
+                    # A entrada anterior continua valendo; o próximo pedido tenta depois do backoff
+                    logger.exception("Revalidação de %s (%s) falhou", exchange, timeframe)
+                finally:
+                    with _entries_lock:
+                        _revalidating.discard(key)
+
+            _revalidate_pool().submit(run)
+            return True
+
+        wrapper.refresh = refresh
+        wrapper.revalidate = revalidate
+        wrapper.invalidate = functools.partial(invalidate, exchange)
+        wrapper.mark_stale = functools.partial(mark_stale, exchange)
+        return wrapper
+    return decorator
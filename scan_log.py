@@ -0,0 +1,31 @@
+# Avisos e erros das funções de busca das exchanges
+# As funções de busca rodam na sessão de uma página ou em segundo plano (scan_scheduler e
+# revalidate do scan_cache), onde não há página para exibir nada: lá st.warning/st.error só
+# encheriam o log com avisos de "missing ScriptRunContext". Estas funções mostram a mensagem na
+# página quando o scan roda numa sessão e, fora dela, mandam a mensagem para o logging.
+
+import logging
+
+import streamlit as st
+from streamlit.runtime.scriptrunner import get_script_run_ctx
+
+logger = logging.getLogger('scanner')
+
+
+def _emit(show, level: int, message: str) -> None:
+    if get_script_run_ctx(suppress_warning=True) is not None:
+        show(message)
+    else:
+        logger.log(level, message)
+
+
+def warning(message: str) -> None:
+    _emit(st.warning, logging.WARNING, message)
+
+
+def error(message: str) -> None:
+    _emit(st.error, logging.ERROR, message)
+
+
+def success(message: str) -> None:
+    _emit(st.success, logging.INFO, message)
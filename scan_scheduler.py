@@ -0,0 +1,105 @@
+# Agendador dos scans em segundo plano
+# Uma thread por processo (iniciada pela primeira página aberta) mantém atualizadas as
+# combinações (exchange, timeframe) que alguma sessão está exibindo: cada uma é refeita quando
+# o seu snapshot vence (fechamento de vela do timeframe, ver scan_cache.expires_at) e o
+# resultado é publicado em scan_cache, onde a entrada nova substitui a anterior de uma vez. As
+# páginas só leem o último snapshot publicado, então o tempo de renderização não depende da
+# latência das exchanges.
+# Combinações que nenhuma sessão pede há mais de 'idle_after' segundos deixam de ser atualizadas.
+# Um scan que falha ou volta vazio só é refeito depois do backoff do scan_cache
+# (SCAN_CACHE_CONFIG['failure_backoff']), e os erros dos scans vão para o logging (scan_log).
+
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import scan_cache
+from scan_log import logger
+from vps_config import SCAN_SCHEDULER_CONFIG
+
+
+class ScanScheduler:
+    """Refaz os scans ativos quando vencem, com no máximo 'max_parallel' scans simultâneos"""
+
+    def __init__(self):
+        self._functions = {}  # exchange -> função de busca (decorada com scan_cache.cached_scan)
+        self._active = {}     # (exchange, timeframe) -> último pedido de uma sessão
+        self._running = set()  # combinações com scan em andamento
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._thread = None
+        self._executor = None
+
+    def start(self) -> None:
+        with self._lock:
+            if self._thread is not None:
+                return
+            self._executor = ThreadPoolExecutor(
+                max_workers=SCAN_SCHEDULER_CONFIG['max_parallel'], thread_name_prefix='scan-scheduler'
+            )
+            self._thread = threading.Thread(target=self._loop, name='scan-scheduler', daemon=True)
+            self._thread.start()
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def watch(self, functions: dict, exchange: str, timeframe: str) -> None:
+        """Registra as funções de busca (recriadas a cada rerun do app) e marca a combinação
+        como ativa; a thread acorda para agendar o primeiro scan, se necessário"""
+        with self._lock:
+            self._functions.update(functions)
+            self._active[(exchange, timeframe)] = time.time()
+        self._wake.set()
+
+    def _due(self, now: float) -> list[tuple[str, str]]:
+        """Combinações ativas cujo snapshot venceu (ou ainda não existe), sem scan em andamento
+        nem backoff de falha"""
+        due = []
+        with self._lock:
+            for key, requested_at in list(self._active.items()):
+                if now - requested_at > SCAN_SCHEDULER_CONFIG['idle_after']:
+                    del self._active[key]
+                    continue
+                if key in self._running or now < scan_cache.backoff_until(*key):
+                    continue
+                entry = scan_cache.latest(*key)
+                if entry is None or entry.expired():
+                    self._running.add(key)
+                    due.append(key)
+        return due
+
+    def _refresh(self, key: tuple[str, str]) -> None:
+        exchange, timeframe = key
+        try:
+            func = self._functions.get(exchange)
+            if func is not None:
+                func.refresh(timeframe)
+        except Exception:
+            # Registrado como falha no scan_cache: a próxima tentativa espera o backoff e a
+            # página continua com o último snapshot
+            logger.exception("Scan em segundo plano de %s (%s) falhou", exchange, timeframe)
+        finally:
+            with self._lock:
+                self._running.discard(key)
+            self._wake.set()
+
+    def _loop(self) -> None:
+        while True:
+            for key in self._due(time.time()):
+                self._executor.submit(self._refresh, key)
+            self._wake.wait(SCAN_SCHEDULER_CONFIG['poll_interval'])
+            self._wake.clear()
+
+
+_scheduler = ScanScheduler()
+
+
+def watch(functions: dict, exchange: str, timeframe: str) -> bool:
+    """Mantém (exchange, timeframe) atualizado em segundo plano, iniciando a thread na primeira
+    chamada. Retorna False quando o agendador está desabilitado: a página busca os dados ela mesma."""
+    if not SCAN_SCHEDULER_CONFIG['enabled']:
+        return False
+    _scheduler.start()
+    _scheduler.watch(functions, exchange, timeframe)
+    return _scheduler.running
@@ -108,49 +108,172 @@ def health_check():
     }
 
 # Configurações específicas para diferentes exchanges
+# 'weight_per_minute': peso de requisições por minuto do limitador (ver rate_limiter.py). Cada
+# requisição consome o seu peso (http_get/call_with_retry com weight=...; 1 por padrão), então
+# para as exchanges sem pesos declarados o valor equivale a requisições por minuto.
+# 'burst': saldo máximo do limitador; deve caber um scan inteiro (ticker + velas de ~200 símbolos)
+# para que as requisições simultâneas (max_concurrency) não fiquem esperando a reposição.
 EXCHANGE_CONFIGS = {
     'binance': {
-        'rate_limit': 1200,  # requests per minute
+        # Binance cobra por peso: klines = 2, ticker 24h de todos os símbolos = 80; limite da API
+        # spot (REQUEST_WEIGHT) de 6000 por minuto, compartilhado por Binance e Binance BTC.
+        # Um scan custa ~480 (80 + 200 x 2); o burst cobre os dois mercados ao mesmo tempo e o
+        # cabeçalho de peso usado mantém o total do minuto dentro do limite
+        'weight_per_minute': 6000,
+        'burst': 1200,
+        'used_weight_header': 'X-MBX-USED-WEIGHT-1M',
         'timeout': 30,
         'retry_attempts': 3,
+        'max_concurrency': 10,  # requisições de velas simultâneas
+        'max_candles': 1000,  # máximo de velas por requisição (limite da API)
     },
     'bybit': {
-        'rate_limit': 1000,
+        'weight_per_minute': 1000,
+        'burst': 300,
         'timeout': 30,
         'retry_attempts': 3,
+        'max_concurrency': 8,
+        'max_candles': 1000,
     },
     'bitget': {
-        'rate_limit': 800,
+        'weight_per_minute': 800,
+        'burst': 300,
         'timeout': 30,
         'retry_attempts': 3,
+        'max_concurrency': 8,
+        'max_candles': 1000,
+        'ccxt_backend': 'async',  # 'sync' ou 'async' (ver ccxt_backend.py)
     },
     'kucoin': {
-        'rate_limit': 600,
+        'weight_per_minute': 600,
+        'burst': 300,
         'timeout': 30,
         'retry_attempts': 3,
+        'max_concurrency': 8,
+        'max_candles': 1500,
     },
     'okx': {
-        'rate_limit': 1000,
+        'weight_per_minute': 1000,
+        'burst': 300,
         'timeout': 30,
         'retry_attempts': 3,
+        'max_concurrency': 8,
+        'max_candles': 300,
     },
     'bingx': {
-        'rate_limit': 800,
+        'weight_per_minute': 800,
+        'burst': 300,
         'timeout': 30,
         'retry_attempts': 3,
+        'max_concurrency': 8,
+        'max_candles': 1440,
+        'ccxt_backend': 'async',
     },
     'huobi': {
-        'rate_limit': 600,
+        'weight_per_minute': 600,
+        'burst': 300,
         'timeout': 30,
         'retry_attempts': 3,
+        'max_concurrency': 8,
+        'max_candles': 2000,
     },
     'phemex': {
-        'rate_limit': 1000,
+        'weight_per_minute': 1000,
+        'burst': 300,
         'timeout': 30,
         'retry_attempts': 3,
+        'max_concurrency': 8,
+        'max_candles': 1000,
+        'ccxt_backend': 'async',
     }
 }
 
+# Pool HTTP compartilhado pelos fetchers REST (ver exchange_client.py)
+HTTP_POOL_CONFIG = {
+    'pool_connections': 16,  # número de hosts com pool próprio
+    'pool_maxsize': 16,      # conexões keep-alive por host (>= max_concurrency)
+    'pool_block': True,      # aguardar conexão livre em vez de abrir conexões extras
+}
+
+# Retry com backoff exponencial e circuit breaker por exchange (ver exchange_client.py)
+RETRY_CONFIG = {
+    'backoff_base': 0.5,      # segundos, dobra a cada tentativa
+    'backoff_max': 8,         # teto do backoff (Retry-After maior que isso não é aguardado)
+    'failure_threshold': 5,   # falhas consecutivas para abrir o circuito
+    'reset_timeout': 60,      # segundos com o circuito aberto antes de testar de novo
+}
+
+# Instâncias CCXT compartilhadas (ver exchange_client.get_ccxt_exchange)
+CCXT_CONFIG = {
+    'markets_ttl': 6 * 3600,  # segundos até recarregar os mercados em segundo plano
+}
+
+# Velas salvas em disco para partida rápida após restart/deploy (ver candle_store.py)
+CANDLE_STORE_CONFIG = {
+    'enabled': True,
+    'path': os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'candles.sqlite3'),
+    'max_rows_per_key': 2000,  # velas mantidas por (exchange, símbolo, timeframe)
+    'buffer_idle_ttl': 1800,   # segundos sem uso até o buffer em memória ser descartado (fica no disco)
+}
+
+# Timeframes montados localmente a partir de velas base (ver candle_store.resample_base)
+# Só vale para exchanges cujo 'max_candles' comporta a janela base numa requisição.
+RESAMPLE_CONFIG = {
+    'enabled': True,
+    'bases': {
+        '15m': '5m',
+        '30m': '5m',
+        '1h': '5m',
+        '2h': '1h',
+        '4h': '1h',
+    },
+}
+
+# Velas da Binance via WebSocket (ver binance_stream.py)
+BINANCE_STREAM_CONFIG = {
+    'enabled': False,
+    'url': 'wss://stream.binance.com:9443/stream',  # trocar por ws://127.0.0.1:<porta>/stream para testes locais
+    'stale_after': 30,       # segundos sem mensagens de um símbolo até voltar para o REST
+    'reconnect_delay': 5,    # segundos entre tentativas de reconexão
+    'unsubscribe_after': 1800,  # segundos sem nenhum scan pedir o símbolo até tirá-lo do stream
+}
+
+# Motor de indicadores (ver indicator_kernels.py)
+INDICATOR_CONFIG = {
+    'backend': 'numba',  # 'numba' (compilado, requer pip install numba) ou 'numpy'; sem Numba cai para 'numpy'
+    # Modo compacto: painel de velas, indicadores e snapshots em cache em float32 (metade da
+    # memória); médias e somas acumuladas continuam em float64 (ver debug_compact_mode.py)
+    'compact': False,
+}
+
+# Scans em segundo plano (ver scan_scheduler.py)
+# Cada combinação ativa é refeita quando o seu snapshot vence (ver SCAN_CACHE_CONFIG)
+SCAN_SCHEDULER_CONFIG = {
+    'enabled': True,
+    'idle_after': 1800,   # segundos sem nenhuma sessão pedindo a combinação até parar de atualizá-la
+    'max_parallel': 2,    # scans simultâneos (cada scan já paraleliza as requisições por símbolo)
+    'poll_interval': 5,   # segundos entre verificações da thread
+}
+
+# Snapshots de scan servidos às páginas (ver scan_cache.py)
+SCAN_CACHE_CONFIG = {
+    # Um snapshot vale até o próximo fechamento de vela do timeframe (UTC) + 'close_grace' segundos
+    'close_grace': 15,
+    # Atualização da vela em formação entre fechamentos (segundos por timeframe; timeframe fora do
+    # dicionário só é atualizado no fechamento). Barata: o candle_store só baixa as últimas velas.
+    # {} desliga a atualização entre fechamentos.
+    'forming_refresh': {'15m': 300, '30m': 300, '1h': 300, '2h': 600, '4h': 600, '1d': 900},
+    'default_ttl': 300,   # timeframes sem fechamento conhecido
+    # Stale-while-revalidate: um snapshot vencido continua sendo exibido (com a idade no banner)
+    # enquanto um scan novo roda em segundo plano; só depois de vencido há mais que isto (s) a
+    # página espera o scan
+    'hard_expiry': 1800,
+    # Scan que falha ou volta vazio: a chave não é escaneada de novo por 'failure_backoff' segundos,
+    # dobrando a cada falha seguida até 'failure_backoff_max' (circuito aberto, erro 451, etc.)
+    'failure_backoff': 30,
+    'failure_backoff_max': 600,
+}
+
 # Configurações de backup (específicas para Contabo)
 BACKUP_CONFIG = {
     'enabled': True,